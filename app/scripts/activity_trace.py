@@ -0,0 +1,420 @@
+"""
+用戶行為軌跡 - Ticket Match 假資料生成用
+以生成的用戶、活動與貼文產生 MongoDB user_activity_log 的文件 (欄位同 lib/mongodb.ts logUserActivity)：
+  search        {user_id, action, keyword, timestamp}             搜尋活動 (/api/events?search=)
+  click         {user_id, action, keyword, event_id, timestamp}   點選搜尋結果 (之後一定接著 view_event)
+  view_event    {user_id, action, event_id, timestamp}            活動頁 (/api/events/[id])
+  view_listing  {user_id, action, listing_id, timestamp}          貼文頁 (/api/listings/[id])
+供 search-keywords / browsing-trends / popular-views / user-browsing 分析與 init-mongodb-indexes.js 的索引
+在實際資料量下做基準測試
+
+模型：
+  工作階段  用戶依活躍度 (對數常態，少數重度用戶) 抽出；開始時間在 [結束前 days 天, 結束) 之間，
+            依台灣時間的每小時權重 (午休與晚間高峰) 與週末加權分佈；timestamp 以 UTC 儲存 (同 new Date())
+  動作      以 TRANSITIONS 的馬可夫鏈決定下一個動作，間隔 (思考時間) 依前一個動作取對數常態分佈
+  熱門度    活動依藝人 popularity (POPULARITY_WEIGHTS) 乘上每個活動的對數常態因子加權；
+            搜尋關鍵字取自同一活動的藝人、場地或活動名稱，貼文取自正在瀏覽的活動中上架的貼文
+文件以串流方式逐一產生，記憶體用量與文件數無關；相同 seed 與分片 (part) 產生相同的軌跡
+輸出為 mongoimport 可讀的 JSONL (timestamp 為 Extended JSON 的 {"$date": ...})，或以 pymongo 批次寫入
+"""
+
+import bisect
+import json
+import math
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate, islice
+from json.encoder import encode_basestring
+
+try:
+    import pymongo
+    HAS_PYMONGO = True
+except ImportError:  # pragma: no cover - 依安裝環境而定
+    pymongo = None
+    HAS_PYMONGO = False
+
+from chunked_export import COMPRESSIONS, open_output
+from taiwan_music_data import TAIWAN_ARTISTS
+
+COLLECTION = 'user_activity_log'
+DEFAULT_MONGODB_URI = 'mongodb://localhost:27017/ticket_match'
+DEFAULT_DAYS = 30
+BATCH_SIZE = 10000
+EXTENSION = '.jsonl'
+
+# 同 init-mongodb-indexes.js
+INDEXES = (
+    (('user_id', 1), ('timestamp', -1)),
+    (('action', 1), ('timestamp', -1)),
+    (('event_id', 1),),
+    (('listing_id', 1),),
+    (('timestamp', -1),),
+)
+
+# 藝人知名度 -> 活動的瀏覽權重
+POPULARITY_WEIGHTS = {'legend': 10, 'superstar': 6, 'hot': 3.5, 'veteran': 3, 'rising': 2}
+# 同一知名度的活動之間的差異 (對數常態因子的 sigma)
+EVENT_WEIGHT_SIGMA = 0.6
+# 用戶活躍度 (每個用戶工作階段數的權重) 的對數常態 sigma
+USER_ACTIVITY_SIGMA = 1.2
+
+# 台灣時間 0-23 時開始工作階段的權重
+HOURLY_WEIGHTS = (3, 2, 1, 1, 1, 1, 2, 4, 6, 7, 7, 8, 11, 10, 8, 8, 8, 9, 11, 14, 16, 17, 15, 8)
+WEEKEND_WEIGHT = 1.3
+LOCAL_OFFSET = timedelta(hours=8)
+
+# 動作 -> {下一個動作: 權重}；start 為工作階段的第一個動作，end 結束工作階段
+TRANSITIONS = {
+    'start': {'search': 45, 'view_event': 40, 'view_listing': 15},
+    'search': {'click': 65, 'search': 15, 'end': 20},
+    'click': {'view_event': 1},
+    'view_event': {'view_listing': 50, 'view_event': 15, 'search': 10, 'end': 25},
+    'view_listing': {'view_listing': 40, 'view_event': 15, 'search': 5, 'end': 40},
+}
+MAX_SESSION_ACTIONS = 60
+# 動作 -> 到下一個動作的思考時間中位數 (秒)；對數常態分佈，上限 THINK_MAX_SECONDS
+THINK_SECONDS = {'search': 8, 'click': 1.5, 'view_event': 25, 'view_listing': 40}
+THINK_SIGMA = 0.8
+THINK_MAX_SECONDS = 900
+
+# 搜尋關鍵字的來源 -> 權重 (同一活動的藝人 / 場地 / 活動名稱)
+KEYWORD_SOURCES = {'artist': 60, 'venue': 15, 'event_name': 25}
+
+_ARTISTS = {artist['name']: artist for artist in TAIWAN_ARTISTS}
+
+
+def artist_of(event):
+    """活動的藝人 (event_name 為 '<藝人> <活動類型>'，活動類型不含空白)；找不到時為 None"""
+    return _ARTISTS.get(event['event_name'].rpartition(' ')[0])
+
+
+def event_weight(event):
+    """活動的基本瀏覽權重：藝人知名度 (清單模式的活動另有 artist_popularity；快照只能由活動名稱對回藝人)"""
+    popularity = event.get('artist_popularity')
+    if popularity is None:
+        artist = artist_of(event)
+        popularity = artist['popularity'] if artist else 'rising'
+    return POPULARITY_WEIGHTS[popularity]
+
+
+def _cumulative(weights):
+    return list(accumulate(weights))
+
+
+class ActivityPopulation:
+    """
+    產生軌跡用的維度資料：可登入 (非 Suspended) 的用戶、活動 (基本權重與搜尋關鍵字) 與各活動上架中的貼文
+    只保留 id 與少量字串，可在 fork 的 worker 間共用
+    """
+
+    def __init__(self, user_ids, events, listings_by_event):
+        self.user_ids = list(user_ids)
+        self.events = list(events)
+        self.listings_by_event = listings_by_event
+        if not self.user_ids or not self.events:
+            raise ValueError("產生行為軌跡需要至少一個可登入的用戶與一個活動")
+
+    @classmethod
+    def from_generator(cls, generator):
+        """清單模式的 TicketMatchDataGenerator 或 load_snapshot 開啟的快照"""
+        columns = generator.users.columns
+        user_ids = [user_id for user_id, status in zip(columns['user_id'], columns['status'])
+                    if status != 'Suspended']
+        events = []
+        for event in generator.events:
+            artist = artist_of(event)
+            events.append({
+                'event_id': event['event_id'],
+                'weight': event_weight(event),
+                'keywords': {'artist': artist['name'] if artist else event['event_name'],
+                             'venue': event['venue'], 'event_name': event['event_name']},
+            })
+        listings_by_event = {}
+        columns = generator.listings.columns
+        for listing_id, event_id, status in zip(columns['listing_id'], columns['event_id'], columns['status']):
+            if status == 'Active':
+                listings_by_event.setdefault(event_id, []).append(listing_id)
+        return cls(user_ids, events, listings_by_event)
+
+
+class ActivityTrace:
+    """
+    population 的 documents 筆行為文件 (dict，可直接交給 pymongo；timestamp 為 UTC 的 datetime)
+    工作階段開始於 [end - days 天, end) (end 為台灣時間，不含時區)；part 為平行產生時的分片編號，
+    各分片以 (seed, part) 決定亂數，用戶活躍度與活動權重則只由 seed 決定 (所有分片共用同一份熱門度)；
+    工作階段在 end 之後的動作不會產生
+    session_ids=True 時每筆文件另有 metadata.session_id
+    """
+
+    def __init__(self, population, documents, end, days=DEFAULT_DAYS, seed=None, part=0, session_ids=False):
+        if documents < 0:
+            raise ValueError(f"文件數必須 >= 0: {documents}")
+        if days <= 0:
+            raise ValueError(f"天數必須 > 0: {days}")
+        self.population = population
+        self.documents = documents
+        self.part = part
+        self.session_ids = session_ids
+        # 視窗 [end - days 天, end) 以 UTC 秒數表示
+        self._end = _utc_seconds(end)
+        self._start = self._end - days * 86400
+
+        shared = random.Random(f"{seed}:weights")
+        self._user_weights = _cumulative(
+            shared.lognormvariate(0, USER_ACTIVITY_SIGMA) for _ in population.user_ids)
+        self._event_weights = _cumulative(
+            event['weight'] * shared.lognormvariate(0, EVENT_WEIGHT_SIGMA) for event in population.events)
+        self.rng = random.Random(f"{seed}:{part}")
+
+        # 視窗涵蓋的每個台灣日 (當日 0 時的 UTC 秒數) 與權重 (週末加權)
+        first = (end - timedelta(days=days)).date()
+        dates = [first + timedelta(days=i) for i in range((end.date() - first).days + 1)]
+        self._days = [_utc_seconds(datetime(d.year, d.month, d.day)) for d in dates]
+        self._day_weights = _cumulative(WEEKEND_WEIGHT if d.weekday() >= 5 else 1 for d in dates)
+        self._hour_weights = _cumulative(HOURLY_WEIGHTS)
+        self._transitions = {action: (list(choices), _cumulative(choices.values()))
+                             for action, choices in TRANSITIONS.items()}
+        self._keyword_sources = (list(KEYWORD_SOURCES), _cumulative(KEYWORD_SOURCES.values()))
+        self._think_mu = {action: math.log(seconds) for action, seconds in THINK_SECONDS.items()}
+
+    def __iter__(self):
+        return islice(self._documents(), self.documents)
+
+    def _pick(self, items, cumulative):
+        return items[bisect.bisect(cumulative, self.rng.random() * cumulative[-1])]
+
+    def _session_start(self):
+        """工作階段開始時間 (UTC 秒數)：依權重選一天與當天的一個小時，小時內均勻；落在視窗外 (頭尾兩天) 時重抽"""
+        while True:
+            moment = (self._pick(self._days, self._day_weights)
+                      + self._pick(range(24), self._hour_weights) * 3600 + self.rng.random() * 3600)
+            if self._start <= moment < self._end:
+                return moment
+
+    def _documents(self):
+        rng = self.rng
+        population = self.population
+        user_ids = population.user_ids
+        events = population.events
+        listings_by_event = population.listings_by_event
+        pick = self._pick
+        transitions = self._transitions
+        think_mu = self._think_mu
+        end = self._end
+        session = 0
+        while True:
+            session += 1
+            user_id = pick(user_ids, self._user_weights)
+            metadata = {'session_id': f"{self.part}-{session}"} if self.session_ids else None
+            t = self._session_start()
+            action = 'start'
+            event = keyword = None
+            for _ in range(MAX_SESSION_ACTIONS):
+                previous = action
+                action = pick(*transitions[action])
+                if action == 'end':
+                    break
+                if previous != 'start':
+                    t += min(rng.lognormvariate(think_mu[previous], THINK_SIGMA), THINK_MAX_SECONDS)
+                    if t >= end:
+                        break
+                document = {'user_id': user_id, 'action': action}
+                if action == 'search':
+                    event = pick(events, self._event_weights)
+                    keyword = event['keywords'][pick(*self._keyword_sources)]
+                    document['keyword'] = keyword
+                elif action == 'click':
+                    document['keyword'] = keyword
+                    document['event_id'] = event['event_id']
+                elif action == 'view_event':
+                    # 點選搜尋結果後進入同一個活動，其他情況 (首頁、回到列表) 依熱門度換一個活動
+                    if previous != 'click':
+                        event = pick(events, self._event_weights)
+                    document['event_id'] = event['event_id']
+                else:
+                    if event is None:
+                        event = pick(events, self._event_weights)
+                    listings = listings_by_event.get(event['event_id'])
+                    if not listings:
+                        break
+                    document['listing_id'] = listings[rng.randrange(len(listings))]
+                if metadata is not None:
+                    document['metadata'] = metadata
+                document['timestamp'] = datetime.fromtimestamp(t, timezone.utc)
+                yield document
+
+
+def _utc_seconds(local):
+    """台灣時間 (不含時區) -> 自 1970 起的 UTC 秒數"""
+    return (local - LOCAL_OFFSET).replace(tzinfo=timezone.utc).timestamp()
+
+
+def jsonl_line(document):
+    """
+    一筆文件 -> mongoimport 可讀的一行 JSON (Extended JSON relaxed 格式：datetime 寫成 {"$date": "...Z"}，含換行)
+    文件只有字串/整數/datetime 欄位 (metadata 除外)，逐欄直接組字串，比 json.dumps 加 default 快
+    """
+    parts = []
+    for key, value in document.items():
+        cls = value.__class__
+        if cls is str:
+            parts.append(f'"{key}":{encode_basestring(value)}')
+        elif cls is int:
+            parts.append(f'"{key}":{value}')
+        elif cls is datetime:
+            parts.append(f'"{key}":{{"$date":"{value.isoformat(timespec="milliseconds")[:-6]}Z"}}')
+        else:
+            parts.append(f'"{key}":{json.dumps(value, ensure_ascii=False, separators=(",", ":"))}')
+    return '{' + ','.join(parts) + '}\n'
+
+
+def write_jsonl(documents, path, compression=None):
+    """把文件寫成 JSONL (compression 見 chunked_export.COMPRESSIONS)，回傳筆數"""
+    count = 0
+    f = open_output(path, compression)
+    try:
+        lines = []
+        for document in documents:
+            lines.append(jsonl_line(document))
+            if len(lines) >= BATCH_SIZE:
+                f.write(''.join(lines))
+                count += len(lines)
+                lines = []
+        f.write(''.join(lines))
+        count += len(lines)
+    finally:
+        f.close()
+    return count
+
+
+def _require_pymongo():
+    if not HAS_PYMONGO:
+        raise RuntimeError("寫入 MongoDB 需要 pymongo，請執行: pip install pymongo")
+
+
+def mongo_collection(uri=None):
+    """MONGODB_URI (預設同 lib/mongodb.ts) 的預設資料庫中的 user_activity_log"""
+    _require_pymongo()
+    client = pymongo.MongoClient(uri or os.environ.get('MONGODB_URI', DEFAULT_MONGODB_URI))
+    return client, client.get_default_database()[COLLECTION]
+
+
+def insert_documents(documents, uri=None, batch_size=BATCH_SIZE):
+    """以 insert_many (ordered=False) 每 batch_size 筆批次寫入，回傳筆數"""
+    client, collection = mongo_collection(uri)
+    count = 0
+    try:
+        batch = []
+        for document in documents:
+            batch.append(document)
+            if len(batch) >= batch_size:
+                collection.insert_many(batch, ordered=False)
+                count += len(batch)
+                batch = []
+        if batch:
+            collection.insert_many(batch, ordered=False)
+            count += len(batch)
+    finally:
+        client.close()
+    return count
+
+
+def prepare_collection(uri=None, drop=False):
+    """寫入前：drop=True 時清空 user_activity_log，並先移除索引 (寫入後以 create_indexes 重建較快)"""
+    client, collection = mongo_collection(uri)
+    try:
+        if drop:
+            collection.drop()
+        elif COLLECTION in collection.database.list_collection_names():
+            collection.drop_indexes()
+    finally:
+        client.close()
+
+
+def create_indexes(uri=None):
+    """建立 init-mongodb-indexes.js 的索引"""
+    client, collection = mongo_collection(uri)
+    try:
+        for keys in INDEXES:
+            collection.create_index(list(keys))
+    finally:
+        client.close()
+
+
+def part_path(directory, number, compression=None):
+    """分片檔路徑；number 由 1 起算"""
+    return os.path.join(directory, f"activity-{number:05d}{EXTENSION}{COMPRESSIONS[compression]}")
+
+
+def part_sizes(documents, parts):
+    """把 documents 筆平均分給 parts 個分片"""
+    return [documents // parts + (1 if i < documents % parts else 0) for i in range(parts)]
+
+
+# worker 的產生狀態 (由 _init_worker 設定；fork 時直接繼承主程序的 population)
+_STATE = {}
+
+
+def _init_worker(state):
+    _STATE.update(state)
+
+
+def _executor(workers, state):
+    """workers 個 worker 程序 (以 fork 繼承 state)；無法 fork 時改用執行緒 (同 chunked_export)"""
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'),
+                                   initializer=_init_worker, initargs=(state,))
+    _init_worker(state)
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def _run_part(task):
+    """worker：產生一個分片的軌跡並寫成檔案 (path) 或寫入 MongoDB (uri)，回傳筆數"""
+    trace = ActivityTrace(_STATE['population'], task['documents'], _STATE['end'], _STATE['days'],
+                          _STATE['seed'], task['part'], _STATE['session_ids'])
+    if task['path'] is not None:
+        return write_jsonl(trace, task['path'], _STATE['compression'])
+    return insert_documents(trace, _STATE['uri'], _STATE['batch_size'])
+
+
+def generate_activity(population, documents, end, days=DEFAULT_DAYS, seed=None, parts=1, workers=None,
+                      output=None, compression=None, uri=None, batch_size=BATCH_SIZE, session_ids=False):
+    """
+    產生 documents 筆行為文件，分成 parts 個分片由 workers 個 worker 程序平行產生，回傳各分片的筆數
+    output 不為 None 時寫成 JSONL：parts 為 1 時 output 為檔案，否則為放分片檔的目錄；
+    否則寫入 uri 的 MongoDB (每個 worker 各自連線)。內容只取決於 seed 與 parts，與 worker 數無關
+    """
+    if parts < 1:
+        raise ValueError(f"分片數必須 >= 1: {parts}")
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"不支援的壓縮方式: {compression}")
+    if output is None:
+        _require_pymongo()
+    tasks = []
+    for part, size in enumerate(part_sizes(documents, parts)):
+        if output is None:
+            path = None
+        elif parts == 1:
+            path = output
+        else:
+            path = part_path(output, part + 1, compression)
+        tasks.append({'part': part, 'documents': size, 'path': path})
+    if output is not None and parts > 1:
+        os.makedirs(output, exist_ok=True)
+    elif output is not None and os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+
+    state = {'population': population, 'end': end, 'days': days, 'seed': seed, 'session_ids': session_ids,
+             'compression': compression, 'uri': uri, 'batch_size': batch_size}
+    workers = min(workers or os.cpu_count() or 1, parts)
+    if workers == 1:
+        _init_worker(state)
+        counts = list(map(_run_part, tasks))
+    else:
+        with _executor(workers, state) as executor:
+            counts = list(executor.map(_run_part, tasks))
+    _STATE.clear()
+    return counts
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Ticket Match 假資料生成器效能基準測試
+在多個規模下量測各階段耗時，並以 log-log 迴歸估計複雜度指數 (1.0 = 線性)
+
+單一階段 (--stage)：以指定筆數重複量測一個生成階段
+完整套件 (--suite)：在每個規模下依序執行所有生成階段、完整性驗證與各匯出格式，
+記錄耗時、筆數/秒與 tracemalloc 峰值記憶體 (另跑一輪量測，tracemalloc 的開銷不計入耗時)，擬合各步驟的複雜度指數，並可存成 JSON 供不同 commit 比較
+
+使用方法:
+  python benchmark-generator.py --stage users --sizes 10000 20000 40000 80000
+  python benchmark-generator.py --suite --scales 0.1 1 5 20 --json bench-main.json
+  python benchmark-generator.py --suite --compare bench-main.json --json bench-branch.json
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, date
+from data_generator import TicketMatchDataGenerator
+from seat_map import VenueSeatMap
+from taiwan_music_data import VENUES
+from value_pools import ValuePools
+
+
+def bench_users(size):
+    generator = TicketMatchDataGenerator()
+    start = time.perf_counter()
+    generator.generate_users(size)
+    return time.perf_counter() - start
+
+
+def bench_events(size):
+    generator = TicketMatchDataGenerator()
+    start = time.perf_counter()
+    generator.generate_events_and_times(size)
+    return time.perf_counter() - start
+
+
+def bench_tickets(size):
+    generator = TicketMatchDataGenerator()
+    generator.generate_users(max(size // 3, 10))
+    generator.generate_events_and_times(max(size // 30, 1))
+    start = time.perf_counter()
+    generator.generate_tickets(size)
+    return time.perf_counter() - start
+
+
+def bench_listings(size):
+    generator = TicketMatchDataGenerator()
+    generator.generate_users(max(size // 4, 10))
+    generator.generate_events_and_times(max(size // 40, 1))
+    generator.generate_tickets(size)
+    start = time.perf_counter()
+    generator.generate_listings(size)
+    return time.perf_counter() - start
+
+
+def bench_trades(size):
+    generator = TicketMatchDataGenerator()
+    generator.generate_users(max(size, 10))
+    generator.generate_events_and_times(max(size // 10, 1))
+    generator.generate_tickets(size * 4)
+    generator.generate_listings(size * 4)
+    start = time.perf_counter()
+    generator.generate_trades_and_related(size)
+    return time.perf_counter() - start
+
+
+def bench_ticket_columns(size):
+    """只量測票券數值欄位的批次生成 (需要 numpy)"""
+    generator = TicketMatchDataGenerator(vectorized=True)
+    generator.generate_events_and_times(max(size // 100, 1))
+    seat_maps = {v['name']: VenueSeatMap(v) for v in VENUES}
+    eventtimes = generator.eventtimes
+    start = time.perf_counter()
+    generator.engine.tickets([et['eventtime_id'] for et in eventtimes],
+                             [seat_maps[et['venue']].capacity for et in eventtimes],
+                             [et['start_time'] for et in eventtimes],
+                             size // 3, size, generator.now)
+    return time.perf_counter() - start
+
+
+STAGES = {
+    'users': bench_users,
+    'events': bench_events,
+    'tickets': bench_tickets,
+    'listings': bench_listings,
+    'trades': bench_trades,
+    'ticket-columns': bench_ticket_columns,
+}
+
+
+def fit_exponent(sizes, durations):
+    """以最小平方法擬合 log(time) = k * log(n) + c，回傳 k"""
+    xs = [math.log(n) for n in sizes]
+    ys = [math.log(max(d, 1e-9)) for d in durations]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    num = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    den = sum((x - mean_x) ** 2 for x in xs)
+    return num / den if den else 0.0
+
+
+# 完整套件的基準數量 (同 generate-fake-data.py 的預設值，再乘上規模倍率)
+BASE_COUNTS = {'users': 3000, 'events': 300, 'tickets': 10000, 'listings': 12000, 'trades': 3000}
+
+# 完整套件的步驟順序；後面的步驟使用前面步驟生成的資料
+SUITE_STEPS = ('users', 'events', 'tickets', 'listings', 'trades', 'validate',
+               'export-sql', 'export-copy', 'export-csv')
+
+# 各生成步驟產生的資料表 (計算筆數/秒用)；驗證與匯出步驟以全部資料表的筆數計
+STEP_TABLES = {
+    'users': ('USER', 'USER_ROLE'),
+    'events': ('EVENT', 'EVENTTIME'),
+    'tickets': ('TICKET',),
+    'listings': ('LISTING', 'LISTING_TICKET'),
+    'trades': ('TRADE', 'TRADE_PARTICIPANT', 'TRADE_TICKET', 'USER_BALANCE_LOG'),
+}
+
+RESULT_VERSION = 1
+
+
+def measure(func, trace_memory):
+    """回傳 (秒數, tracemalloc 峰值位元組)；峰值只計本步驟新配置的記憶體，trace_memory 為 False 時為 None"""
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        func()
+        return time.perf_counter() - start, tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+
+def run_suite_scale(scale, seed, now, workdir, trace_memory=True):
+    """在一個規模下依序執行 SUITE_STEPS，回傳 步驟 -> {rows, seconds, rows_per_sec, peak_bytes[, output_bytes]}"""
+    counts = {name: max(int(base * scale), 1) for name, base in BASE_COUNTS.items()}
+    # 值池是固定的啟動成本，事先建立，不計入用戶階段
+    generator = TicketMatchDataGenerator(scale, seed=seed, now=now, pools=ValuePools.build(seed))
+    steps = {
+        'users': lambda: generator.generate_users(counts['users']),
+        'events': lambda: generator.generate_events_and_times(counts['events']),
+        'tickets': lambda: generator.generate_tickets(counts['tickets']),
+        'listings': lambda: generator.generate_listings(counts['listings']),
+        'trades': lambda: generator.generate_trades_and_related(counts['trades']),
+        'validate': generator.validate_data_integrity,
+        'export-sql': lambda: generator.export_to_sql(os.path.join(workdir, 'data.sql')),
+        'export-copy': lambda: generator.export_to_copy(os.path.join(workdir, 'data.copy'), 'copy'),
+        'export-csv': lambda: generator.export_to_copy(os.path.join(workdir, 'data-csv'), 'csv'),
+    }
+    outputs = {'export-sql': 'data.sql', 'export-copy': 'data.copy', 'export-csv': 'data-csv'}
+
+    results = {}
+    for step in SUITE_STEPS:
+        # 生成器的進度訊息會淹沒結果表，量測時不顯示
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            seconds, peak = measure(steps[step], trace_memory)
+        table_counts = generator.table_counts()
+        tables = STEP_TABLES.get(step, table_counts)
+        rows = sum(table_counts[table] for table in tables)
+        results[step] = {'rows': rows, 'seconds': seconds, 'rows_per_sec': rows / seconds if seconds else None,
+                         'peak_bytes': peak}
+        if step in outputs:
+            path = os.path.join(workdir, outputs[step])
+            results[step]['output_bytes'] = output_size(path)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+    return results
+
+
+def output_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def git_commit():
+    """目前的 commit (不在 git 工作目錄中時為 None)"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(baseline, current, max_slowdown):
+    """與先前的 JSON 結果比較相同規模的步驟耗時，回傳超過 max_slowdown 倍的 (步驟, 規模, 倍率)"""
+    regressions = []
+    print(f"🔁 與 {baseline.get('commit') or '基準'} 比較 (耗時倍率，>1 為變慢):")
+    for step in SUITE_STEPS:
+        before = {r['scale']: r for r in baseline['results'].get(step, [])}
+        for result in current['results'][step]:
+            old = before.get(result['scale'])
+            if not old or not old['seconds']:
+                continue
+            ratio = result['seconds'] / old['seconds']
+            mark = '❌' if ratio > max_slowdown else '  '
+            print(f"   {mark} {step:<12} scale={result['scale']:<6g} {old['seconds']:8.2f} → {result['seconds']:8.2f} 秒"
+                  f"  ×{ratio:.2f}")
+            if ratio > max_slowdown:
+                regressions.append((step, result['scale'], ratio))
+    return regressions
+
+
+def run_suite(args):
+    now = datetime.combine(date.fromisoformat(args.reference_date), datetime.min.time())
+    report = {
+        'version': RESULT_VERSION,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'reference_time': now.isoformat(),
+        'scales': args.scales,
+        'results': {step: [] for step in SUITE_STEPS},
+        'exponents': {},
+    }
+
+    workdir = tempfile.mkdtemp(prefix='ticket-match-bench-')
+    try:
+        for scale in args.scales:
+            print(f"⏱️  規模 {scale:g}")
+            results = run_suite_scale(scale, args.seed, now, workdir, trace_memory=False)
+            if not args.no_memory:
+                # 資料由 seed 與基準時間決定，第二輪與第一輪相同，只取峰值記憶體
+                for step, traced in run_suite_scale(scale, args.seed, now, workdir, trace_memory=True).items():
+                    results[step]['peak_bytes'] = traced['peak_bytes']
+            for step, result in results.items():
+                report['results'][step].append(dict(result, scale=scale))
+                peak = f"{result['peak_bytes'] / 1024 ** 2:9.1f} MB" if result['peak_bytes'] is not None else ''
+                print(f"   {step:<12} {result['rows']:>10,} 筆  {result['seconds']:8.2f} 秒"
+                      f"  {result['rows_per_sec'] or 0:12,.0f} 筆/秒{peak}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    failed = []
+    print("📈 複雜度指數 (以筆數擬合):")
+    for step in SUITE_STEPS:
+        results = report['results'][step]
+        exponent = fit_exponent([r['rows'] for r in results], [r['seconds'] for r in results])
+        report['exponents'][step] = exponent
+        mark = '❌' if exponent > args.max_exponent else '  '
+        print(f"   {mark} {step:<12} {exponent:.2f}")
+        if exponent > args.max_exponent:
+            failed.append(step)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 結果已寫入 {args.json}")
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare_results(json.load(f), report, args.max_slowdown)
+
+    if failed:
+        print(f"❌ 複雜度指數超過上限 {args.max_exponent}，疑似非線性成長: {', '.join(failed)}")
+    if regressions:
+        print(f"❌ {len(regressions)} 個步驟比基準慢 {args.max_slowdown} 倍以上")
+    if failed or regressions:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ticket Match 假資料生成器效能基準測試')
+    parser.add_argument('--stage', choices=sorted(STAGES), default='users',
+                        help='要量測的階段 (預設: users)')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 20000, 40000, 80000],
+                        help='量測的資料筆數')
+    parser.add_argument('--max-exponent', type=float, default=1.3,
+                        help='複雜度指數上限，超過則以非零狀態結束 (預設: 1.3)')
+    parser.add_argument('--suite', action='store_true',
+                        help='執行完整套件：所有階段、驗證與匯出格式 (忽略 --stage / --sizes)')
+    parser.add_argument('--scales', type=float, nargs='+', default=[0.1, 1, 5, 20],
+                        help='完整套件的規模倍率 (預設: 0.1 1 5 20)')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='完整套件的隨機種子 (預設: 42)')
+    parser.add_argument('--reference-date', default='2025-01-01',
+                        help='完整套件的基準日期，固定後各次結果的資料內容相同 (預設: 2025-01-01)')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='不另跑一輪 tracemalloc 量測峰值記憶體 (該輪約比量測耗時的一輪慢 5 倍)')
+    parser.add_argument('--json', default=None,
+                        help='完整套件結果的 JSON 輸出路徑')
+    parser.add_argument('--compare', default=None,
+                        help='與先前 --json 輸出的結果比較，相同規模的步驟變慢超過 --max-slowdown 倍時以非零狀態結束')
+    parser.add_argument('--max-slowdown', type=float, default=1.5,
+                        help='--compare 允許的耗時倍率 (預設: 1.5)')
+    args = parser.parse_args()
+
+    if args.suite:
+        if len(args.scales) < 2:
+            parser.error('--suite 至少需要兩個規模才能擬合複雜度指數')
+        try:
+            date.fromisoformat(args.reference_date)
+        except ValueError:
+            parser.error(f"--reference-date 格式應為 YYYY-MM-DD: {args.reference_date}")
+        run_suite(args)
+        return
+    if args.json or args.compare:
+        parser.error('--json / --compare 需搭配 --suite 使用')
+
+    bench = STAGES[args.stage]
+    durations = []
+    print(f"⏱️  階段: {args.stage}")
+    for size in args.sizes:
+        duration = bench(size)
+        durations.append(duration)
+        print(f"   n={size:>10,}  {duration:8.2f} 秒  {size / duration:12,.0f} 筆/秒")
+
+    exponent = fit_exponent(args.sizes, durations)
+    print(f"📈 複雜度指數: {exponent:.2f}")
+    if exponent > args.max_exponent:
+        print(f"❌ 超過上限 {args.max_exponent}，疑似非線性成長")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Ticket Match 假資料載入效能基準測試
+同一份資料分別匯出為 INSERT (sql)、COPY (copy)、CSV (csv) 格式，
+各自載入一個全新的資料庫並比較 psql 載入時間
+
+各格式載入的是同一份資料：以 --seed 與 --reference-date 重新生成 (或取自 --snapshot)，
+基準日期預設固定為 2025-01-01，各次執行的結果可以互相比較
+
+連線設定沿用 init-db.js 的環境變數：POSTGRES_HOST / POSTGRES_PORT / POSTGRES_USER / POSTGRES_PASSWORD
+注意：--database 指定的資料庫每一輪都會被刪除重建
+
+使用方法:
+  python benchmark-load.py --scale 1 --database ticket_match_bench
+  python benchmark-load.py --snapshot snap --formats copy csv
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from data_generator import TicketMatchDataGenerator, add_dataset_arguments, check_dataset_arguments, dataset_from_args
+from finalize import SCHEMA_PATH
+
+DEFAULT_REFERENCE_DATE = '2025-01-01'
+
+
+def psql_env():
+    env = dict(os.environ)
+    env['PGHOST'] = os.environ.get('POSTGRES_HOST', 'localhost')
+    env['PGPORT'] = os.environ.get('POSTGRES_PORT', '5432')
+    env['PGUSER'] = os.environ.get('POSTGRES_USER', 'postgres')
+    env['PGPASSWORD'] = os.environ.get('POSTGRES_PASSWORD', 'postgres')
+    env['PGOPTIONS'] = '-c client_min_messages=warning'
+    return env
+
+
+def psql(env, database, *args, cwd=None):
+    subprocess.run(['psql', '-X', '-q', '-v', 'ON_ERROR_STOP=1', '-d', database, *args],
+                   env=env, cwd=cwd, check=True, stdout=subprocess.DEVNULL)
+
+
+def reset_database(env, database):
+    psql(env, 'postgres', '-c', f'DROP DATABASE IF EXISTS "{database}"')
+    psql(env, 'postgres', '-c', f'CREATE DATABASE "{database}"')
+    psql(env, database, '-f', SCHEMA_PATH)
+
+
+def output_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ticket Match 假資料載入效能基準測試 (INSERT vs COPY)')
+    add_dataset_arguments(parser, reference_date=DEFAULT_REFERENCE_DATE)
+    parser.add_argument('--database', default='ticket_match_bench',
+                        help='測試用資料庫，每一輪都會刪除重建 (預設: ticket_match_bench)')
+    parser.add_argument('--formats', nargs='+', choices=TicketMatchDataGenerator.EXPORT_FORMATS,
+                        default=list(TicketMatchDataGenerator.EXPORT_FORMATS),
+                        help='要比較的輸出格式 (預設: 全部)')
+    args = parser.parse_args()
+    check_dataset_arguments(parser, args)
+
+    if shutil.which('psql') is None:
+        print("❌ 找不到 psql，請先安裝 PostgreSQL 用戶端工具")
+        sys.exit(1)
+
+    generator = dataset_from_args(args)
+    rows = sum(generator.table_counts().values())
+
+    env = psql_env()
+    workdir = tempfile.mkdtemp(prefix='ticket-match-load-')
+    results = {}
+    try:
+        for fmt in args.formats:
+            path = os.path.join(workdir, 'data' if fmt == 'csv' else f'data-{fmt}.sql')
+            if fmt == 'sql':
+                generator.export_to_sql(path)
+            else:
+                generator.export_to_copy(path, fmt)
+
+            reset_database(env, args.database)
+            start = time.perf_counter()
+            if fmt == 'csv':
+                psql(env, args.database, '-f', 'load.sql', cwd=path)
+            else:
+                psql(env, args.database, '-f', path)
+            results[fmt] = (time.perf_counter() - start, output_size(path))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print()
+    print(f"⏱️  載入 {rows:,} 筆資料:")
+    baseline = results.get('sql', (None,))[0]
+    for fmt, (duration, size) in results.items():
+        speedup = f"  x{baseline / duration:.1f}" if baseline else ''
+        print(f"   {fmt:>4}  {duration:8.2f} 秒  {rows / duration:12,.0f} 筆/秒  {size / 1e6:8.1f} MB{speedup}")
+
+
+if __name__ == '__main__':
+    main()
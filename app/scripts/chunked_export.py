@@ -0,0 +1,267 @@
+"""
+分塊平行匯出 - Ticket Match 假資料生成用
+把清單模式的資料表切成固定列數的分塊，每塊寫成各自的檔案 (可邊寫邊壓縮成 gzip / zstd)：
+  <目錄>/<table>/<table>-00001.<副檔名>[.gz|.zst]
+  sql   每塊是獨立的 INSERT 腳本 (交易後的最終餘額為 UPDATE 腳本)
+  copy  COPY text 格式的資料列 (不含 COPY 指令)
+  csv   COPY csv 格式的資料列
+各分塊由 worker 程序平行格式化與壓縮；worker 以 fork 繼承主程序已收集的資料表，不必逐塊傳送資料
+(無法 fork 的平台改用執行緒)。分塊內容只取決於資料與分塊大小，與 worker 數無關 (gzip 標頭不含時間)
+manifest.json 依外鍵順序列出每個資料表的分塊檔 (筆數、大小)、載入用的 COPY 陳述式與載入層級 (load_levels)：
+同一層的資料表、同一資料表的各分塊可同時載入 (見 pg_loader.load_manifest)；log_id 依實際載入順序產生
+"""
+
+import gzip
+import json
+import multiprocessing
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:  # pragma: no cover - 依安裝環境而定
+    zstandard = None
+    HAS_ZSTD = False
+
+from finalize import secondary_indexes, prelude_statements, finalize_statements
+from row_serializers import serializer
+from sql_stream_writer import SqlStreamWriter, TABLES, UPDATES, UPDATE_KEY_TYPES, UPDATE, load_levels
+
+MANIFEST = 'manifest.json'
+MANIFEST_VERSION = 1
+
+DEFAULT_CHUNK_ROWS = 100000
+
+# 壓縮方式 -> 副檔名
+COMPRESSIONS = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+EXTENSIONS = {'sql': '.sql', 'copy': '.copy', 'csv': '.csv'}
+
+
+class _DataWriter(SqlStreamWriter):
+    """只寫資料列 (COPY text / csv)：COPY 指令由載入端依 manifest 下達，UPDATE 也寫成 (主鍵, 欄位...) 資料列"""
+
+    def __init__(self, f, chunk_rows=10000):
+        super().__init__(f, chunk_rows)
+
+    def write_rows(self, table, sql_name, columns, lines):
+        self.f.write('\n'.join(lines))
+        self.f.write('\n')
+
+    def _write_update(self, table, key, columns, rows):
+        format_row = serializer(table, self.FORMAT, (key,) + tuple(columns)).format_row
+        self.f.write('\n'.join(map(format_row, rows)))
+        self.f.write('\n')
+
+
+class CopyDataWriter(_DataWriter):
+    FORMAT = 'copy'
+
+
+class CsvDataWriter(_DataWriter):
+    FORMAT = 'csv'
+
+
+CHUNK_WRITERS = {'sql': SqlStreamWriter, 'copy': CopyDataWriter, 'csv': CsvDataWriter}
+
+
+class _EncodedOutput:
+    """壓縮串流的文字介面 (寫出器只用到 write)：以 UTF-8 編碼後寫入，close() 時一併關閉底層檔案"""
+
+    def __init__(self, stream, raw):
+        self.stream = stream
+        self.raw = raw
+
+    def write(self, text):
+        self.stream.write(text.encode('utf-8'))
+
+    def close(self):
+        self.stream.close()
+        self.raw.close()
+
+
+def _require_zstd():
+    if not HAS_ZSTD:
+        raise RuntimeError("zstd 壓縮需要 zstandard，請執行: pip install zstandard")
+
+
+def open_output(path, compression=None):
+    """開啟分塊檔供寫出 (文字)；compression 見 COMPRESSIONS"""
+    if compression is None:
+        return open(path, 'w', encoding='utf-8', newline='')
+    raw = open(path, 'wb')
+    if compression == 'gzip':
+        # mtime=0、不記檔名：相同內容的分塊逐位元組相同
+        return _EncodedOutput(gzip.GzipFile(filename='', mode='wb', compresslevel=GZIP_LEVEL, fileobj=raw, mtime=0), raw)
+    _require_zstd()
+    return _EncodedOutput(zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw), raw)
+
+
+def open_chunk(path):
+    """以二進位串流讀取分塊檔，依副檔名解壓縮"""
+    if path.endswith(COMPRESSIONS['gzip']):
+        return gzip.open(path, 'rb')
+    if path.endswith(COMPRESSIONS['zstd']):
+        _require_zstd()
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'))
+    return open(path, 'rb')
+
+
+def chunk_path(table, name, number, fmt, compression):
+    """分塊檔相對於匯出目錄的路徑；name 為資料表或 <table>_update，number 由 1 起算"""
+    return f"{table.lower()}/{name.lower()}-{number:05d}{EXTENSIONS[fmt]}{COMPRESSIONS[compression]}"
+
+
+def copy_statement(sql_name, columns, fmt):
+    options = ' WITH (FORMAT csv)' if fmt == 'csv' else ''
+    return f"COPY {sql_name} ({', '.join(columns)}) FROM STDIN{options}"
+
+
+def update_statements(table, fmt):
+    """copy / csv 格式套用 UPDATE 分塊的陳述式：(建立暫存表, COPY 暫存表, 更新並移除暫存表)"""
+    key, columns = UPDATES[table]
+    sql_name, _ = TABLES[table]
+    temp = f"{table.lower()}_update"
+    definitions = ', '.join([f"{key} {UPDATE_KEY_TYPES.get(table, 'integer')}"] + [f"{c} {t}" for c, t in columns.items()])
+    assignments = ', '.join(f"{c} = v.{c}" for c in columns)
+    return ([f"CREATE TEMP TABLE {temp} ({definitions});"],
+            copy_statement(temp, [key] + list(columns), fmt),
+            [f"UPDATE {sql_name} AS t SET {assignments} FROM {temp} AS v WHERE t.{key} = v.{key};",
+             f"DROP TABLE {temp};"])
+
+
+def chunk_tasks(sources, finals, fmt, chunk_rows, compression):
+    """
+    sources 為 資料表 -> [欄位 -> 該欄所有值, ...] (見 TicketMatchDataGenerator.collected_sources)，
+    finals 為 [(user_id, 最終餘額)]；每個分塊一個任務，依外鍵順序排列，最後是 USER 的 UPDATE 分塊
+    """
+    tasks = []
+    for table, values_list in sources.items():
+        number = 0
+        for index, values in enumerate(values_list):
+            total = len(next(iter(values.values())))
+            for start in range(0, total, chunk_rows):
+                number += 1
+                tasks.append({'table': table, 'source': index, 'start': start, 'stop': min(start + chunk_rows, total),
+                              'path': chunk_path(table, table, number, fmt, compression)})
+    for number, start in enumerate(range(0, len(finals), chunk_rows), 1):
+        tasks.append({'table': 'USER', 'source': None, 'start': start, 'stop': min(start + chunk_rows, len(finals)),
+                      'path': chunk_path('USER', 'USER_update', number, fmt, compression)})
+    return tasks
+
+
+# worker 的匯出狀態 (由 _init_worker 設定；fork 時直接繼承主程序的資料表)
+_STATE = {}
+
+
+def _init_worker(state):
+    _STATE.update(state)
+
+
+def _write_chunk(task):
+    """worker：把一個分塊寫成 (壓縮的) 檔案，回傳 manifest 中該分塊的項目"""
+    path = os.path.join(_STATE['directory'], task['path'])
+    f = open_output(path, _STATE['compression'])
+    try:
+        writer = CHUNK_WRITERS[_STATE['fmt']](f)
+        if task['source'] is None:
+            for user_id, balance in _STATE['finals'][task['start']:task['stop']]:
+                writer.write(UPDATE, 'USER', {'user_id': user_id, 'balance': balance})
+        else:
+            values = _STATE['sources'][task['table']][task['source']]
+            writer.write_columns(task['table'], values, task['start'], task['stop'])
+        writer.close()
+    finally:
+        f.close()
+    return {'path': task['path'], 'rows': task['stop'] - task['start'], 'bytes': os.path.getsize(path)}
+
+
+def _executor(workers, state):
+    """workers 個 worker 程序 (以 fork 繼承 state)；無法 fork 時改用執行緒"""
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'),
+                                   initializer=_init_worker, initargs=(state,))
+    _init_worker(state)
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def export_chunks(generator, directory, fmt='csv', chunk_rows=DEFAULT_CHUNK_ROWS, compression=None, workers=None):
+    """
+    把清單模式的資料 (TicketMatchDataGenerator) 分塊匯出到 directory，回傳各資料表寫出的筆數
+    先寫到暫存目錄再改名，中斷時不會留下不完整的匯出
+    """
+    if fmt not in EXTENSIONS:
+        raise ValueError(f"不支援的輸出格式: {fmt}")
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"不支援的壓縮方式: {compression}")
+    if chunk_rows < 1:
+        raise ValueError(f"分塊列數必須 >= 1: {chunk_rows}")
+    if compression == 'zstd':
+        _require_zstd()
+    workers = workers or os.cpu_count() or 1
+
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    temp = os.path.join(parent, f".{os.path.basename(os.path.abspath(directory))}.tmp-{os.getpid()}")
+    shutil.rmtree(temp, ignore_errors=True)
+
+    sources, finals = generator.collected_sources()
+    tasks = chunk_tasks(sources, finals, fmt, chunk_rows, compression)
+    for table_dir in sorted({task['path'].split('/')[0] for task in tasks}):
+        os.makedirs(os.path.join(temp, table_dir))
+    state = {'sources': sources, 'finals': finals, 'fmt': fmt, 'compression': compression, 'directory': temp}
+    print(f"💾 分塊匯出到 {directory} ({fmt}{', ' + compression if compression else ''}, "
+          f"每塊 {chunk_rows} 列, {workers} 個 worker)...")
+    if workers == 1:
+        _init_worker(state)
+        chunks = list(map(_write_chunk, tasks))
+    else:
+        with _executor(workers, state) as executor:
+            chunks = list(executor.map(_write_chunk, tasks))
+    _STATE.clear()
+
+    files = {}
+    for task, chunk in zip(tasks, chunks):
+        name = task['table'] if task['source'] is not None else f"{task['table']}_update"
+        files.setdefault(name, []).append(chunk)
+    counts = {table: sum(chunk['rows'] for chunk in files.get(table, ())) for table in TABLES}
+
+    indexes = secondary_indexes()
+    manifest = {
+        'version': MANIFEST_VERSION, 'format': fmt, 'compression': compression, 'chunk_rows': chunk_rows,
+        'seed': generator.seed, 'reference_time': generator.now.isoformat(),
+        'prelude': prelude_statements(indexes), 'finalize': finalize_statements(indexes),
+        'levels': load_levels(),
+        'tables': [{'table': table, 'sql_name': sql_name, 'columns': columns, 'rows': counts[table],
+                    'copy': None if fmt == 'sql' else copy_statement(sql_name, columns, fmt),
+                    'files': files.get(table, [])} for table, (sql_name, columns) in TABLES.items()],
+        'updates': [],
+    }
+    for table in UPDATES:
+        name = f"{table}_update"
+        if name in files:
+            entry = {'table': table, 'rows': sum(chunk['rows'] for chunk in files[name]), 'files': files[name]}
+            if fmt != 'sql':
+                entry['setup'], entry['copy'], entry['apply'] = update_statements(table, fmt)
+            manifest['updates'].append(entry)
+    with open(os.path.join(temp, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    if os.path.exists(directory):
+        shutil.rmtree(directory)
+    os.rename(temp, directory)
+    total_bytes = sum(chunk['bytes'] for chunk in chunks)
+    print(f"✅ 資料匯出完成！共 {sum(counts.values())} 筆記錄，{len(chunks)} 個分塊檔 ({total_bytes / 1e6:.1f} MB)")
+    return counts
+
+
+def read_manifest(directory):
+    with open(os.path.join(directory, MANIFEST), encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+        raise ValueError(f"{directory} 的 manifest 版本不符: {manifest.get('version')}")
+    return manifest
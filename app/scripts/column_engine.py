@@ -0,0 +1,95 @@
+"""
+批次欄位生成 - Ticket Match 假資料生成用
+以 NumPy Generator 一次產生整欄的價格、狀態、座位、餘額與時間戳，分佈與逐筆生成相同；
+每筆資料不再需要數次 Python 層級的亂數呼叫
+numpy 為選用套件：未安裝時 HAS_NUMPY 為 False，生成器維持逐筆生成
+"""
+
+from datetime import timedelta
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:  # pragma: no cover - 依安裝環境而定
+    np = None
+    HAS_NUMPY = False
+
+from stream_state import TICKET_STATUS_CODES
+
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+class ColumnEngine:
+    """以固定 seed 的 numpy.random.Generator 產生整批欄位 (回傳 numpy 陣列)"""
+
+    def __init__(self, seed):
+        if not HAS_NUMPY:
+            raise RuntimeError("批次欄位生成需要 numpy，請執行: pip install numpy")
+        self.rng = np.random.default_rng(seed)
+
+    def integers(self, low, high, size):
+        """[low, high] 閉區間整數 (同 Faker random_int)"""
+        return self.rng.integers(low, high, size, endpoint=True)
+
+    def choice(self, values, weights, size):
+        """依權重抽樣 (同 random.choices)"""
+        p = np.asarray(weights, dtype=float)
+        return np.asarray(values, dtype=object)[self.rng.choice(len(values), size, p=p / p.sum())]
+
+    def flags(self, probability, size):
+        """每筆以 probability 的機率為 True"""
+        return self.rng.random(size) < probability
+
+    def uniform(self, low, high, size):
+        return self.rng.uniform(low, high, size)
+
+    def timestamps(self, start, end, size):
+        """start 與 end 之間均勻分佈的時間 (datetime64[us]；tolist() 即為 datetime)"""
+        span = (end - start) // _ONE_MICROSECOND
+        offsets = self.rng.integers(0, span, size, endpoint=True)
+        return np.datetime64(start, 'us') + offsets.astype('timedelta64[us]')
+
+    def seats(self, capacities, count):
+        """
+        從所有場次的全部座位中均勻抽出 count 個不重複的座位，回傳 (場次索引, 場次內座位索引)
+        與逐筆的「依剩餘座位數加權選場次、再從剩餘座位中選一個」為同一分佈
+        """
+        capacities = np.asarray(capacities, dtype=np.int64)
+        bounds = np.cumsum(capacities)
+        picks = self.rng.choice(int(bounds[-1]), count, replace=False)
+        eventtime_index = np.searchsorted(bounds, picks, side='right')
+        seat_index = picks - (bounds - capacities)[eventtime_index]
+        return eventtime_index, seat_index
+
+    def ticket_statuses(self, event_starts, now):
+        """
+        依場次時間決定票券狀態代碼 (同 iter_tickets)：
+        已過期 -> Expired；30 天內 -> 85% Active / 15% Locked；更晚 -> 90% Active / 10% Canceled
+        """
+        u = self.rng.random(len(event_starts))
+        now = np.datetime64(now, 'us')
+        codes = TICKET_STATUS_CODES
+        return np.where(
+            event_starts < now - np.timedelta64(1, 'D'), codes['Expired'],
+            np.where(event_starts < now + np.timedelta64(30, 'D'),
+                     np.where(u < 0.15, codes['Locked'], codes['Active']),
+                     np.where(u < 0.10, codes['Canceled'], codes['Active']))
+        ).astype(np.int8)
+
+    def tickets(self, eventtime_ids, capacities, event_starts, user_count, count, now):
+        """
+        一次產生 count 張票券的所有數值欄位 (eventtime_ids / capacities / event_starts 為各場次的值)：
+          eventtime_index, eventtime_id, seat_index, owner (用戶索引), price, status (狀態代碼), created_at (datetime64[us])
+        eventtime_id / owner / price 為 intc、status 為 int8，可直接交給 TicketColumns.extend_buffers
+        """
+        eventtime_index, seat_index = self.seats(capacities, count)
+        starts = np.asarray(event_starts, dtype='datetime64[us]')[eventtime_index]
+        return {
+            'eventtime_index': eventtime_index,
+            'eventtime_id': np.asarray(eventtime_ids, dtype=np.intc)[eventtime_index],
+            'seat_index': seat_index,
+            'owner': self.integers(0, user_count - 1, count).astype(np.intc),
+            'price': self.integers(1200, 12000, count).astype(np.intc),
+            'status': self.ticket_statuses(starts, now),
+            'created_at': self.timestamps(now - timedelta(days=365), now, count),
+        }
@@ -0,0 +1,481 @@
+"""
+欄式資料表 - Ticket Match 假資料生成用
+清單模式收集的資料列不再以 dict 保存 (每張票券約 600 bytes)，改為每個欄位一個 array：
+  uuid       每筆 16 bytes
+  int        int64
+  decimal    int64 (以分為單位)
+  timestamp  int64 (自 1970-01-01 起的微秒)
+  category   狀態/類型/角色等重複值以字典編碼，代碼依字典大小用 1/2/4 bytes
+  text       UTF-8 位元組串接 + 位移 (CSR)
+  int_array  整數陣列串接 + 位移 (CSR)
+  bool       1 byte
+NULL 在第一次出現時才配置 1 byte/筆 的標記；讀取時 (迭代或索引) 轉回與原本 dict 相同的 Python 值
+各欄位的緩衝區可原樣寫出並以 memoryview (例如 mmap) 還原成唯讀欄位 (見 snapshot.py)
+匯出時以 map_values 整欄轉換 (見 row_serializers.py)：重複值多的欄位每個不同值只轉換一次
+"""
+
+from array import array
+from datetime import datetime, timedelta
+
+from column_engine import HAS_NUMPY, np
+
+_EPOCH = datetime(1970, 1, 1)
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+# 資料表 -> {欄位: 型別}；欄位順序同 TABLES
+COLUMN_TYPES = {
+    'USER': {'user_id': 'uuid', 'username': 'text', 'password_hash': 'category', 'email': 'text',
+             'status': 'category', 'balance': 'decimal', 'user_description': 'category', 'created_at': 'timestamp'},
+    'USER_ROLE': {'user_id': 'uuid', 'role': 'category'},
+    'EVENT': {'event_id': 'int', 'event_name': 'text', 'venue': 'category', 'description': 'text'},
+    'EVENTTIME': {'eventtime_id': 'int', 'event_id': 'int', 'start_time': 'timestamp', 'end_time': 'timestamp'},
+    'TICKET': {'ticket_id': 'int', 'eventtime_id': 'int', 'owner_id': 'uuid', 'seat_area': 'category',
+               'seat_number': 'category', 'price': 'decimal', 'status': 'category', 'created_at': 'timestamp'},
+    'LISTING': {'listing_id': 'int', 'user_id': 'uuid', 'event_id': 'int', 'event_date': 'timestamp',
+                'content': 'text', 'status': 'category', 'type': 'category', 'offered_ticket_ids': 'int_array',
+                'created_at': 'timestamp'},
+    'TRADE': {'trade_id': 'int', 'listing_id': 'int', 'status': 'category', 'agreed_price': 'decimal',
+              'created_at': 'timestamp', 'updated_at': 'timestamp'},
+    'TRADE_PARTICIPANT': {'trade_id': 'int', 'user_id': 'uuid', 'role': 'category', 'confirmed': 'bool',
+                          'confirmed_at': 'timestamp'},
+    'TRADE_TICKET': {'trade_id': 'int', 'ticket_id': 'int', 'from_user_id': 'uuid', 'to_user_id': 'uuid'},
+    'USER_BALANCE_LOG': {'user_id': 'uuid', 'trade_id': 'int', 'change': 'decimal', 'reason': 'category',
+                         'created_at': 'timestamp'},
+}
+
+
+class Column:
+    """
+    欄位基底：子類別實作 _append / _get / _set / _iter_values(start, stop) 與 DEFAULT (NULL 列在資料中的佔位值)
+    BUFFERS 為存放資料的屬性名稱 (array / bytearray，或還原時的唯讀 memoryview)
+    """
+
+    BUFFERS = ('data',)
+
+    def __init__(self):
+        self.nulls = None
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def buffers(self):
+        """屬性名稱 -> 緩衝區 (含 NULL 標記)"""
+        result = {name: getattr(self, name) for name in self.BUFFERS}
+        if self.nulls is not None:
+            result['nulls'] = self.nulls
+        return result
+
+    def state(self):
+        """緩衝區以外需要保存的狀態 (可 JSON 序列化)"""
+        return {}
+
+    @classmethod
+    def from_buffers(cls, size, buffers, state=None):
+        """以既有的緩衝區還原欄位；memoryview 緩衝區為唯讀，不能再 append"""
+        column = cls()
+        column._size = size
+        for name, buffer in buffers.items():
+            setattr(column, name, buffer)
+        column.__dict__.update(state or {})
+        return column
+
+    def append(self, value):
+        if value is None:
+            if self.nulls is None:
+                self.nulls = bytearray(self._size)
+            self.nulls.append(1)
+            self._append(self.DEFAULT)
+        else:
+            if self.nulls is not None:
+                self.nulls.append(0)
+            self._append(value)
+        self._size += 1
+
+    def __getitem__(self, index):
+        if self.nulls is not None and self.nulls[index]:
+            return None
+        return self._get(index)
+
+    def __setitem__(self, index, value):
+        if value is None:
+            if self.nulls is None:
+                self.nulls = bytearray(self._size)
+            self.nulls[index] = 1
+            return
+        if self.nulls is not None:
+            self.nulls[index] = 0
+        self._set(index, value)
+
+    def __iter__(self):
+        if self.nulls is None:
+            return self._iter_values()
+        return (None if null else value for null, value in zip(self.nulls, self._iter_values()))
+
+    def map_values(self, func, null=None, start=0, stop=None):
+        """以 func 轉換第 start..stop 筆中每個非 NULL 的值，NULL 轉為 null (見 row_serializers.py)"""
+        return self._with_nulls(map(func, self._iter_values(start, stop)), null, start, stop)
+
+    def _with_nulls(self, values, null, start, stop):
+        if self.nulls is None:
+            return values
+        return (null if is_null else value for is_null, value in zip(self.nulls[start:stop], values))
+
+
+class Int64Column(Column):
+    """以 int64 array 存放的欄位；子類別可覆寫 _append / _get / _set / _iter_values 做編碼轉換"""
+
+    DEFAULT = 0
+
+    def __init__(self):
+        super().__init__()
+        self.data = array('q')
+
+    def _append(self, value):
+        self.data.append(value)
+
+    def _get(self, index):
+        return self.data[index]
+
+    def _set(self, index, value):
+        self.data[index] = value
+
+    def _iter_values(self, start=0, stop=None):
+        return iter(self.data[start:stop])
+
+
+class IntColumn(Int64Column):
+    def __init__(self):
+        super().__init__()
+        # 值是否為連續遞增 (SERIAL 主鍵)：是的話可由值直接算出位置
+        self.contiguous = True
+
+    def _append(self, value):
+        data = self.data
+        if data and value != data[-1] + 1:
+            self.contiguous = False
+        data.append(value)
+
+    def _set(self, index, value):
+        self.data[index] = value
+        self.contiguous = False
+
+    def state(self):
+        return {'contiguous': self.contiguous}
+
+    def position(self, value):
+        """連續遞增時回傳 value 的位置，否則回傳 None"""
+        if self.contiguous and self.nulls is None and self.data:
+            index = value - self.data[0]
+            if 0 <= index < len(self.data):
+                return index
+        return None
+
+
+class BoolColumn(Int64Column):
+    DEFAULT = False
+
+    def __init__(self):
+        Column.__init__(self)
+        self.data = array('b')
+
+    def _append(self, value):
+        self.data.append(value)
+
+    def _get(self, index):
+        return bool(self.data[index])
+
+    def _set(self, index, value):
+        self.data[index] = value
+
+    def _iter_values(self, start=0, stop=None):
+        return map(bool, self.data[start:stop])
+
+
+class DecimalColumn(Int64Column):
+    """DECIMAL(10,2)：以分為單位存整數；整數值讀回 int，其餘讀回 float (與原本的 round(x, 2) 相同)"""
+
+    def _append(self, value):
+        self.data.append(round(value * 100))
+
+    def _get(self, index):
+        return self._decode(self.data[index])
+
+    def _set(self, index, value):
+        self.data[index] = round(value * 100)
+
+    @staticmethod
+    def _decode(cents):
+        return cents // 100 if cents % 100 == 0 else cents / 100
+
+    def _iter_values(self, start=0, stop=None):
+        return map(self._decode, self.data[start:stop])
+
+
+class TimestampColumn(Int64Column):
+    DEFAULT = _EPOCH
+
+    def _append(self, value):
+        self.data.append((value - _EPOCH) // _ONE_MICROSECOND)
+
+    def _get(self, index):
+        return _EPOCH + _ONE_MICROSECOND * self.data[index]
+
+    def _set(self, index, value):
+        self.data[index] = (value - _EPOCH) // _ONE_MICROSECOND
+
+    def _iter_values(self, start=0, stop=None):
+        return (_EPOCH + _ONE_MICROSECOND * v for v in self.data[start:stop])
+
+    def map_isoformat(self, func=None, null=None, start=0, stop=None):
+        """
+        同 map_values，但 func 收到的是 ISO 8601 字串 (同 datetime.isoformat())；func 為 None 時回傳字串本身
+        有 numpy 時整段以 datetime_as_string 一次轉換，不必逐筆建立 datetime
+        """
+        if HAS_NUMPY:
+            micros = np.frombuffer(self.data, dtype='datetime64[us]')[start:stop]
+            strings = np.datetime_as_string(micros).astype(object)
+            # datetime.isoformat() 在微秒為 0 時省略小數部分
+            whole = micros.view('q') % 1000000 == 0
+            strings[whole] = np.datetime_as_string(micros[whole], unit='s')
+            texts = strings.tolist()
+        else:
+            texts = map(datetime.isoformat, self._iter_values(start, stop))
+        if func is not None:
+            texts = map(func, texts)
+        return self._with_nulls(texts, null, start, stop)
+
+
+def _uuid_bytes(value):
+    """UUID 字串 -> 16 bytes (比 uuid.UUID(value).bytes 快數倍)"""
+    raw = bytes.fromhex(value.replace('-', ''))
+    if len(raw) != 16:
+        raise ValueError(f"不是 UUID: {value}")
+    return raw
+
+
+def _uuid_str(raw):
+    h = raw.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def _map_repeated(func, raws, decode):
+    """raws 為每筆的原始位元組：不同值不到一半時，每個不同值只 decode 與轉換一次，再查表"""
+    distinct = set(raws)
+    if len(distinct) * 2 > len(raws):
+        return (func(decode(raw)) for raw in raws)
+    converted = {raw: func(decode(raw)) for raw in distinct}
+    return map(converted.__getitem__, raws)
+
+
+class UuidColumn(Column):
+    """以每筆 16 bytes 存放 UUID 字串"""
+
+    DEFAULT = '00000000-0000-0000-0000-000000000000'
+
+    def __init__(self):
+        super().__init__()
+        self.data = bytearray()
+
+    def _append(self, value):
+        self.data += _uuid_bytes(value)
+
+    def _get(self, index):
+        return _uuid_str(self.data[index * 16:index * 16 + 16])
+
+    def _set(self, index, value):
+        self.data[index * 16:index * 16 + 16] = _uuid_bytes(value)
+
+    def _iter_values(self, start=0, stop=None):
+        data = self.data
+        return (_uuid_str(data[i:i + 16]) for i in range(start * 16, len(data) if stop is None else stop * 16, 16))
+
+    def map_values(self, func, null=None, start=0, stop=None):
+        """外鍵欄位 (user_id、owner_id...) 的值大量重複：每個不同的 UUID 只解碼、轉換一次"""
+        data = bytes(self.data[start * 16:None if stop is None else stop * 16])
+        values = _map_repeated(func, [data[i:i + 16] for i in range(0, len(data), 16)], _uuid_str)
+        return self._with_nulls(values, null, start, stop)
+
+
+class CategoryColumn(Column):
+    """字典編碼：values 為出現過的不同值，codes 依不同值的數量使用 B / H / i"""
+
+    BUFFERS = ('codes',)
+    DEFAULT = None
+
+    def __init__(self):
+        super().__init__()
+        self.values = []
+        self._codes_of = {}
+        self.codes = array('B')
+
+    def _code(self, value):
+        code = self._codes_of.get(value)
+        if code is None:
+            code = self._codes_of[value] = len(self.values)
+            self.values.append(value)
+            if code == 256 and self.codes.typecode == 'B':
+                self.codes = array('H', self.codes)
+            elif code == 65536 and self.codes.typecode == 'H':
+                self.codes = array('i', self.codes)
+        return code
+
+    def append(self, value):
+        # NULL 也當成字典中的一個值，不需要另外的標記；先取代碼 (可能換成較寬的 array) 再寫入
+        code = self._code(value)
+        self.codes.append(code)
+        self._size += 1
+
+    def __getitem__(self, index):
+        return self.values[self.codes[index]]
+
+    def __setitem__(self, index, value):
+        code = self._code(value)
+        self.codes[index] = code
+
+    def __iter__(self):
+        values = self.values
+        return (values[code] for code in self.codes)
+
+    def map_values(self, func, null=None, start=0, stop=None):
+        """每個不同值只轉換一次，再依代碼查表"""
+        converted = [null if value is None else func(value) for value in self.values]
+        return map(converted.__getitem__, self.codes[start:stop])
+
+    def state(self):
+        return {'values': self.values}
+
+    @classmethod
+    def from_buffers(cls, size, buffers, state=None):
+        column = super().from_buffers(size, buffers, state)
+        column._codes_of = {value: code for code, value in enumerate(column.values)}
+        return column
+
+
+class TextColumn(Column):
+    """UTF-8 位元組串接，offsets[i]..offsets[i+1] 為第 i 筆"""
+
+    BUFFERS = ('data', 'offsets')
+    DEFAULT = ''
+
+    def __init__(self):
+        super().__init__()
+        self.data = bytearray()
+        self.offsets = array('q', [0])
+
+    def _append(self, value):
+        self.data += value.encode('utf-8')
+        self.offsets.append(len(self.data))
+
+    def _get(self, index):
+        return str(self.data[self.offsets[index]:self.offsets[index + 1]], 'utf-8')
+
+    def _set(self, index, value):
+        raise TypeError("TextColumn 不支援更新")
+
+    def _rows(self, start, stop):
+        return range(start, len(self.offsets) - 1 if stop is None else stop)
+
+    def _iter_values(self, start=0, stop=None):
+        data, offsets = self.data, self.offsets
+        return (str(data[offsets[i]:offsets[i + 1]], 'utf-8') for i in self._rows(start, stop))
+
+    def map_values(self, func, null=None, start=0, stop=None):
+        """由範本產生的文字 (例如貼文內容) 重複很多：每個不同的字串只解碼、轉換一次"""
+        data, offsets = self.data, self.offsets
+        values = _map_repeated(func, [bytes(data[offsets[i]:offsets[i + 1]]) for i in self._rows(start, stop)],
+                               bytes.decode)
+        return self._with_nulls(values, null, start, stop)
+
+
+class IntArrayColumn(TextColumn):
+    """整數陣列串接 (CSR)；讀回 list"""
+
+    DEFAULT = ()
+
+    def __init__(self):
+        Column.__init__(self)
+        self.data = array('i')
+        self.offsets = array('q', [0])
+
+    def _append(self, value):
+        self.data.extend(value)
+        self.offsets.append(len(self.data))
+
+    def _get(self, index):
+        return self.data[self.offsets[index]:self.offsets[index + 1]].tolist()
+
+    def _iter_values(self, start=0, stop=None):
+        data, offsets = self.data, self.offsets
+        return (data[offsets[i]:offsets[i + 1]].tolist() for i in self._rows(start, stop))
+
+    map_values = Column.map_values
+
+
+COLUMN_CLASSES = {
+    'uuid': UuidColumn, 'int': IntColumn, 'bool': BoolColumn, 'decimal': DecimalColumn,
+    'timestamp': TimestampColumn, 'category': CategoryColumn, 'text': TextColumn, 'int_array': IntArrayColumn,
+}
+
+
+class ColumnTable:
+    """
+    一個資料表的欄式儲存；介面接近原本的 list of dict：
+    append(row)、len()、迭代與索引都以 dict 進出 (迭代時逐列解碼，不會一次展開整張表)
+    """
+
+    def __init__(self, table, columns=None):
+        self.table = table
+        self.names = list(COLUMN_TYPES[table])
+        self.columns = columns or {name: COLUMN_CLASSES[COLUMN_TYPES[table][name]]() for name in self.names}
+        self._appenders = [(name, column.append) for name, column in self.columns.items()]
+        self._positions = {}
+
+    @classmethod
+    def from_rows(cls, table, rows):
+        result = cls(table)
+        for row in rows:
+            result.append(row)
+        return result
+
+    def __len__(self):
+        return len(self.columns[self.names[0]])
+
+    def append(self, row):
+        get = row.get
+        for name, append in self._appenders:
+            append(get(name))
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        return {name: column[index] for name, column in self.columns.items()}
+
+    def __iter__(self):
+        names = self.names
+        for values in zip(*(self.columns[name] for name in names)):
+            yield dict(zip(names, values))
+
+    def position(self, key_column, key):
+        """key_column 為 key 的資料列位置；連續遞增的整數主鍵直接計算，否則建立一次 值 -> 位置 索引"""
+        column = self.columns[key_column]
+        if isinstance(column, IntColumn):
+            index = column.position(key)
+            if index is not None:
+                return index
+        positions = self._positions.get(key_column)
+        if positions is None:
+            positions = self._positions[key_column] = {value: i for i, value in enumerate(column)}
+        return positions[key]
+
+    def update(self, key_column, row):
+        """依 row[key_column] 找到資料列並更新 row 中的其他欄位"""
+        index = self.position(key_column, row[key_column])
+        for name, value in row.items():
+            if name != key_column:
+                self.columns[name][index] = value
+
+    def nbytes(self):
+        """各欄位緩衝區的總大小 (不含類別字典)"""
+        return sum(memoryview(buffer).nbytes
+                   for column in self.columns.values() for buffer in column.buffers().values())
@@ -3,29 +3,89 @@ Ticket Match 核心資料生成器
 負責生成所有假資料並確保參考完整性
 """
 
-import psycopg2
 from faker import Faker
 from taiwan_music_data import *
+from unique_registry import UniqueRegistry, suffix_email
+from samplers import FenwickSampler
+from seat_map import VenueSeatMap, SeatAllocator
+from event_calendar import EventCalendar, FreeDays, parse_sessions_distribution, mean_sessions
+from ticket_inventory import TicketInventory
+from stream_state import UuidColumn, TicketColumns, ListingOffers, TICKET_STATUSES
+from column_store import ColumnTable
+from snapshot import write_snapshot, open_snapshot, schema_version
+from column_engine import ColumnEngine, HAS_NUMPY
+from value_pools import ValuePools
+from sql_stream_writer import SqlStreamWriter, TABLES, INSERT, UPDATE, UPDATES
+from copy_writer import CopyStreamWriter, CsvDirectoryWriter
+from pg_loader import PostgresLoader
+from chunked_export import export_chunks, DEFAULT_CHUNK_ROWS
+from integrity_validator import IntegrityValidator
+from finalize import prelude_sql, finalize_sql
+from trade_simulator import TradeSimulator, to_micros, money
+import os
+import pickle
 import uuid
-from datetime import datetime, timedelta
-import random
+import math
+from array import array
+from contextlib import nullcontext
+from datetime import datetime, date, time, timedelta
+
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+# 貼文上架與交易模擬的期間：基準時間前 30 天
+MARKET_WINDOW = timedelta(days=30)
+
+# 檢查點目錄中跨階段狀態的檔名 (見 save_checkpoint)
+CHECKPOINT_STATE = 'state.pickle'
 
 
 class TicketMatchDataGenerator:
-    def __init__(self, scale_factor=1.0):
+    # 清單模式下各資料表收集到的屬性 (EVENT / EVENTTIME 由 iter_events_and_times 自行保留；
+    # LISTING_TICKET 與初始餘額記錄在匯出時衍生)
+    TABLE_ATTRS = {
+        'USER': 'users',
+        'USER_ROLE': 'user_roles',
+        'TICKET': 'tickets',
+        'LISTING': 'listings',
+        'TRADE': 'trades',
+        'TRADE_PARTICIPANT': 'trade_participants',
+        'TRADE_TICKET': 'trade_tickets',
+        'USER_BALANCE_LOG': 'balance_logs',
+    }
+
+    # 後續階段會用到的跨階段狀態 (檢查點需要保存)
+    CHECKPOINT_ATTRS = ('unique', 'user_ids', 'user_balances', 'ticket_columns', 'listing_offers')
+
+    # 批次欄位轉成 Python 物件 (tolist) 的批次大小
+    BATCH_ROWS = 65536
+
+    def __init__(self, scale_factor=1.0, seed=42, now=None, vectorized=False, pools=None):
         self.fake = Faker('zh_TW')
-        Faker.seed(42)  # 確保重現性
+        # 確保重現性：Faker、self.rng 與 UUID 都來自同一個以 seed 初始化的亂數產生器
+        self.seed = seed
+        self.fake.seed_instance(seed)
+        self.rng = self.fake.random
+
+        # 所有相對時間 (今年、最近 30 天、一年內、場次是否已過期) 的基準時間；預設為今天 00:00，
+        # 因此同一天內以相同 seed 生成的資料完全相同
+        self.now = now or datetime.combine(date.today(), time())
+        self.year_start = self.now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+        self.market_start = self.now - MARKET_WINDOW
+
+        # vectorized 時以 numpy 批次產生數值/狀態/時間欄位 (需要 numpy；與逐筆生成的亂數序列不同)
+        self.engine = ColumnEngine(seed) if vectorized else None
+
+        # Faker 值池 (user_name / email)；未指定時在第一次使用時以 seed 建立
+        self._pools = pools
 
         self.scale = scale_factor
-        self.users = []
+        # 清單模式收集的資料表以欄式儲存 (ColumnTable)；活動/場次為各階段共用的維度資料，維持 list of dict
         self.events = []
         self.eventtimes = []
-        self.tickets = []
-        self.listings = []
-        self.trades = []
-        self.trade_participants = []
-        self.trade_tickets = []
-        self.balance_logs = []
+        self._reset_tables(*self.TABLE_ATTRS)
+
+        # UNIQUE 欄位登錄表 (username, email, ...)
+        self.unique = UniqueRegistry()
 
         # 用於追蹤ID
         self.next_ids = {
@@ -37,10 +97,65 @@ class TicketMatchDataGenerator:
             'log_id': 1
         }
 
+    def _uuid(self):
+        """由 self.rng 產生的 UUID v4 (uuid.uuid4 使用 os.urandom，無法重現)"""
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    @property
+    def pools(self):
+        if self._pools is None:
+            self._pools = ValuePools.build(self.seed)
+        return self._pools
+
+    def _time_between(self, start, end=None):
+        """start 與 end (預設為基準時間) 之間的隨機時間 (微秒精度；直接以 self.rng 計算，省去 Faker 的轉換)"""
+        span = ((end or self.now) - start) // _ONE_MICROSECOND
+        return start + timedelta(microseconds=self.rng.randint(0, span))
+
+    def _column(self, count, draw, batch):
+        """
+        count 筆欄位值的迭代器：有 ColumnEngine 時以 batch(engine, n) 分批產生，
+        否則在每次取值時才呼叫 draw() (與原本逐筆生成的亂數順序相同)
+        """
+        if self.engine is None:
+            return (draw() for _ in range(count))
+        return (value for start in range(0, count, self.BATCH_ROWS)
+                for value in batch(self.engine, min(self.BATCH_ROWS, count - start)).tolist())
+
+    def _pick(self, seq):
+        """從序列中隨機取一個元素 (O(1)；Faker random_element 每次呼叫為 O(n))"""
+        return seq[self.fake.random_int(0, len(seq) - 1)]
+
+    def _reset_tables(self, *tables):
+        """把指定資料表的 self.<table> 換成空的 ColumnTable"""
+        for table in tables:
+            setattr(self, self.TABLE_ATTRS[table], ColumnTable(table))
+
+    def _collect(self, rows):
+        """清單模式：把 iter_* 產生的資料列收集到對應的 self.<table> 欄式資料表，並就地套用 UPDATE"""
+        for op, table, row in rows:
+            if op == INSERT:
+                attr = self.TABLE_ATTRS.get(table)
+                if attr:
+                    getattr(self, attr).append(row)
+            else:
+                key, _ = UPDATES[table]
+                getattr(self, self.TABLE_ATTRS[table]).update(key, row)
+
     def generate_users(self, count=3000):
         """生成用戶資料"""
+        self._reset_tables('USER', 'USER_ROLE')
+        self._collect(self.iter_users(count))
+        return self.users
+
+    def iter_users(self, count=3000, include_test_users=True):
+        """
+        逐筆生成用戶與用戶角色；include_test_users 為 False 時不建立測試帳號 (分片模式的其他分片)
+        self.user_balances 保留初始餘額 (分) 供交易階段檢查買方餘額
+        """
         print(f"   👥 生成 {count} 個用戶...")
-        users = []
+        self.user_ids = UuidColumn()
+        self.user_balances = array('q')
 
         # 先建立測試帳號
         test_users = [
@@ -53,82 +168,64 @@ class TicketMatchDataGenerator:
             {'username': 'operator', 'email': 'operator@example.com', 'balance': 100000, 'role': 'Operator', 'description': '平台管理員，負責維護系統正常運行。'},
             {'username': 'admin', 'email': 'admin@example.com', 'balance': 100000, 'role': 'Operator', 'description': '系統管理員，確保平台安全和用戶體驗。'}
         ]
+        if not include_test_users:
+            test_users = []
 
-        # 建立測試帳號
+        # 建立測試帳號 (測試帳號使用預設角色)
         for test_user in test_users:
+            self.unique.claim('USER.username', test_user['username'])
+            self.unique.claim('USER.email', test_user['email'])
+            user_id = self._uuid()
+            self.user_ids.append(user_id)
             user = {
-                'user_id': str(uuid.uuid4()),
+                'user_id': str(user_id),
                 'username': test_user['username'],
                 'password_hash': '$2b$10$psOj32xIbX55J27LFnroG.l4YQgexQtJOPnO7CkNbXV2yfGzQLtc.',  # password123
                 'email': test_user['email'],
                 'status': 'Active',
                 'balance': test_user['balance'],
                 'user_description': test_user.get('description'),
-                'created_at': self.fake.date_time_this_year()
+                'created_at': self._time_between(self.year_start)
             }
-            users.append(user)
+            self.user_balances.append(user['balance'] * 100)
+            yield INSERT, 'USER', user
+            yield INSERT, 'USER_ROLE', {'user_id': user['user_id'], 'role': test_user['role']}
 
         # 生成剩餘的隨機用戶
-        remaining_count = count - len(test_users)
+        remaining_count = max(count - len(test_users), 0)
+        statuses = self._column(
+            remaining_count, lambda: self.rng.choices(['Active', 'Suspended', 'Warning'], weights=[95, 4, 1])[0],
+            lambda engine, n: engine.choice(['Active', 'Suspended', 'Warning'], [95, 4, 1], n))
+        balances = self._column(remaining_count, lambda: self.fake.random_int(1000, 50000),
+                                lambda engine, n: engine.integers(1000, 50000, n))
+        has_descriptions = self._column(remaining_count, lambda: self.rng.random() < 0.7,
+                                        lambda engine, n: engine.flags(0.7, n))
+        created_ats = self._column(remaining_count, lambda: self._time_between(self.year_start),
+                                   lambda engine, n: engine.timestamps(self.year_start, self.now, n))
+        roles = self._column(remaining_count, lambda: self.rng.choices(['User', 'Operator'], weights=[95, 5])[0],
+                             lambda engine, n: engine.choice(['User', 'Operator'], [95, 5], n))
+        pools, randint = self.pools, self.fake.random_int
         for i in range(remaining_count):
-            username = self.fake.user_name()
-            # 確保用戶名唯一
-            while any(u['username'] == username for u in users):
-                username = self.fake.user_name()
-
-            # 確保email唯一
-            email = self.fake.email()
-            while any(u['email'] == email for u in users):
-                email = self.fake.email()
+            # 從值池取用戶名與email，確保唯一 (碰撞時重抽一次，之後加數字後綴)
+            username = self.unique.unique('USER.username', lambda: pools.user_name(randint))
+            email = self.unique.unique('USER.email', lambda: pools.email(randint), suffix=suffix_email)
 
+            user_id = self._uuid()
+            self.user_ids.append(user_id)
             user = {
-                'user_id': str(uuid.uuid4()),
+                'user_id': str(user_id),
                 'username': username,
                 'password_hash': '$2b$10$psOj32xIbX55J27LFnroG.l4YQgexQtJOPnO7CkNbXV2yfGzQLtc.',
                 'email': email,
-                'status': random.choices(['Active', 'Suspended', 'Warning'], weights=[95, 4, 1])[0],
-                'balance': self.fake.random_int(1000, 50000),
-                'user_description': self._generate_user_description() if random.random() < 0.7 else None,  # 70% 有描述
-                'created_at': self.fake.date_time_this_year()
+                'status': next(statuses),
+                'balance': next(balances),
+                'user_description': self._generate_user_description() if next(has_descriptions) else None,  # 70% 有描述
+                'created_at': next(created_ats)
             }
-            users.append(user)
-
-        self.users = users
-        # Generate user roles
-        self.user_roles = self.generate_user_roles(users)
-        return users
-
-    def generate_user_roles(self, users):
-        """生成用戶角色資料"""
-        print("   👤 生成用戶角色...")
-        user_roles = []
-
-        # 測試帳號角色對應
-        test_user_roles = {
-            'alice': 'User',
-            'bob': 'User',
-            'charlie': 'User',
-            'david': 'User',
-            'emma': 'User',
-            'frank': 'User',
-            'operator': 'Operator',
-            'admin': 'Operator'
-        }
-
-        for user in users:
-            # 測試帳號使用預設角色
-            if user['username'] in test_user_roles:
-                role = test_user_roles[user['username']]
-            else:
-                # 一般用戶：95% User, 5% Operator
-                role = random.choices(['User', 'Operator'], weights=[95, 5])[0]
-
-            user_roles.append({
-                'user_id': user['user_id'],
-                'role': role
-            })
-
-        return user_roles
+            self.user_balances.append(user['balance'] * 100)
+            yield INSERT, 'USER', user
+            # 一般用戶：95% User, 5% Operator
+            yield INSERT, 'USER_ROLE', {'user_id': user['user_id'], 'role': next(roles)}
 
     def _generate_user_description(self):
         """生成用戶描述"""
@@ -164,17 +261,52 @@ class TicketMatchDataGenerator:
             "熱愛音樂，專注於票券收藏和分享。",
             "演唱會愛好者，願意與大家交換票券。"
         ]
-        return self.fake.random_element(templates)
+        return self._pick(templates)
 
     def generate_events_and_times(self, event_count=300, sessions_per_event=4):
         """生成活動和場次"""
-        print(f"   🎪 生成 {event_count} 個活動和 {event_count * sessions_per_event} 個場次...")
-        events = []
-        eventtimes = []
+        self._collect(self.iter_events_and_times(event_count, sessions_per_event))
+        return self.events, self.eventtimes
+
+    def schedule_window(self, expected_sessions):
+        """
+        場次排程期間 (第一天, 天數, 間隔天數)：30 天後起算的連續 150 天；
+        場次多到排不下時延長期間，讓場地佔用率不超過一半
+        """
+        window_days = max(150, math.ceil(expected_sessions / len(VENUES) / 0.5))
+        first_day = (self.now + timedelta(days=30)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return first_day, window_days, 1
+
+    def iter_events_and_times(self, event_count=300, sessions_per_event=4, window=None):
+        """
+        逐筆生成活動和場次
+        sessions_per_event 可為固定場次數，或 {場次數: 權重} / "1:20,2:30,4:50" 形式的分佈
+        window 為 (第一天, 天數, 間隔天數)，預設見 schedule_window；
+        分片模式下各片以間隔天數錯開，使用互不重疊的日子
+        活動與場次是後續階段都會用到的維度資料，兩種模式下都保留在 self.events / self.eventtimes
+        """
+        counts, weights = parse_sessions_distribution(sessions_per_event)
+        expected_sessions = int(event_count * mean_sessions(counts, weights))
+        print(f"   🎪 生成 {event_count} 個活動和約 {expected_sessions} 個場次...")
+        self.events = events = []
+        self.eventtimes = eventtimes = []
+
+        # 使用更合理的活動時間 (而不是隨機時間)
+        reasonable_times = [
+            (17, 30), (18, 0), (18, 30), (19, 0), (19, 30), (20, 0), (20, 30), (21, 0)
+        ]
+        time_offsets = [timedelta(hours=hour, minutes=minute) for hour, minute in reasonable_times]
+
+        # 場地與活動行事曆：同場地場次不重疊、同活動場次相隔至少1小時
+        calendar = EventCalendar()
+
+        first_day, window_days, day_step = window or self.schedule_window(expected_sessions)
+        # (場地, 場次長度) -> 還排得下該長度場次的日子；額滿的日子之後不再掃描
+        free_days = {}
 
         for i in range(event_count):
-            artist = self.fake.random_element(TAIWAN_ARTISTS)
-            venue = self.fake.random_element(VENUES)
+            artist = self._pick(TAIWAN_ARTISTS)
+            venue = self._pick(VENUES)
 
             # 根據藝人知名度調整票價倍率
             artist_multiplier = ARTIST_PRICE_MULTIPLIER[artist['popularity']]
@@ -183,7 +315,7 @@ class TicketMatchDataGenerator:
 
             event = {
                 'event_id': self.next_ids['event_id'],
-                'event_name': f"{artist['name']} {self.fake.random_element(EVENT_TYPES)}",
+                'event_name': f"{artist['name']} {self._pick(EVENT_TYPES)}",
                 'venue': venue['name'],
                 'description': self._generate_event_description(artist, venue),
                 'artist_popularity': artist['popularity'],
@@ -192,47 +324,40 @@ class TicketMatchDataGenerator:
             }
             events.append(event)
             self.next_ids['event_id'] += 1
+            yield INSERT, 'EVENT', event
 
             # 生成多個場次
-            for j in range(sessions_per_event):
-                start_time = self.fake.date_time_between(
-                    start_date='+30d', end_date='+180d'
-                )
-
-                # 使用更合理的活動時間 (而不是隨機時間)
-                reasonable_times = [
-                    (17, 30), (18, 0), (18, 30), (19, 0), (19, 30), (20, 0), (20, 30), (21, 0)
-                ]
-
-                # 確保不同場次時間不衝突 (同一個活動不能有重複的開始時間)
-                existing_times_for_event = [
-                    et['start_time'] for et in eventtimes if et['event_id'] == event['event_id']
-                ]
-
-                # 隨機選擇一個合理的時間，但確保不與現有場次重複
-                available_times = []
-                for hour, minute in reasonable_times:
-                    test_time = start_time.replace(hour=hour, minute=minute, second=0, microsecond=0)
-                    # 檢查是否與現有場次時間重複 (相差至少1小時)
-                    conflict = any(
-                        abs((existing_time - test_time).total_seconds()) < 3600  # 1小時內算衝突
-                        for existing_time in existing_times_for_event
-                    )
-                    if not conflict:
-                        available_times.append((hour, minute))
-
-                if available_times:
-                    hour, minute = self.fake.random_element(available_times)
-                else:
-                    # 如果沒有可用時間，隨機選一個 (這不應該發生，除非場次太多)
-                    hour, minute = self.fake.random_element(reasonable_times)
-
-                # 設定合理的開始時間
-                start_time = start_time.replace(hour=hour, minute=minute, second=0, microsecond=0)
-
+            session_count = counts[0] if len(counts) == 1 else self.rng.choices(counts, weights)[0]
+            for j in range(session_count):
                 # 設定合理的結束時間 (2-4小時後)
-                duration_hours = self.fake.random_element([2, 2.5, 3, 3.5, 4])
-                end_time = start_time + timedelta(hours=duration_hours)
+                duration = timedelta(hours=self._pick([2, 2.5, 3, 3.5, 4]))
+
+                # 隨機選一天，當天場地沒有空檔時往後找下一天 (已額滿的日子由 FreeDays 直接跳過)
+                day = self.fake.random_int(0, window_days - 1)
+                venue_days = free_days.get((venue['name'], duration))
+                if venue_days is None:
+                    venue_days = free_days[venue['name'], duration] = FreeDays(window_days)
+                start_time = None
+                for day_index in venue_days.cyclic(day):
+                    day_start = first_day + timedelta(days=day_index * day_step)
+                    venue_times = [day_start + offset for offset in time_offsets
+                                   if calendar.venue_free(venue['name'], day_start + offset,
+                                                          day_start + offset + duration)]
+                    if not venue_times:
+                        venue_days.mark_full(day_index)
+                        continue
+                    # 場地有空檔但同活動已有相近場次的日子 (最多為該活動的場次數) 只是略過
+                    available_times = [t for t in venue_times if calendar.event_free(event['event_id'], t)]
+                    if available_times:
+                        start_time = self._pick(available_times)
+                        break
+
+                if start_time is None:
+                    print(f"⚠️  警告: {venue['name']} 已無空檔，活動 {event['event_id']} 少排一個場次")
+                    continue
+
+                end_time = start_time + duration
+                calendar.book(event['event_id'], venue['name'], start_time, end_time)
 
                 eventtime = {
                     'eventtime_id': self.next_ids['eventtime_id'],
@@ -243,10 +368,7 @@ class TicketMatchDataGenerator:
                 }
                 eventtimes.append(eventtime)
                 self.next_ids['eventtime_id'] += 1
-
-        self.events = events
-        self.eventtimes = eventtimes
-        return events, eventtimes
+                yield INSERT, 'EVENTTIME', eventtime
 
     def _generate_event_description(self, artist, venue):
         """生成活動描述"""
@@ -257,66 +379,58 @@ class TicketMatchDataGenerator:
             f"{artist['name']}巡迴演唱會{venue['city']}站，帶你重溫經典時刻！",
             f"聽{artist['name']}唱歌，感受音樂的魔力！",
         ]
-        return self.fake.random_element(templates)
+        return self._pick(templates)
 
     def generate_tickets(self, ticket_count=10000):
         """生成票券資料"""
+        self._reset_tables('TICKET')
+        self._collect(self.iter_tickets(ticket_count))
+        print(f"   ✅ {len(self.tickets)} 張票券生成完畢。")
+
+    def iter_tickets(self, ticket_count=10000):
+        """逐筆生成票券，並在 self.ticket_columns 保留持有者/場次/價格/狀態供後續階段使用"""
         print(f"   🎫 生成 {ticket_count} 張票券...")
-        tickets = []
+        self.ticket_columns = columns = TicketColumns(self.next_ids['ticket_id'])
+        venue_index = {v['name']: v for v in VENUES}
 
-        # Pre-calculate available seats per eventtime (limit to reasonable numbers)
-        eventtime_seats = {}
-        for et in self.eventtimes:
-            venue = next(v for v in VENUES if v['name'] == et['venue'])
-            max_seats = min(venue['capacity'], 300)  # Reduced to make it more manageable
-            eventtime_seats[et['eventtime_id']] = max_seats
+        # 每個場地一份座位圖，每個場次一個空位配置器 (惰性建立)
+        seat_maps = {name: VenueSeatMap(v) for name, v in venue_index.items()}
+        allocators = {}
 
-        total_available_seats = sum(eventtime_seats.values())
+        total_available_seats = sum(seat_maps[et['venue']].capacity for et in self.eventtimes)
 
         # Adjust ticket count if necessary
         if ticket_count > total_available_seats:
             print(f"⚠️  調整票券數量: {ticket_count} → {total_available_seats} (基於可用座位)")
             ticket_count = total_available_seats
 
-        # Track used seats: eventtime_id -> set of (seat_area, seat_number)
-        used_seats = {et_id: set() for et_id in eventtime_seats.keys()}
+        if self.engine is not None:
+            yield from self._iter_tickets_batched(ticket_count, seat_maps, columns)
+            return
 
-        for i in range(ticket_count):
-            # Find eventtimes that still have available seats
-            available_eventtimes = [et for et in self.eventtimes
-                                  if len(used_seats[et['eventtime_id']]) < eventtime_seats[et['eventtime_id']]]
+        # 以剩餘座位數為權重的抽樣器，座位售完的場次權重歸零後不會再被抽中
+        seat_sampler = FenwickSampler([seat_maps[et['venue']].capacity for et in self.eventtimes])
 
-            if not available_eventtimes:
+        now = self.now
+        for i in range(ticket_count):
+            # Select eventtime weighted by remaining seats
+            index = seat_sampler.sample(self.fake.random_int)
+            if index is None:
                 print(f"⚠️  警告: 無法為票券 {i+1} 生成唯一座位，跳過")
                 continue
 
-            # Select random eventtime
-            eventtime = self.fake.random_element(available_eventtimes)
+            eventtime = self.eventtimes[index]
             eventtime_id = eventtime['eventtime_id']
+            seat_sampler.add(index, -1)
 
-            # Find corresponding event and venue
-            event = next(e for e in self.events if e['event_id'] == eventtime['event_id'])
-            venue = next(v for v in VENUES if v['name'] == eventtime['venue'])
-
-            # Generate unique seat
-            while True:
-                # Determine seat area based on venue capacity
-                if venue['capacity'] > 10000:  # Large venue
-                    seat_area = self.fake.random_element(['A區', 'B區', 'C區', 'VIP區'])
-                elif venue['capacity'] > 5000:  # Medium venue
-                    seat_area = self.fake.random_element(['A區', 'B區', 'C區'])
-                else:  # Small venue
-                    seat_area = self.fake.random_element(['A區', 'B區', '一般區'])
-
-                seat_number = self.fake.random_int(min=1, max=150)  # Reasonable seat numbers
-
-                seat_key = (seat_area, seat_number)
-                if seat_key not in used_seats[eventtime_id]:
-                    used_seats[eventtime_id].add(seat_key)
-                    break
+            # 從該場次的剩餘座位中直接配置一個 (不需重試)
+            allocator = allocators.get(eventtime_id)
+            if allocator is None:
+                allocator = allocators[eventtime_id] = SeatAllocator(seat_maps[eventtime['venue']])
+            seat_area, seat_number = allocator.allocate(self.fake.random_int)
 
             # Select random owner
-            owner = self.fake.random_element(self.users)
+            owner = self.fake.random_int(0, len(self.user_ids) - 1)
 
             ticket_id = self.next_ids['ticket_id']
             # Select random price from available ranges
@@ -324,7 +438,6 @@ class TicketMatchDataGenerator:
 
             # Logical ticket status assignment based on event timing
             event_date = eventtime['start_time']
-            now = datetime.now()
 
             if event_date < now - timedelta(days=1):
                 # Event is in the past - ticket should be Expired
@@ -336,265 +449,166 @@ class TicketMatchDataGenerator:
                 # Event is far in the future - mostly Active, some Canceled
                 status = self.fake.random_element(['Active'] * 90 + ['Canceled'] * 10)
 
-            created_at = self.fake.date_time_between(start_date='-1y', end_date='now')
+            created_at = self._time_between(self.now - timedelta(days=365))
 
-            tickets.append({
+            columns.append(owner, eventtime_id, price, status)
+            self.next_ids['ticket_id'] += 1
+            yield INSERT, 'TICKET', {
                 'ticket_id': ticket_id,
                 'eventtime_id': eventtime_id,
-                'owner_id': owner['user_id'],
+                'owner_id': self.user_ids[owner],
                 'price': price,
                 'seat_area': seat_area,
                 'seat_number': seat_number,
                 'status': status,
                 'created_at': created_at
-            })
-            self.next_ids['ticket_id'] += 1
-
-        self.tickets = tickets
-        print(f"   ✅ {len(self.tickets)} 張票券生成完畢。")
+            }
 
-    def _generate_seat_number(self, area, venue_capacity):
-        """生成座位號碼"""
-        if venue_capacity > 10000:
-            # 大場地：區-排-號格式
-            row = self.fake.random_int(1, 50)
-            seat = self.fake.random_int(1, 30)
-            return "02d"
-        elif venue_capacity > 2000:
-            # 中場地：區排號格式
-            row = self.fake.random_int(1, 30)
-            seat = self.fake.random_int(1, 20)
-            return "02d"
-        else:
-            # 小場地：簡單編號
-            return str(self.fake.random_int(1, venue_capacity // 10))
+    def _iter_tickets_batched(self, ticket_count, seat_maps, columns):
+        """iter_tickets 的批次版本：所有數值欄位由 ColumnEngine 一次產生，這裡只組出資料列"""
+        eventtimes = self.eventtimes
+        batch = self.engine.tickets([et['eventtime_id'] for et in eventtimes],
+                                    [seat_maps[et['venue']].capacity for et in eventtimes],
+                                    [et['start_time'] for et in eventtimes],
+                                    len(self.user_ids), ticket_count, self.now)
+        columns.extend_buffers(batch['owner'], batch['eventtime_id'], batch['price'], batch['status'])
+
+        ticket_id = self.next_ids['ticket_id']
+        for start in range(0, ticket_count, self.BATCH_ROWS):
+            part = {name: values[start:start + self.BATCH_ROWS].tolist() for name, values in batch.items()}
+            for index, seat_index, owner, price, status, created_at in zip(
+                    part['eventtime_index'], part['seat_index'], part['owner'],
+                    part['price'], part['status'], part['created_at']):
+                eventtime = eventtimes[index]
+                seat_area, seat_number = seat_maps[eventtime['venue']].seat(seat_index)
+                yield INSERT, 'TICKET', {
+                    'ticket_id': ticket_id,
+                    'eventtime_id': eventtime['eventtime_id'],
+                    'owner_id': self.user_ids[owner],
+                    'price': price,
+                    'seat_area': seat_area,
+                    'seat_number': seat_number,
+                    'status': TICKET_STATUSES[status],
+                    'created_at': created_at
+                }
+                ticket_id += 1
+        self.next_ids['ticket_id'] = ticket_id
 
     def generate_listings(self, listing_count=12000):
         """生成貼文資料 - 基於用戶實際票券持有情況"""
+        self._reset_tables('LISTING')
+        self._collect(self.iter_listings(listing_count))
+        return self.listings
+
+    def iter_listings(self, listing_count=12000, owners=None):
+        """
+        逐筆生成貼文，並在 self.listing_offers 保留 Sell/Exchange 貼文提供的票券供交易階段使用
+        owners 為發文者的用戶索引範圍 (range)，預設為全部用戶
+        """
         print(f"   📝 生成 {listing_count} 個貼文...")
-        listings = []
-
-        # 建立完整的票券索引
-        ticket_index = {}
-        for ticket in self.tickets:
-            owner_id = ticket['owner_id']
-            if owner_id not in ticket_index:
-                ticket_index[owner_id] = []
-            ticket_index[owner_id].append(ticket)
-
-        # 統計用戶票券持有情況（只包含Active票券）
-        user_ticket_inventory = {}
-        for user in self.users:
-            user_id = user['user_id']
-            user_tickets = ticket_index.get(user_id, [])
-            # 只包含狀態為Active的票券
-            active_tickets = [t for t in user_tickets if t['status'] == 'Active']
-            user_ticket_inventory[user_id] = active_tickets
-
-        # 分類用戶（基於Active票券）
-        users_with_tickets = [(uid, tickets) for uid, tickets in user_ticket_inventory.items() if len(tickets) > 0]
-        users_without_tickets = [(uid, tickets) for uid, tickets in user_ticket_inventory.items() if len(tickets) == 0]
-
-        print(f"   👥 用戶分類: {len(users_with_tickets)}人有票券, {len(users_without_tickets)}人無票券")
-
-        # 創建貼文生成計劃，確保Sell和Exchange有對應票券
-        listing_plans = []
-
-        # 1. 分配Sell貼文 (20%) - 只給有票券的用戶
+        self.listing_offers = ListingOffers()
+
+        # 建立索引：場次 -> 活動、活動 -> 場次
+        eventtime_index = {et['eventtime_id']: et for et in self.eventtimes}
+        event_index = {e['event_id']: e for e in self.events}
+        event_eventtimes = {}
+        for et in self.eventtimes:
+            event_eventtimes.setdefault(et['event_id'], []).append(et)
+        events_with_times = [e for e in self.events if e['event_id'] in event_eventtimes]
+
+        # 票券庫存索引 (owner, event, status)，票券被貼文使用後就地移除
+        user_count = len(self.user_ids)
+        owners = owners if owners is not None else range(user_count)
+        inventory = TicketInventory(self.ticket_columns,
+                                    {et_id: et['event_id'] for et_id, et in eventtime_index.items()},
+                                    user_count)
+
+        # 分類用戶（基於Active票券），並預先計算分配結果
+        # 每個有票券的用戶可以發出最多3個Sell貼文、最多2個Exchange貼文
         sell_target = int(listing_count * 0.2)
-        sell_assigned = 0
-        for uid, user_tickets in users_with_tickets:
-            if sell_assigned >= sell_target:
-                break
-            # 每個有票券的用戶可以發出最多3個Sell貼文
-            user_sell_count = min(3, len(user_tickets))
-            for _ in range(user_sell_count):
-                if sell_assigned >= sell_target:
-                    break
-                listing_plans.append({
-                    'user_id': uid,
-                    'type': 'Sell',
-                    'available_tickets': user_tickets
-                })
-                sell_assigned += 1
-
-        # 2. 分配Exchange貼文 (10%) - 只給有票券的用戶
         exchange_target = int(listing_count * 0.1)
-        exchange_assigned = 0
-        for uid, user_tickets in users_with_tickets:
-            if exchange_assigned >= exchange_target:
-                break
-            # 每個有票券的用戶可以發出最多2個Exchange貼文
-            user_exchange_count = min(2, len(user_tickets))
-            for _ in range(user_exchange_count):
-                if exchange_assigned >= exchange_target:
-                    break
-                listing_plans.append({
-                    'user_id': uid,
-                    'type': 'Exchange',
-                    'available_tickets': user_tickets
-                })
-                exchange_assigned += 1
-
-        # 3. 剩下的都是Buy貼文 (70%)
-        buy_target = listing_count - len(listing_plans)
-        for i in range(buy_target):
-            # Buy貼文可以由任何用戶發出
-            user_id = self.users[i % len(self.users)]['user_id']
-            listing_plans.append({
-                'user_id': user_id,
-                'type': 'Buy',
-                'available_tickets': user_ticket_inventory.get(user_id, [])
-            })
-
+        users_with_tickets = sell_capacity = exchange_capacity = 0
+        for owner in owners:
+            ticket_count = inventory.count(owner)
+            if ticket_count:
+                users_with_tickets += 1
+                sell_capacity += min(3, ticket_count)
+                exchange_capacity += min(2, ticket_count)
+        sell_assigned = min(sell_target, sell_capacity)
+        exchange_assigned = min(exchange_target, exchange_capacity)
+        buy_target = listing_count - sell_assigned - exchange_assigned
+
+        print(f"   👥 用戶分類: {users_with_tickets}人有票券, {len(owners) - users_with_tickets}人無票券")
         print(f"   🎯 最終分配: Sell {sell_assigned}, Exchange {exchange_assigned}, Buy {buy_target}")
 
-        # Track which tickets have been used in listings to prevent reuse
-        used_ticket_ids = set()
-
-        # 根據計劃生成實際貼文
-        for plan in listing_plans:
-            user_id = plan['user_id']
-            listing_type = plan['type']
-            available_tickets = plan['available_tickets']
-
-            # 選擇活動
+        def listing_plans():
+            """依序產生 (用戶索引, 貼文類型)，確保Sell和Exchange只分配給有票券的用戶"""
+            for listing_type, per_user, target in (('Sell', 3, sell_assigned), ('Exchange', 2, exchange_assigned)):
+                assigned = 0
+                for owner in owners:
+                    if assigned >= target:
+                        break
+                    count = min(per_user, inventory.count(owner), target - assigned)
+                    for _ in range(count):
+                        yield owner, listing_type
+                    assigned += count
+            # 剩下的都是Buy貼文，可以由任何用戶發出
+            for i in range(buy_target):
+                yield owners[i % len(owners)], 'Buy'
+
+        # 根據計劃生成實際貼文 (計劃是惰性產生的；Sell/Exchange 的票券數在計劃時點仍足夠，
+        # 但可能已被同一用戶較早的貼文用完，此時改為Buy貼文)
+        created_ats = self._column(listing_count, lambda: self._time_between(self.market_start),
+                                   lambda engine, n: engine.timestamps(self.market_start, self.now, n))
+        for owner, listing_type in listing_plans():
+            # 選擇活動：從用戶尚未被使用的Active票券中隨機選擇一張，確定活動
+            selected_ticket_id = None
             if listing_type in ['Sell', 'Exchange']:
-                # 從用戶的Active票券中隨機選擇一張（且尚未被使用），確定活動
-                user_active_tickets = [t for t in self.tickets
-                                     if t['owner_id'] == user_id 
-                                     and t['status'] == 'Active'
-                                     and t['ticket_id'] not in used_ticket_ids]
-                if user_active_tickets:
-                    selected_ticket = self.fake.random_element(user_active_tickets)
-                    event_id = next(et['event_id'] for et in self.eventtimes if et['eventtime_id'] == selected_ticket['eventtime_id'])
-                    event = next(e for e in self.events if e['event_id'] == event_id)
-                    selected_eventtime = next(et for et in self.eventtimes if et['eventtime_id'] == selected_ticket['eventtime_id'])
-                else:
+                selected_ticket_id = inventory.pick(owner, self.fake.random_int)
+                if selected_ticket_id is None:
                     # 用戶沒有可用的Active票券，改為Buy貼文
                     listing_type = 'Buy'
-                    event = self.fake.random_element(self.events)
-                    selected_eventtime = self.fake.random_element([et for et in self.eventtimes if et['event_id'] == event['event_id']])
+
+            if selected_ticket_id is not None:
+                event = event_index[inventory.event_of(selected_ticket_id)]
+                selected_eventtime = eventtime_index[inventory.eventtime_of(selected_ticket_id)]
             else:
                 # Buy貼文可以是任何活動
-                event = self.fake.random_element(self.events)
-                selected_eventtime = self.fake.random_element([et for et in self.eventtimes if et['event_id'] == event['event_id']])
+                event = self._pick(events_with_times)
+                selected_eventtime = self._pick(event_eventtimes[event['event_id']])
 
             # 生成貼文內容
             listing = {
                 'listing_id': self.next_ids['listing_id'],
-                'user_id': user_id,
+                'user_id': self.user_ids[owner],
                 'event_id': event['event_id'],
                 'event_date': selected_eventtime['start_time'],
                 'content': self._generate_listing_content(listing_type, event),
                 'status': 'Active',
                 'type': listing_type,
-                'created_at': self.fake.date_time_this_month()
+                'created_at': next(created_ats)
             }
 
-            # 處理票券關聯
-            if listing_type in ['Sell', 'Exchange']:
-                # 從用戶的所有Active票券中，找到這個活動的票券，且尚未被其他listing使用
-                user_active_tickets = [t for t in self.tickets
-                                     if t['owner_id'] == user_id 
-                                     and t['status'] == 'Active'
-                                     and t['ticket_id'] not in used_ticket_ids]
-
-                event_tickets = [t for t in user_active_tickets
-                               if any(et['eventtime_id'] == t['eventtime_id']
-                                     for et in self.eventtimes if et['event_id'] == event['event_id'])]
-
-                if event_tickets:
-                    # 隨機選擇1-3張票券
-                    selected_count = min(self.fake.random_int(1, 3), len(event_tickets))
-                    import random
-                    selected_tickets = random.sample(event_tickets, selected_count)
-                    listing['offered_ticket_ids'] = [t['ticket_id'] for t in selected_tickets]
-                    # Mark these tickets as used
-                    for t in selected_tickets:
-                        used_ticket_ids.add(t['ticket_id'])
-                else:
-                    # 如果沒有這個活動的可用票券，改為Buy貼文
-                    listing['type'] = 'Buy'
-                    listing['offered_ticket_ids'] = None
+            # 處理票券關聯：從用戶在這個活動尚未被使用的Active票券中選擇1-3張
+            if selected_ticket_id is not None:
+                event_tickets = inventory.event_tickets(owner, event['event_id'])
+                selected_count = min(self.fake.random_int(1, 3), len(event_tickets))
+                selected_ids = self.rng.sample(event_tickets, selected_count)
+                listing['offered_ticket_ids'] = selected_ids
+                # 標記為已使用，從庫存索引中移除
+                for ticket_id in selected_ids:
+                    inventory.consume(ticket_id)
+                self.listing_offers.append(listing['listing_id'], owner, listing_type, selected_ids,
+                                           to_micros(listing['created_at']))
             else:
                 listing['offered_ticket_ids'] = None
 
-            listings.append(listing)
             self.next_ids['listing_id'] += 1
-
-        self.listings = listings
-
-        # 後處理：修復listings中的所有權問題
-        print("   🔧 修復listing所有權問題...")
-        self._fix_listing_ownership()
-
-        return listings
-
-    def _fix_listing_ownership(self):
-        """修復listing中的票券所有權問題"""
-        # 建立票券所有權索引
-        ticket_owners = {t['ticket_id']: t['owner_id'] for t in self.tickets}
-
-        # 建立用戶票券索引
-        user_tickets = {}
-        for ticket in self.tickets:
-            if ticket['status'] == 'Active':
-                user_id = ticket['owner_id']
-                if user_id not in user_tickets:
-                    user_tickets[user_id] = []
-                user_tickets[user_id].append(ticket)
-
-        # 建立事件票券索引（按用戶）
-        user_event_tickets = {}
-        for user_id, tickets in user_tickets.items():
-            user_event_tickets[user_id] = {}
-            for ticket in tickets:
-                event_id = next((et['event_id'] for et in self.eventtimes
-                               if et['eventtime_id'] == ticket['eventtime_id']), None)
-                if event_id:
-                    if event_id not in user_event_tickets[user_id]:
-                        user_event_tickets[user_id][event_id] = []
-                    user_event_tickets[user_id][event_id].append(ticket)
-
-        fixed_count = 0
-        checked_count = 0
-
-        for listing in self.listings:
-            if listing['type'] in ['Sell', 'Exchange'] and listing.get('offered_ticket_ids'):
-                checked_count += 1
-                user_id = listing['user_id']
-                event_id = listing['event_id']
-
-                # 檢查當前票券是否都屬於該用戶
-                current_ticket_ids = listing['offered_ticket_ids']
-                wrong_tickets = [tid for tid in current_ticket_ids if ticket_owners.get(tid) != user_id]
-
-                if wrong_tickets:
-                    # 獲取該用戶在這個事件的可用票券
-                    available_tickets = user_event_tickets.get(user_id, {}).get(event_id, [])
-
-                    if available_tickets:
-                        # 隨機選擇適當數量的票券替換
-                        import random
-                        num_needed = len(listing['offered_ticket_ids'])
-                        if num_needed > len(available_tickets):
-                            num_needed = len(available_tickets)
-
-                        correct_tickets = random.sample(available_tickets, num_needed)
-                        listing['offered_ticket_ids'] = [t['ticket_id'] for t in correct_tickets]
-                        fixed_count += 1
-                    else:
-                        # 如果沒有可用票券，改為Buy listing
-                        listing['type'] = 'Buy'
-                        listing['offered_ticket_ids'] = None
-                        fixed_count += 1
-
-        print(f"   🔧 檢查了 {checked_count} 個Sell/Exchange listings，修復了 {fixed_count} 個所有權問題")
+            yield INSERT, 'LISTING', listing
 
     def _generate_listing_content(self, listing_type, event, area=None, price=None):
         """生成貼文內容"""
-        template = self.fake.random_element(LISTING_CONTENT_TEMPLATES[listing_type])
+        template = self._pick(LISTING_CONTENT_TEMPLATES[listing_type])
 
         # 準備格式化參數
         format_params = {'event_name': event['event_name']}
@@ -604,7 +618,7 @@ class TicketMatchDataGenerator:
             if area:
                 format_params['area'] = area
             else:
-                format_params['area'] = self.fake.random_element(SEAT_AREAS)
+                format_params['area'] = self._pick(SEAT_AREAS)
 
         # 處理price變數
         if '{price}' in template:
@@ -618,421 +632,395 @@ class TicketMatchDataGenerator:
 
     def generate_trades_and_related(self, trade_count=3000):
         """生成交易和相關資料"""
+        self._reset_tables('TRADE', 'TRADE_PARTICIPANT', 'TRADE_TICKET', 'USER_BALANCE_LOG')
+        self._collect(self.iter_trades_and_related(trade_count))
+        return self.trades, self.trade_participants, self.trade_tickets, self.balance_logs
+
+    def iter_trades_and_related(self, trade_count=3000, emit_balances=True):
+        """
+        以 TradeSimulator 模擬最近 MARKET_WINDOW 內的交易生命週期 (提案、確認、取消、爭議、逾期)，
+        每筆交易在狀態確定時送出交易、參與者、交易票券與餘額記錄；仍在進行的交易最後以 Pending 送出
+        票券所有權/鎖定、貼文狀態與用戶餘額以 UPDATE 資料列送出 (先前的資料列在串流模式下已寫出)
+        emit_balances 為 False 時 (分片模式) 不送出餘額 UPDATE，由呼叫端合併 self.balance_deltas 後寫出
+        """
         print(f"   🤝 生成 {trade_count} 筆交易...")
-        trades = []
-        trade_participants = []
-        trade_tickets = []
-        balance_logs = []
-
-        # 建立索引以便快速查找
-        all_sell_exchange_listings = [l for l in self.listings if l['type'] in ['Sell', 'Exchange']]
-        listing_index = {l['listing_id']: l for l in all_sell_exchange_listings}
-        ticket_index = {t['ticket_id']: t for t in self.tickets}
-        used_tickets = set()  # Track tickets that have been traded
-
-        # 限制交易數量：只交易50-70%的Sell/Exchange listings，保留一些Active
-        max_trades = int(len(all_sell_exchange_listings) * 0.65)  # 65% of Sell/Exchange listings get traded
-        actual_trade_count = min(trade_count, max_trades)
-        
-        print(f"   📊 Sell/Exchange listings: {len(all_sell_exchange_listings)}, 將交易最多 {actual_trade_count} 個 (65%)")
-
-        for i in range(actual_trade_count):
-            # 隨機選擇可交易的貼文（其票券尚未被交易過）
-            if not listing_index:
-                break
-            
-            # 找到一個還沒交易過的listing
-            available_listings = [l for l in listing_index.values()
-                                 if not l.get('offered_ticket_ids') or
-                                 not any(tid in used_tickets for tid in l['offered_ticket_ids'])]
-            
-            if not available_listings:
-                print(f"   ⚠️  只能生成 {len(trades)} 筆交易（可用listing已用盡）")
-                break
-            
-            listing = self.fake.random_element(available_listings)
-
-            # 決定買家（不能是貼文發佈者）
-            seller_id = listing['user_id']
-            buyer = self.fake.random_element([
-                u for u in self.users if u['user_id'] != seller_id
-            ])
-
-            # 決定交易金額
-            if listing['type'] == 'Sell' and listing['offered_ticket_ids']:
-                # 賣票：使用票券價格
-                ticket_ids = listing['offered_ticket_ids']
-                ticket_prices = [ticket_index[tid]['price'] for tid in ticket_ids if tid in ticket_index]
-                if ticket_prices:
-                    base_price = sum(ticket_prices)
-                    # 有些議價空間
-                    agreed_price = base_price * random.uniform(0.9, 1.1)
-                else:
-                    agreed_price = self.fake.random_int(2000, 8000)
-            else:
-                # 交換或其他：隨機金額
-                agreed_price = self.fake.random_int(2000, 8000)
-
-            trade = {
-                'trade_id': self.next_ids['trade_id'],
-                'listing_id': listing['listing_id'],
-                'status': 'Completed',
-                'agreed_price': round(agreed_price, 2),
-                'created_at': self.fake.date_time_this_month(),
-                'updated_at': self.fake.date_time_this_month()
-            }
+        offers = self.listing_offers
 
-            # Mark the listing as completed since trade was successful
-            listing['status'] = 'Completed'
-            trades.append(trade)
-
-            # 生成參與者
-            trade_participants.extend([
-                {
-                    'trade_id': trade['trade_id'],
-                    'user_id': seller_id,
-                    'role': 'seller',
-                    'confirmed': True,
-                    'confirmed_at': trade['created_at']
-                },
-                {
-                    'trade_id': trade['trade_id'],
-                    'user_id': buyer['user_id'],
-                    'role': 'buyer',
-                    'confirmed': True,
-                    'confirmed_at': trade['created_at']
-                }
-            ])
-
-            # 生成交易票券記錄並更新票券所有權
-            if listing['offered_ticket_ids']:
-                for ticket_id in listing['offered_ticket_ids']:
-                    if ticket_id in ticket_index:
-                        trade_tickets.append({
-                            'trade_id': trade['trade_id'],
-                            'ticket_id': ticket_id,
-                            'from_user_id': seller_id,
-                            'to_user_id': buyer['user_id']
-                        })
-                        # ⭐ UPDATE TICKET OWNERSHIP AFTER TRADE
-                        ticket_index[ticket_id]['owner_id'] = buyer['user_id']
-                        # ⭐ MARK TICKET AS USED (cannot be traded again)
-                        used_tickets.add(ticket_id)
-
-            # 生成餘額記錄
-            balance_logs.extend([
-                {
-                    'user_id': seller_id,
-                    'trade_id': trade['trade_id'],
-                    'change': trade['agreed_price'],
-                    'reason': 'TRADE_PAYMENT',
-                    'created_at': trade['created_at']
-                },
-                {
-                    'user_id': buyer['user_id'],
-                    'trade_id': trade['trade_id'],
-                    'change': -trade['agreed_price'],
-                    'reason': 'TRADE_PAYMENT',
-                    'created_at': trade['created_at']
-                }
-            ])
-
-            self.next_ids['trade_id'] += 1
-
-        self.trades = trades
-        self.trade_participants = trade_participants
-        self.trade_tickets = trade_tickets
-        self.balance_logs = balance_logs
-        return trades, trade_participants, trade_tickets, balance_logs
-
-    def validate_data_integrity(self):
-        """驗證資料完整性"""
-        print("   🔍 驗證資料完整性...")
-        errors = []
-        
-        # 1. 驗證所有eventtime都有對應的event
-        eventtime_ids = {et['eventtime_id'] for et in self.eventtimes}
-        event_ids = {e['event_id'] for e in self.events}
-        for et in self.eventtimes:
-            if et['event_id'] not in event_ids:
-                errors.append(f"Eventtime {et['eventtime_id']} 引用了不存在的 event_id {et['event_id']}")
-        
-        # 2. 驗證所有ticket都有對應的eventtime
-        for ticket in self.tickets:
-            if ticket['eventtime_id'] not in eventtime_ids:
-                errors.append(f"Ticket {ticket['ticket_id']} 引用了不存在的 eventtime_id {ticket['eventtime_id']}")
-        
-        # 3. 驗證票券所有權與交易記錄一致
-        ticket_ownership = {t['ticket_id']: t['owner_id'] for t in self.tickets}
-        for trade_ticket in self.trade_tickets:
-            ticket_id = trade_ticket['ticket_id']
-            expected_owner = trade_ticket['to_user_id']
-            actual_owner = ticket_ownership.get(ticket_id)
-            if actual_owner != expected_owner:
-                errors.append(f"Ticket {ticket_id} 的所有權不一致: 交易記錄顯示應為 {expected_owner}，但實際為 {actual_owner}")
-        
-        # 4. 驗證listings的event_id有效
-        for listing in self.listings:
-            if listing['event_id'] not in event_ids:
-                errors.append(f"Listing {listing['listing_id']} 引用了不存在的 event_id {listing['event_id']}")
-        
-        # 5. 驗證Sell/Exchange listings的票券狀態
-        for listing in self.listings:
-            if listing['type'] in ['Sell', 'Exchange'] and listing.get('offered_ticket_ids'):
-                for ticket_id in listing['offered_ticket_ids']:
-                    ticket = next((t for t in self.tickets if t['ticket_id'] == ticket_id), None)
-                    if ticket and ticket['status'] != 'Active':
-                        errors.append(f"Listing {listing['listing_id']} ({listing['type']}) 包含非Active狀態的票券 {ticket_id} (status: {ticket['status']})")
-        
-        if errors:
-            print("   ❌ 發現資料完整性問題:")
-            for error in errors[:10]:  # 只顯示前10個錯誤
-                print(f"      - {error}")
-            if len(errors) > 10:
-                print(f"      ... 還有 {len(errors) - 10} 個錯誤")
-            return False
-        else:
-            print("   ✅ 資料完整性驗證通過")
-            return True
-
-    def export_to_sql(self, filename='generated-data.sql'):
-        """將所有資料匯出為SQL文件"""
-        print(f"💾 匯出資料到 {filename}...")
-
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write("-- Generated fake data for Ticket Match\n")
-            f.write(f"-- Generated at: {datetime.now()}\n")
-            f.write(f"-- Users: {len(self.users)}, Events: {len(self.events)}, Tickets: {len(self.tickets)}\n\n")
-
-            # 寫入所有INSERT語句
-            self._write_users_sql(f)
-            self._write_user_roles_sql(f)
-            self._write_events_sql(f)
-            self._write_eventtimes_sql(f)
-            self._write_tickets_sql(f)
-            self._write_listings_sql(f)
-            self._write_listing_tickets_sql(f)
-            self._write_trades_sql(f)
-            self._write_trade_participants_sql(f)
-            self._write_trade_tickets_sql(f)
-            self._write_balance_logs_sql(f)
-
-            print(f"✅ 資料匯出完成！共 {len(self.users) + len(self.user_roles) + len(self.events) + len(self.eventtimes) + len(self.tickets) + len(self.listings) + len(self.trades) + len(self.trade_participants) + len(self.trade_tickets) + len(self.balance_logs)} 筆記錄")
-
-    def _write_users_sql(self, f):
-        """寫入用戶SQL - 使用批量INSERT"""
-        if not self.users:
-            return
-
-        f.write("-- Users\n")
-        f.write('INSERT INTO "USER" (user_id, username, password_hash, email, status, balance, user_description, created_at) VALUES\n')
-
-        for i, user in enumerate(self.users):
-            comma = ',' if i < len(self.users) - 1 else ';'
-            description = user['user_description']
-            description_value = f"'{description}'" if description else 'NULL'
-            f.write(f"""('{user['user_id']}', '{user['username']}', '{user['password_hash']}',
-        '{user['email']}', '{user['status']}', {user['balance']},
-        {description_value}, '{user['created_at'].isoformat()}'){comma}\n""")
-        f.write("\n")
-
-    def _write_user_roles_sql(self, f):
-        """寫入用戶角色SQL - 使用批量INSERT"""
-        if not self.user_roles:
-            return
-
-        f.write("-- User Roles\n")
-        f.write("INSERT INTO user_role (user_id, role) VALUES\n")
-
-        for i, user_role in enumerate(self.user_roles):
-            comma = ',' if i < len(self.user_roles) - 1 else ';'
-            f.write(f"""('{user_role['user_id']}', '{user_role['role']}'){comma}\n""")
-        f.write("\n")
-
-    def _write_events_sql(self, f):
-        """寫入活動SQL - 使用批量INSERT"""
-        if not self.events:
-            return
-
-        f.write("-- Events\n")
-        f.write("INSERT INTO event (event_id, event_name, venue, description) VALUES\n")
-
-        for i, event in enumerate(self.events):
-            comma = ',' if i < len(self.events) - 1 else ';'
-            f.write(f"""({event['event_id']}, '{event['event_name']}', '{event['venue']}',
-        '{event['description']}'){comma}\n""")
-        f.write("\n")
-
-    def _write_eventtimes_sql(self, f):
-        """寫入活動場次SQL - 使用批量INSERT"""
-        if not self.eventtimes:
-            return
-
-        f.write("-- EventTimes\n")
-        f.write("INSERT INTO eventtime (eventtime_id, event_id, start_time, end_time) VALUES\n")
-
-        for i, eventtime in enumerate(self.eventtimes):
-            comma = ',' if i < len(self.eventtimes) - 1 else ';'
-            f.write(f"""({eventtime['eventtime_id']}, {eventtime['event_id']},
-        '{eventtime['start_time'].isoformat()}',
-        '{eventtime['end_time'].isoformat()}'){comma}\n""")
-        f.write("\n")
-
-    def _write_tickets_sql(self, f):
-        """寫入票券SQL - 使用批量INSERT"""
-        if not self.tickets:
-            return
-
-        f.write("-- Tickets\n")
-        f.write("INSERT INTO ticket (ticket_id, eventtime_id, owner_id, seat_area, seat_number, price, status, created_at) VALUES\n")
-
-        for i, ticket in enumerate(self.tickets):
-            comma = ',' if i < len(self.tickets) - 1 else ';'
-            f.write(f"""({ticket['ticket_id']}, {ticket['eventtime_id']}, '{ticket['owner_id']}',
-        '{ticket['seat_area']}', '{ticket['seat_number']}', {ticket['price']},
-        '{ticket['status']}', '{ticket['created_at'].isoformat()}'){comma}\n""")
-        f.write("\n")
-
-    def _write_listings_sql(self, f):
-        """寫入貼文SQL - 使用批量INSERT"""
-        if not self.listings:
-            return
-
-        f.write("-- Listings\n")
-        f.write("INSERT INTO listing (listing_id, user_id, event_id, event_date, content, status, type, offered_ticket_ids, created_at) VALUES\n")
-
-        for i, listing in enumerate(self.listings):
-            comma = ',' if i < len(self.listings) - 1 else ';'
-            # Handle offered_ticket_ids array
-            offered_ids = listing['offered_ticket_ids']
-            if offered_ids:
-                offered_str = f"ARRAY{offered_ids}"
+        # 限制交易提案數量：最多為 Sell/Exchange listings 的 65%，保留一些Active
+        max_trades = int(len(offers) * 0.65)
+        actual_trade_count = min(trade_count, max_trades)
+        print(f"   📊 Sell/Exchange listings: {len(offers)}, 將交易最多 {actual_trade_count} 個 (65%)")
+
+        simulator = TradeSimulator(self.rng, offers, self.ticket_columns, self.user_ids, self.user_balances,
+                                   self.market_start, self.now, self.next_ids['trade_id'])
+        yield from simulator.run(actual_trade_count)
+        yield from simulator.pending_rows()
+        self.next_ids['trade_id'] = simulator.next_trade_id
+        self.balance_deltas = simulator.deltas
+
+        if emit_balances:
+            # 每位用戶只送出一次最終餘額 (同一批 UPDATE 不能有重複的主鍵)
+            for user in sorted(simulator.deltas):
+                yield UPDATE, 'USER', {'user_id': self.user_ids[user],
+                                       'balance': money(self.user_balances[user] + simulator.deltas[user])}
+
+        if simulator.skipped:
+            print(f"   ⚠️  {simulator.skipped} 筆提案沒有可交易的貼文")
+        mix = ', '.join(f"{status} {count}" for status, count in simulator.status_counts.items())
+        print(f"   📊 交易狀態: {mix} (共 {simulator.events} 個事件)")
+
+    # 輸出格式：sql (INSERT 陳述式)、copy (psql 腳本，COPY FROM STDIN)、csv (每表一個 CSV 檔的目錄)
+    EXPORT_FORMATS = ('sql', 'copy', 'csv')
+
+    def _open_writer(self, path, fmt, chunk_rows=None, header=''):
+        """
+        依輸出格式建立寫出器；chunk_rows 為 None 時使用各寫出器的預設批次大小
+        SQL / COPY 腳本以移除次要索引開頭，_close_writer 時接上收尾 (見 finalize.py；CSV 的 load.sql 亦同)
+        """
+        if fmt not in self.EXPORT_FORMATS:
+            raise ValueError(f"不支援的輸出格式: {fmt}")
+        kwargs = {} if chunk_rows is None else {'chunk_rows': chunk_rows}
+        if fmt == 'csv':
+            return CsvDirectoryWriter(path, **kwargs)
+        f = open(path, 'w', encoding='utf-8')
+        f.write(f"-- Generated fake data for Ticket Match{header}\n")
+        f.write(f"-- Seed: {self.seed}, reference time: {self.now}\n\n")
+        f.write(prelude_sql())
+        writer_class = CopyStreamWriter if fmt == 'copy' else SqlStreamWriter
+        return writer_class(f, **kwargs)
+
+    @staticmethod
+    def _close_writer(writer):
+        writer.close()
+        if writer.f is not None:
+            writer.f.write(finalize_sql())
+            writer.f.close()
+
+    def stream_to_sql(self, filename, user_count, event_count, ticket_count, listing_count, trade_count,
+                      sessions_per_event=4, chunk_rows=None, fmt='sql', validator=None, recorder=None):
+        """
+        串流模式：各階段逐筆產生資料列並直接寫入SQL檔案，不保留完整資料表
+        只保留跨階段需要的精簡狀態 (用戶UUID、票券持有者/場次/價格/狀態、貼文提供的票券)
+        fmt 見 EXPORT_FORMATS；validator (IntegrityValidator) 會同時收到每筆資料列；
+        recorder (StageRecorder) 分別量測各階段 (含寫出)；回傳各資料表寫出的筆數
+        """
+        print(f"💾 串流匯出資料到 {filename} ({fmt})...")
+        writer = self._open_writer(filename, fmt, chunk_rows, ' (streaming mode)')
+        try:
+            self.write_stages(writer, user_count, event_count, ticket_count, listing_count, trade_count,
+                              sessions_per_event, validator, recorder)
+        finally:
+            self._close_writer(writer)
+
+        print(f"✅ 資料匯出完成！共 {sum(writer.counts.values())} 筆記錄")
+        return writer.counts
+
+    def write_stages(self, writer, user_count, event_count, ticket_count, listing_count, trade_count,
+                     sessions_per_event=4, validator=None, recorder=None):
+        """
+        依序執行各階段，把產生的資料列逐筆送進寫出器 (SqlStreamWriter 介面)，有 validator 時也一併送入
+        有 recorder (StageRecorder) 時以 recorder.stage 包住每個階段並記錄產生的資料列數
+        """
+        stages = [
+            ('users', lambda: self.iter_users(user_count)),
+            ('events', lambda: self.iter_events_and_times(event_count, sessions_per_event)),
+            ('tickets', lambda: self.iter_tickets(ticket_count)),
+            ('listings', lambda: self.iter_listings(listing_count)),
+            ('trades', lambda: self.iter_trades_and_related(trade_count)),
+        ]
+        for name, stage in stages:
+            with recorder.stage(name) if recorder else nullcontext({}) as record:
+                rows = 0
+                for op, table, row in stage():
+                    writer.write(op, table, row)
+                    if validator is not None:
+                        validator.write(op, table, row)
+                    rows += 1
+                record['rows'] = rows
+
+    def iter_collected_rows(self):
+        """
+        清單模式：依外鍵順序重播已收集的資料列 (LISTING_TICKET 與初始餘額記錄由寫出器衍生)
+        USER 已就地套用交易後的餘額：有交易記錄的用戶先以初始餘額寫入，最後再以 UPDATE 送出最終餘額
+        """
+        attrs = dict(self.TABLE_ATTRS, EVENT='events', EVENTTIME='eventtimes')
+        changes = self._trade_balance_changes()
+        finals = []
+        for table in TABLES:
+            attr = attrs.get(table)
+            if attr:
+                for row in getattr(self, attr):
+                    if table == 'USER' and row['user_id'] in changes:
+                        finals.append((row['user_id'], row['balance']))
+                        row = dict(row, balance=money(round(row['balance'] * 100) - changes[row['user_id']]))
+                    yield INSERT, table, row
+        for user_id, balance in finals:
+            yield UPDATE, 'USER', {'user_id': user_id, 'balance': balance}
+
+    def write_collected(self, writer):
+        """
+        清單模式：依外鍵順序把已收集的資料表整欄送進寫出器 (write_columns)，內容同 iter_collected_rows，
+        但不為每列建立 dict
+        """
+        sources, finals = self.collected_sources()
+        for table, values_list in sources.items():
+            for values in values_list:
+                writer.write_columns(table, values)
+        for user_id, balance in finals:
+            writer.write(UPDATE, 'USER', {'user_id': user_id, 'balance': balance})
+
+    def collected_sources(self):
+        """
+        清單模式的匯出內容：(資料表 -> [欄位 -> 該欄所有值, ...] (依外鍵順序), [(user_id, 最終餘額)])
+        衍生的 LISTING_TICKET 與初始餘額記錄 (USER_BALANCE_LOG 的第一段) 在這裡產生
+        """
+        attrs = dict(self.TABLE_ATTRS, EVENT='events', EVENTTIME='eventtimes')
+        tables = {table: self._collected_columns(table, getattr(self, attr)) for table, attr in attrs.items()}
+
+        users = tables['USER']
+        changes = self._trade_balance_changes()
+        finals = []
+        if changes:
+            balances = []
+            for user_id, balance in zip(users['user_id'], users['balance']):
+                change = changes.get(user_id)
+                if change:
+                    finals.append((user_id, balance))
+                    balance = money(round(balance * 100) - change)
+                balances.append(balance)
+            users = tables['USER'] = dict(users, balance=balances)
+
+        listing_ids, ticket_ids = [], []
+        listings = tables['LISTING']
+        for listing_id, offered in zip(listings['listing_id'], listings['offered_ticket_ids']):
+            if offered:
+                listing_ids.extend([listing_id] * len(offered))
+                ticket_ids.extend(offered)
+        tables['LISTING_TICKET'] = {'listing_id': listing_ids, 'ticket_id': ticket_ids}
+
+        user_count = len(self.users)
+        initial_logs = {'user_id': users['user_id'], 'trade_id': [None] * user_count, 'change': users['balance'],
+                        'reason': ['INITIAL_BALANCE'] * user_count, 'created_at': users['created_at']}
+        sources = {table: [tables[table]] for table in TABLES}
+        sources['USER_BALANCE_LOG'].insert(0, initial_logs)
+        return sources, finals
+
+    @staticmethod
+    def _collected_columns(table, rows):
+        """欄位 -> 該欄所有值：ColumnTable 直接用其欄位，list of dict (活動/場次) 逐欄取出"""
+        if isinstance(rows, ColumnTable):
+            return rows.columns
+        _, columns = TABLES[table]
+        return {column: [row[column] for row in rows] for column in columns}
+
+    def _trade_balance_changes(self):
+        """清單模式：user_id -> 交易餘額記錄的總變動 (分)，只含不為 0 的用戶"""
+        changes = {}
+        logs = self.balance_logs
+        for user_id, change in zip(logs.columns['user_id'], logs.columns['change']):
+            changes[user_id] = changes.get(user_id, 0) + round(change * 100)
+        return {user_id: change for user_id, change in changes.items() if change}
+
+    def export_to_copy(self, path, fmt='copy', chunk_rows=None):
+        """
+        將清單模式的資料匯出 (fmt 見 EXPORT_FORMATS)
+          sql:  INSERT 陳述式 (同 export_to_sql)
+          copy: 單一 psql 腳本 (psql -f <path>)
+          csv:  <path> 目錄下每表一個 CSV 檔，另附 load.sql
+        """
+        print(f"💾 匯出資料到 {path} ({fmt})...")
+        writer = self._open_writer(path, fmt, chunk_rows)
+        try:
+            self.write_collected(writer)
+        finally:
+            self._close_writer(writer)
+
+        print(f"✅ 資料匯出完成！共 {sum(writer.counts.values())} 筆記錄")
+        return writer.counts
+
+    def export_chunked(self, directory, fmt='csv', chunk_rows=DEFAULT_CHUNK_ROWS, compression=None, workers=None):
+        """
+        將清單模式的資料分塊匯出到 directory：每表切成每塊 chunk_rows 列的檔案 (compression 為 gzip / zstd 時串流壓縮)，
+        由 workers 個程序平行寫出，另附依外鍵順序列出分塊的 manifest.json (見 chunked_export.py)
+        """
+        return export_chunks(self, directory, fmt, chunk_rows, compression, workers)
+
+    def load_to_postgres(self, stage_counts=None, params=None, chunk_rows=10000, validator=None, recorder=None):
+        """
+        直接以 COPY 載入 PostgreSQL (連線參數預設取自 POSTGRES_* 環境變數)
+        stage_counts 為 stream_to_sql 的各階段數量 (user_count, ..., sessions_per_event) 時為串流模式，
+        否則載入清單模式已收集的資料 (validator / recorder 只用於串流模式，見 write_stages)；回傳各資料表載入的筆數
+        """
+        loader = PostgresLoader(params, chunk_rows)
+        print(f"🐘 載入資料到 PostgreSQL {loader.params['host']}:{loader.params['port']}/{loader.params['dbname']}...")
+        try:
+            if stage_counts is not None:
+                self.write_stages(loader, *stage_counts, validator=validator, recorder=recorder)
             else:
-                offered_str = "NULL"
-
-            f.write(f"""({listing['listing_id']}, '{listing['user_id']}', {listing['event_id']},
-        '{listing['event_date'].isoformat()}', '{listing['content']}',
-        '{listing['status']}', '{listing['type']}',
-        {offered_str}, '{listing['created_at'].isoformat()}'){comma}\n""")
-            f.write("\n")
-
-    def _write_listing_tickets_sql(self, f):
-        """寫入LISTING_TICKET junction table"""
-        if not self.listings:
-            return
-
-        f.write("-- Listing Tickets (Junction Table)\n")
-        listing_ticket_entries = []
-        for listing in self.listings:
-            if listing.get('offered_ticket_ids'):
-                for ticket_id in listing['offered_ticket_ids']:
-                    listing_ticket_entries.append((listing['listing_id'], ticket_id))
-
-        if listing_ticket_entries:
-            f.write("INSERT INTO listing_ticket (listing_id, ticket_id) VALUES\n")
-            for i, (listing_id, ticket_id) in enumerate(listing_ticket_entries):
-                comma = ',' if i < len(listing_ticket_entries) - 1 else ';'
-                f.write(f"({listing_id}, {ticket_id}){comma}\n")
-            f.write("\n")
-
-    def _write_trades_sql(self, f):
-        """寫入交易SQL - 使用批量INSERT"""
-        if not self.trades:
-            return
-
-        f.write("-- Trades\n")
-        f.write("INSERT INTO trade (trade_id, listing_id, status, agreed_price, created_at, updated_at) VALUES\n")
-
-        for i, trade in enumerate(self.trades):
-            comma = ',' if i < len(self.trades) - 1 else ';'
-            f.write(f"""({trade['trade_id']}, {trade['listing_id']}, '{trade['status']}',
-        {trade['agreed_price']}, '{trade['created_at'].isoformat()}',
-        '{trade['updated_at'].isoformat()}'){comma}\n""")
-        f.write("\n")
-
-    def _write_trade_participants_sql(self, f):
-        """寫入交易參與者SQL - 使用批量INSERT"""
-        if not self.trade_participants:
-            return
-
-        f.write("-- Trade Participants\n")
-        f.write("INSERT INTO trade_participant (trade_id, user_id, role, confirmed, confirmed_at) VALUES\n")
-
-        for i, participant in enumerate(self.trade_participants):
-            comma = ',' if i < len(self.trade_participants) - 1 else ';'
-            f.write(f"""({participant['trade_id']}, '{participant['user_id']}', '{participant['role']}',
-        {participant['confirmed']}, '{participant['confirmed_at'].isoformat()}'){comma}\n""")
-        f.write("\n")
-
-    def _write_trade_tickets_sql(self, f):
-        """寫入交易票券SQL - 使用批量INSERT"""
-        if not self.trade_tickets:
-            return
+                self.write_collected(loader)
+        finally:
+            loader.close()
+
+        print(f"✅ 資料載入完成！共 {sum(loader.counts.values())} 筆記錄")
+        return loader.counts
+
+    def table_counts(self):
+        """清單模式下各資料表的筆數 (與 SqlStreamWriter.counts 相同的鍵)"""
+        return {
+            'USER': len(self.users),
+            'USER_ROLE': len(self.user_roles),
+            'EVENT': len(self.events),
+            'EVENTTIME': len(self.eventtimes),
+            'TICKET': len(self.tickets),
+            'LISTING': len(self.listings),
+            'LISTING_TICKET': sum(len(l['offered_ticket_ids'] or ()) for l in self.listings),
+            'TRADE': len(self.trades),
+            'TRADE_PARTICIPANT': len(self.trade_participants),
+            'TRADE_TICKET': len(self.trade_tickets),
+            'USER_BALANCE_LOG': len(self.balance_logs) + len(self.users),
+        }
 
-        f.write("-- Trade Tickets\n")
-        f.write("INSERT INTO trade_ticket (trade_id, ticket_id, from_user_id, to_user_id) VALUES\n")
-
-        for i, trade_ticket in enumerate(self.trade_tickets):
-            comma = ',' if i < len(self.trade_tickets) - 1 else ';'
-            f.write(f"""({trade_ticket['trade_id']}, {trade_ticket['ticket_id']},
-        '{trade_ticket['from_user_id']}', '{trade_ticket['to_user_id']}'){comma}\n""")
-        f.write("\n")
-
-    def _write_balance_logs_sql(self, f):
-        """寫入餘額記錄SQL - 使用批量INSERT"""
-        # 交易相關的餘額記錄
-        if self.balance_logs:
-            f.write("-- Trade Balance Logs\n")
-            f.write("INSERT INTO user_balance_log (user_id, trade_id, change, reason, created_at) VALUES\n")
-
-            for i, log in enumerate(self.balance_logs):
-                trade_id_str = f"{log['trade_id']}" if log['trade_id'] else "NULL"
-                comma = ',' if i < len(self.balance_logs) - 1 else ';'
-                f.write(f"""('{log['user_id']}', {trade_id_str}, {log['change']}, '{log['reason']}',
-        '{log['created_at'].isoformat()}'){comma}\n""")
-            f.write("\n")
-
-        # 初始餘額記錄
-        if self.users:
-            f.write("-- Initial User Balances\n")
-            f.write("INSERT INTO user_balance_log (user_id, trade_id, change, reason, created_at) VALUES\n")
-
-            for i, user in enumerate(self.users):
-                comma = ',' if i < len(self.users) - 1 else ';'
-                f.write(f"""('{user['user_id']}', NULL, {user['balance']}, 'INITIAL_BALANCE',
-        '{user['created_at'].isoformat()}'){comma}\n""")
-            f.write("\n")
+    def save_snapshot(self, directory):
+        """清單模式：把收集的資料表寫成欄式快照 (見 snapshot.py)，之後可用 load_snapshot 直接開啟"""
+        tables = {table: getattr(self, attr) for table, attr in self.TABLE_ATTRS.items()}
+        tables['EVENT'] = ColumnTable.from_rows('EVENT', self.events)
+        tables['EVENTTIME'] = ColumnTable.from_rows('EVENTTIME', self.eventtimes)
+        meta = {'seed': self.seed, 'reference_time': self.now.isoformat(), 'scale_factor': self.scale,
+                'next_ids': self.next_ids}
+        print(f"📸 寫出快照到 {directory}...")
+        manifest = write_snapshot(directory, tables, meta)
+        print(f"✅ 快照完成！共 {sum(t['rows'] for t in manifest['tables'].values())} 筆記錄")
+        return manifest
+
+    @classmethod
+    def load_snapshot(cls, directory):
+        """
+        以 mmap 開啟 save_snapshot 寫出的快照，回傳可直接驗證/匯出/載入的生成器 (資料表為唯讀)
+        seed、基準時間與規模取自快照；schema.sql 在快照後改變時只發出警告
+        """
+        tables, manifest = open_snapshot(directory)
+        if manifest['schema_version'] != schema_version():
+            print(f"⚠️  快照建立後 schema.sql 已變更 ({manifest['schema_version']} → {schema_version()})，"
+                  f"匯出結果可能與目前的 schema 不符")
+        generator = cls(manifest['scale_factor'], manifest['seed'],
+                        now=datetime.fromisoformat(manifest['reference_time']))
+        generator.next_ids.update(manifest['next_ids'])
+        # 活動/場次維持 list of dict (筆數很少，後續以 dict 存取)
+        generator.events = list(tables.pop('EVENT'))
+        generator.eventtimes = list(tables.pop('EVENTTIME'))
+        for table, column_table in tables.items():
+            setattr(generator, cls.TABLE_ATTRS[table], column_table)
+        return generator
+
+    @classmethod
+    def regenerate(cls, scale_factor=1.0, seed=42, now=None, sessions_per_event=4, vectorized=False):
+        """
+        以與 generate-fake-data.py 預設筆數相同的規模重新生成整份資料 (清單模式，含交易)，
+        供需要「已載入資料庫的那份資料」的工具 (load-test.py、generate-activity.py) 在沒有快照時使用
+        """
+        generator = cls(scale_factor, seed=seed, now=now, vectorized=vectorized)
+        generator.generate_users(int(3000 * scale_factor))
+        generator.generate_events_and_times(int(300 * scale_factor), sessions_per_event)
+        generator.generate_tickets(int(10000 * scale_factor))
+        generator.generate_listings(int(12000 * scale_factor))
+        generator.generate_trades_and_related(int(3000 * scale_factor))
+        return generator
+
+    def save_checkpoint(self, directory, completed, params):
+        """
+        清單模式：把目前的生成器狀態寫成檢查點 (整個目錄原子性地替換)
+        資料表寫成欄式快照；活動/場次 (含後續階段用到的藝人/場地欄位)、跨階段狀態、UNIQUE 登錄表與
+        亂數狀態以 pickle 存在 CHECKPOINT_STATE；completed 為已完成的階段，params 為決定輸出內容的參數
+        """
+        tables = {table: getattr(self, attr) for table, attr in self.TABLE_ATTRS.items()}
+        state = {
+            'completed': list(completed),
+            'params': params,
+            'events': self.events,
+            'eventtimes': self.eventtimes,
+            'attrs': {attr: getattr(self, attr) for attr in self.CHECKPOINT_ATTRS if hasattr(self, attr)},
+            'rng': self.rng.getstate(),
+            'engine': self.engine.rng.bit_generator.state if self.engine else None,
+        }
+        meta = {'seed': self.seed, 'reference_time': self.now.isoformat(), 'scale_factor': self.scale,
+                'next_ids': self.next_ids, 'completed': list(completed)}
+        write_snapshot(directory, tables, meta, {CHECKPOINT_STATE: pickle.dumps(state, pickle.HIGHEST_PROTOCOL)})
+
+    @classmethod
+    def load_checkpoint(cls, directory, params, pools=None):
+        """
+        還原 save_checkpoint 寫出的生成器 (資料表讀進記憶體，可繼續生成)，回傳 (generator, 已完成的階段)
+        params 與檢查點不同時 (規模、seed...) 丟出 ValueError：接續生成的資料會與之前的階段不一致
+        """
+        tables, manifest = open_snapshot(directory, writable=True)
+        with open(os.path.join(directory, CHECKPOINT_STATE), 'rb') as f:
+            state = pickle.load(f)
+        changed = sorted(key for key in set(params) | set(state['params'])
+                         if params.get(key) != state['params'].get(key))
+        if changed:
+            raise ValueError(f"檢查點的生成參數不同 ({', '.join(changed)})，無法繼續；請移除 --resume 重新生成")
+
+        generator = cls(manifest['scale_factor'], manifest['seed'],
+                        now=datetime.fromisoformat(manifest['reference_time']),
+                        vectorized=state['engine'] is not None, pools=pools)
+        generator.next_ids.update(manifest['next_ids'])
+        for table, column_table in tables.items():
+            setattr(generator, cls.TABLE_ATTRS[table], column_table)
+        generator.events = state['events']
+        generator.eventtimes = state['eventtimes']
+        for attr, value in state['attrs'].items():
+            setattr(generator, attr, value)
+        generator.rng.setstate(state['rng'])
+        if generator.engine:
+            generator.engine.rng.bit_generator.state = state['engine']
+        return generator, state['completed']
 
     def validate_data_integrity(self):
-        """驗證資料完整性"""
-        print("🔍 驗證資料完整性...")
-
-        issues = []
-
-        # 檢查票券參考的eventtime是否存在
-        ticket_eventtime_ids = set(t['eventtime_id'] for t in self.tickets)
-        existing_eventtime_ids = set(et['eventtime_id'] for et in self.eventtimes)
-        if not ticket_eventtime_ids.issubset(existing_eventtime_ids):
-            issues.append("有些票券參考不存在的eventtime")
-
-        # 檢查貼文參考的票券是否存在
-        for listing in self.listings:
-            if listing['offered_ticket_ids']:
-                for ticket_id in listing['offered_ticket_ids']:
-                    if not any(t['ticket_id'] == ticket_id for t in self.tickets):
-                        issues.append(f"貼文 {listing['listing_id']} 參考不存在的票券 {ticket_id}")
-
-        # 檢查交易參考的貼文是否存在
-        trade_listing_ids = set(t['listing_id'] for t in self.trades)
-        existing_listing_ids = set(l['listing_id'] for l in self.listings)
-        if not trade_listing_ids.issubset(existing_listing_ids):
-            issues.append("有些交易參考不存在的貼文")
-
-        if issues:
-            print("❌ 發現資料完整性問題:")
-            for issue in issues:
-                print(f"   - {issue}")
-            return False
-        else:
-            print("✅ 資料完整性檢查通過")
-            return True
+        """以 IntegrityValidator 單次掃描清單模式的資料，檢查 schema.sql 的所有約束；全部通過時回傳 True"""
+        validator = IntegrityValidator()
+        for op, table, row in self.iter_collected_rows():
+            validator.write(op, table, row)
+        validator.close()
+        return validator.report()
+
+    def export_to_sql(self, filename='generated-data.sql', chunk_rows=None):
+        """將所有資料匯出為SQL文件 (分批的 INSERT 陳述式)；回傳各資料表寫出的筆數"""
+        return self.export_to_copy(filename, 'sql', chunk_rows)
+
+
+def add_dataset_arguments(parser, reference_date=None):
+    """CLI 共用：資料取自快照 (--snapshot)，或以與 generate-fake-data.py 相同的參數重新生成
+    reference_date 為 --reference-date 的預設值，None 時以今天為基準"""
+    parser.add_argument('--snapshot', default=None, metavar='DIR',
+                        help='資料取自 generate-fake-data.py --save-snapshot 的快照')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='未指定 --snapshot 時：重新生成的規模倍率，須與載入的資料相同 (預設: 1.0)')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='未指定 --snapshot 時：生成資料的亂數種子 (預設: 42)')
+    parser.add_argument('--reference-date', default=reference_date,
+                        help=f'未指定 --snapshot 時：生成資料的基準日期 YYYY-MM-DD (預設: {reference_date or "今天"})')
+    parser.add_argument('--sessions-per-event', default='4',
+                        help='未指定 --snapshot 時：每個活動的場次數 (預設: 4)')
+    parser.add_argument('--numpy', action='store_true',
+                        help='未指定 --snapshot 時：資料以 --numpy 生成')
+
+
+def check_dataset_arguments(parser, args):
+    """檢查 add_dataset_arguments 的參數，有誤時 parser.error"""
+    if args.numpy and not HAS_NUMPY:
+        parser.error('--numpy 需要 numpy，請執行: pip install numpy')
+    if args.reference_date:
+        try:
+            date.fromisoformat(args.reference_date)
+        except ValueError:
+            parser.error(f"--reference-date 格式應為 YYYY-MM-DD: {args.reference_date}")
+
+
+def dataset_from_args(args):
+    """依 add_dataset_arguments 的參數開啟快照或重新生成，回傳清單模式的 TicketMatchDataGenerator"""
+    if args.snapshot:
+        print(f"📸 開啟快照 {args.snapshot}...")
+        return TicketMatchDataGenerator.load_snapshot(args.snapshot)
+    now = datetime.combine(date.fromisoformat(args.reference_date), time()) if args.reference_date else None
+    print(f"🎯 重新生成資料 (規模 {args.scale}, seed {args.seed}, 基準時間 {now or '今天'})...")
+    return TicketMatchDataGenerator.regenerate(args.scale, args.seed, now, args.sessions_per_event, args.numpy)
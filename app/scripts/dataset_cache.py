@@ -0,0 +1,143 @@
+"""
+資料集快取 - Ticket Match 假資料生成用
+以 (生成參數, seed, 基準時間, 生成器版本) 的雜湊為鍵保存輸出 (sql / copy 檔或 csv 目錄)；
+相同參數再次生成時直接複製快取內容，不重新生成
+生成器版本取自生成與匯出用到的模組 (GENERATOR_SOURCES) 與 Faker (/ numpy) 版本，程式一改快取就自然失效
+快取目錄超過 max_bytes 時，依最後使用時間淘汰最舊的項目 (LRU)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+from faker import VERSION as FAKER_VERSION
+
+from column_engine import HAS_NUMPY, np
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 決定輸出內容的原始碼：generate-fake-data.py 與其生成/匯出路徑匯入的模組 (data_generator、sharding 及其相依)
+# 負載測試、行為軌跡、基準測試等工具不影響輸出，不列入；生成器新增匯入的模組時須一併加入
+GENERATOR_SOURCES = (
+    'generate-fake-data.py', 'data_generator.py', 'sharding.py', 'taiwan_music_data.py', 'unique_registry.py',
+    'samplers.py', 'seat_map.py', 'event_calendar.py', 'ticket_inventory.py', 'stream_state.py', 'column_store.py',
+    'column_engine.py', 'value_pools.py', 'trade_simulator.py', 'snapshot.py', 'sql_stream_writer.py',
+    'copy_writer.py', 'row_serializers.py', 'chunked_export.py', 'finalize.py', 'pg_loader.py',
+    'integrity_validator.py',
+)
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+META_FILE = 'meta.json'
+DATA_NAME = 'data'
+
+
+def generator_version():
+    """生成器原始碼與相依套件版本的雜湊"""
+    digest = hashlib.sha256()
+    for name in GENERATOR_SOURCES:
+        digest.update(name.encode('utf-8'))
+        with open(os.path.join(SCRIPTS_DIR, name), 'rb') as f:
+            digest.update(f.read())
+    digest.update(f"faker {FAKER_VERSION}".encode('utf-8'))
+    if HAS_NUMPY:
+        digest.update(f"numpy {np.__version__}".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def cache_key(params):
+    """params 為決定輸出內容的所有參數 (可 JSON 序列化)"""
+    payload = json.dumps(dict(params, generator=generator_version()), sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, name))
+                   for root, _, names in os.walk(path) for name in names)
+    return os.path.getsize(path)
+
+
+def _copy(source, target):
+    """複製檔案或目錄 (目錄時先清掉目標)"""
+    if os.path.isdir(source):
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        shutil.copytree(source, target)
+    else:
+        shutil.copyfile(source, target)
+
+
+class DatasetCache:
+    """<directory>/<key>/ 內有 data (檔案或目錄) 與 meta.json；meta.json 的 mtime 即最後使用時間"""
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key)
+
+    def fetch(self, key, output):
+        """命中時把快取內容複製到 output 並回傳 meta (含各表筆數)，否則回傳 None"""
+        entry = self._entry(key)
+        try:
+            with open(os.path.join(entry, META_FILE), encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        _copy(os.path.join(entry, DATA_NAME), output)
+        os.utime(os.path.join(entry, META_FILE))
+        return meta
+
+    def store(self, key, output, params, counts):
+        """保存 output；超過 max_bytes 的輸出不保存。回傳是否已保存"""
+        size = _size(output)
+        if size > self.max_bytes:
+            return False
+        os.makedirs(self.directory, exist_ok=True)
+        # 先寫到暫存目錄再改名，中斷或同時執行時不會留下不完整的項目
+        temp = os.path.join(self.directory, f".tmp-{key}-{os.getpid()}")
+        shutil.rmtree(temp, ignore_errors=True)
+        os.makedirs(temp)
+        _copy(output, os.path.join(temp, DATA_NAME))
+        with open(os.path.join(temp, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'params': params, 'counts': counts, 'size': size, 'created_at': time.time()},
+                      f, ensure_ascii=False, indent=2, default=str)
+        try:
+            os.rename(temp, self._entry(key))
+        except OSError:
+            # 其他程序已存入相同的鍵
+            shutil.rmtree(temp, ignore_errors=True)
+        self.evict()
+        return True
+
+    def entries(self):
+        """(最後使用時間, 大小, 路徑)，由舊到新"""
+        result = []
+        if not os.path.isdir(self.directory):
+            return result
+        for name in os.listdir(self.directory):
+            entry = self._entry(name)
+            meta = os.path.join(entry, META_FILE)
+            if name.startswith('.') or not os.path.exists(meta):
+                continue
+            with open(meta, encoding='utf-8') as f:
+                size = json.load(f).get('size', 0)
+            result.append((os.path.getmtime(meta), size, entry))
+        return sorted(result)
+
+    def evict(self):
+        """淘汰最久未使用的項目直到總大小 <= max_bytes，回傳淘汰數"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            evicted += 1
+        return evicted
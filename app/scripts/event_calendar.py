@@ -0,0 +1,131 @@
+"""
+活動行事曆 - Ticket Match 假資料生成用
+以排序陣列 + bisect 追蹤每個場地與每個活動的場次，衝突查詢為 O(log n)；
+FreeDays 以「下一個未額滿日」的 union-find 跳過已額滿的日子，找可排的日子為攤銷近 O(1)
+"""
+
+from bisect import bisect_left, bisect_right, insort
+
+
+def parse_sessions_distribution(spec):
+    """
+    解析每個活動的場次數分佈
+      4                -> 固定 4 場
+      "1:20,2:30,4:50" -> 20% 1 場、30% 2 場、50% 4 場
+      {1: 20, 4: 80}   -> 同上 (dict 形式)
+    回傳 (場次數列表, 權重列表)
+    """
+    if isinstance(spec, int):
+        return [spec], [1]
+    if isinstance(spec, dict):
+        items = sorted(spec.items())
+    else:
+        spec = str(spec).strip()
+        if ':' not in spec:
+            return [int(spec)], [1]
+        items = []
+        for part in spec.split(','):
+            count, weight = part.split(':')
+            items.append((int(count), float(weight)))
+    counts = [int(c) for c, _ in items]
+    weights = [float(w) for _, w in items]
+    if not counts or min(counts) < 1 or min(weights) < 0 or sum(weights) <= 0:
+        raise ValueError(f"無效的場次分佈: {spec}")
+    return counts, weights
+
+
+def mean_sessions(counts, weights):
+    return sum(c * w for c, w in zip(counts, weights)) / sum(weights)
+
+
+class EventCalendar:
+    """
+    場地行事曆：同一場地的場次時間區間不可重疊；
+    同一活動的場次開始時間需相隔至少 min_gap (預設 1 小時)
+    """
+
+    def __init__(self, min_gap_seconds=3600):
+        self.min_gap_seconds = min_gap_seconds
+        # venue -> (排序的開始時間, 對應的結束時間)；區間互不重疊，所以結束時間也是排序的
+        self._venue_starts = {}
+        self._venue_ends = {}
+        # event_id -> 排序的開始時間
+        self._event_starts = {}
+
+    def venue_free(self, venue, start, end):
+        """[start, end) 是否與該場地既有場次重疊"""
+        starts = self._venue_starts.get(venue)
+        if not starts:
+            return True
+        i = bisect_left(starts, start)
+        # 前一場必須在 start 之前結束，下一場必須在 end 之後開始
+        if i > 0 and self._venue_ends[venue][i - 1] > start:
+            return False
+        if i < len(starts) and starts[i] < end:
+            return False
+        return True
+
+    def event_free(self, event_id, start):
+        """該活動在 start 前後 min_gap 內是否已有場次"""
+        starts = self._event_starts.get(event_id)
+        if not starts:
+            return True
+        i = bisect_left(starts, start)
+        if i > 0 and (start - starts[i - 1]).total_seconds() < self.min_gap_seconds:
+            return False
+        if i < len(starts) and (starts[i] - start).total_seconds() < self.min_gap_seconds:
+            return False
+        return True
+
+    def is_free(self, event_id, venue, start, end):
+        return self.venue_free(venue, start, end) and self.event_free(event_id, start)
+
+    def book(self, event_id, venue, start, end):
+        starts = self._venue_starts.setdefault(venue, [])
+        ends = self._venue_ends.setdefault(venue, [])
+        i = bisect_right(starts, start)
+        starts.insert(i, start)
+        ends.insert(i, end)
+        insort(self._event_starts.setdefault(event_id, []), start)
+
+    def event_sessions(self, event_id):
+        """該活動所有場次的開始時間 (已排序)"""
+        return self._event_starts.get(event_id, [])
+
+    def venue_sessions(self, venue):
+        return len(self._venue_starts.get(venue, ()))
+
+
+class FreeDays:
+    """
+    排程期間 n 天中尚未額滿的日子：每天指向下一個可能未額滿的日子 (n 為哨兵)，find 時做路徑壓縮
+    mark_full 後 find / cyclic 不會再回傳該日；日子只會由未滿變滿，所以不需要還原
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self._next = list(range(n + 1))
+
+    def find(self, day):
+        """>= day 的第一個未額滿日 (沒有時為 n)"""
+        root = day
+        nxt = self._next
+        while nxt[root] != root:
+            root = nxt[root]
+        while nxt[day] != root:
+            nxt[day], day = root, nxt[day]
+        return root
+
+    def mark_full(self, day):
+        self._next[day] = day + 1
+
+    def cyclic(self, start):
+        """由 start 起 (到尾端後從 0 繞回) 依序產生未額滿的日子，每天最多一次；迭代中可 mark_full"""
+        day = self.find(start)
+        while day < self.n:
+            yield day
+            day = self.find(day + 1)
+        day = self.find(0)
+        while day < start:
+            yield day
+            day = self.find(day + 1)
@@ -0,0 +1,61 @@
+"""
+載入後的收尾 - Ticket Match 假資料生成用
+  延後建立索引  schema.sql 的次要索引 (CREATE INDEX) 讓每筆載入的資料列都要維護索引；
+               載入前先移除，資料載入後一次建立 (主鍵 / UNIQUE / 外鍵約束不受影響)
+  同步序列      生成的資料指定了 SERIAL 欄位的值，序列不會前進；調到各表的最大ID，應用程式第一次 INSERT 才不會撞主鍵
+  ANALYZE      讓查詢規劃器在第一個請求前就有統計資料
+匯出的 .sql / COPY 腳本 / CSV 的 load.sql 以 prelude_sql() 開頭、finalize_sql() 結尾；
+PostgresLoader 則直接在資料庫執行同樣的陳述式
+"""
+
+import os
+import re
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'schema.sql')
+
+# SERIAL 欄位 (同 init-db.js)
+SERIAL_COLUMNS = [
+    ('event', 'event_id'),
+    ('eventtime', 'eventtime_id'),
+    ('ticket', 'ticket_id'),
+    ('listing', 'listing_id'),
+    ('trade', 'trade_id'),
+    ('user_balance_log', 'log_id'),
+]
+
+_CREATE_INDEX = re.compile(r'^CREATE\s+INDEX\s+(\w+)\s+(ON\s.*?);', re.IGNORECASE | re.MULTILINE | re.DOTALL)
+
+
+def secondary_indexes(schema_path=SCHEMA_PATH):
+    """schema.sql 中的 CREATE INDEX：[(索引名稱, CREATE INDEX IF NOT EXISTS 陳述式)]"""
+    with open(schema_path, encoding='utf-8') as f:
+        schema = f.read()
+    return [(name, f"CREATE INDEX IF NOT EXISTS {name} {' '.join(definition.split())};")
+            for name, definition in _CREATE_INDEX.findall(schema)]
+
+
+def prelude_statements(indexes):
+    """載入前：移除次要索引"""
+    return [f"DROP INDEX IF EXISTS {name};" for name, _ in indexes]
+
+
+def sequence_statement():
+    """把每個 SERIAL 序列調到該表目前的最大ID (空表不調整)；以 DO 區塊執行，psql 不會印出查詢結果"""
+    lines = [f"    PERFORM setval(pg_get_serial_sequence('{table}', '{column}'), MAX({column})) "
+             f"FROM {table} HAVING MAX({column}) IS NOT NULL;" for table, column in SERIAL_COLUMNS]
+    return "DO $$\nBEGIN\n" + '\n'.join(lines) + "\nEND\n$$;"
+
+
+def finalize_statements(indexes):
+    """載入後：建立次要索引、同步序列、ANALYZE"""
+    return [statement for _, statement in indexes] + [sequence_statement(), 'ANALYZE;']
+
+
+def prelude_sql(schema_path=SCHEMA_PATH):
+    statements = prelude_statements(secondary_indexes(schema_path))
+    return "-- 載入前移除次要索引 (載入後重建)\n" + '\n'.join(statements) + "\n\n"
+
+
+def finalize_sql(schema_path=SCHEMA_PATH):
+    statements = finalize_statements(secondary_indexes(schema_path))
+    return "-- 收尾：建立次要索引、同步 SERIAL 序列、ANALYZE\n" + '\n'.join(statements) + "\n"
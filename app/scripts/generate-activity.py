@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Ticket Match 用戶行為軌跡生成器
+以生成的用戶、活動與貼文產生 MongoDB user_activity_log 的 search / click / view_event / view_listing 文件
+(見 activity_trace.py)，供分析 API 與 init-mongodb-indexes.js 的索引在實際資料量下做基準測試
+
+用戶、活動與貼文取自載入資料庫的那份資料：--snapshot 開啟 --save-snapshot 寫出的快照，
+或以與 generate-fake-data.py 相同的 --scale / --seed / --reference-date (/ --numpy) 在記憶體中重新生成
+軌跡的結束時間為資料的基準時間 (--reference-date)；分析 API 以目前時間篩選天數，請以今天為基準日期生成
+
+使用方法:
+  python generate-activity.py --snapshot snap --documents 10000000 --output activity.jsonl
+  mongoimport --uri mongodb://localhost:27017/ticket_match --collection user_activity_log --file activity.jsonl
+  python generate-activity.py --scale 1 --documents 50000000 --parts 8 --compress gzip --output activity
+  python generate-activity.py --snapshot snap --documents 20000000 --parts 4 --mongo --drop --create-indexes
+"""
+
+import argparse
+import os
+import sys
+import time as timer
+from datetime import timedelta
+
+from data_generator import add_dataset_arguments, check_dataset_arguments, dataset_from_args
+from chunked_export import HAS_ZSTD
+from activity_trace import (ActivityPopulation, HAS_PYMONGO, COLLECTION, DEFAULT_DAYS, DEFAULT_MONGODB_URI, BATCH_SIZE,
+                            generate_activity, prepare_collection, create_indexes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成 Ticket Match 用戶行為軌跡 (MongoDB user_activity_log)',
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_dataset_arguments(parser)
+    parser.add_argument('--documents', type=int, default=1000000,
+                        help='文件數 (預設: 1000000)')
+    parser.add_argument('--days', type=float, default=DEFAULT_DAYS,
+                        help=f'軌跡涵蓋基準時間之前的天數 (預設: {DEFAULT_DAYS})')
+    parser.add_argument('--trace-seed', type=int, default=None,
+                        help='軌跡的亂數種子 (預設: 同 --seed；快照時取自快照)')
+    parser.add_argument('--session-ids', action='store_true',
+                        help='每筆文件另寫 metadata.session_id')
+    parser.add_argument('--output', default='activity.jsonl',
+                        help='JSONL 輸出檔案；--parts > 1 時為放分片檔的目錄 (預設: activity.jsonl / activity)')
+    parser.add_argument('--compress', choices=('gzip', 'zstd'), default=None,
+                        help='JSONL 邊寫邊壓縮')
+    parser.add_argument('--parts', type=int, default=1,
+                        help='分成幾個分片 (各自一個檔案或 MongoDB 連線)，內容只取決於分片數 (預設: 1)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='平行產生分片的 worker 程序數 (預設: CPU 核心數，最多 --parts 個)')
+    parser.add_argument('--mongo', action='store_true',
+                        help='不寫檔，直接以 pymongo 批次寫入 MONGODB_URI 的 user_activity_log')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help=f'--mongo 時每次 insert_many 的文件數 (預設: {BATCH_SIZE})')
+    parser.add_argument('--drop', action='store_true',
+                        help='--mongo 時先清空 user_activity_log')
+    parser.add_argument('--create-indexes', action='store_true',
+                        help='--mongo 時寫入後建立 init-mongodb-indexes.js 的索引 (寫入前先移除既有索引)')
+    args = parser.parse_args()
+
+    if args.documents < 0 or args.days <= 0 or args.parts < 1 or args.batch_size < 1:
+        parser.error('--documents 必須 >= 0，--days 必須 > 0，--parts 與 --batch-size 必須 >= 1')
+    check_dataset_arguments(parser, args)
+    if args.compress == 'zstd' and not HAS_ZSTD:
+        parser.error('--compress zstd 需要 zstandard，請執行: pip install zstandard')
+    if args.mongo and not HAS_PYMONGO:
+        parser.error('--mongo 需要 pymongo，請執行: pip install pymongo')
+    if (args.drop or args.create_indexes) and not args.mongo:
+        parser.error('--drop / --create-indexes 只能與 --mongo 一起使用')
+    if args.parts > 1 and args.output == parser.get_default('output'):
+        args.output = 'activity'
+
+    generator = dataset_from_args(args)
+    population = ActivityPopulation.from_generator(generator)
+    listings = sum(map(len, population.listings_by_event.values()))
+    print(f"👥 {len(population.user_ids):,} 個用戶, {len(population.events):,} 個活動, {listings:,} 個上架中的貼文")
+    seed = args.trace_seed if args.trace_seed is not None else generator.seed
+    end = generator.now
+
+    uri = os.environ.get('MONGODB_URI', DEFAULT_MONGODB_URI)
+    if args.mongo:
+        target = f"MongoDB {uri} {COLLECTION}"
+        if args.drop or args.create_indexes:
+            prepare_collection(uri, drop=args.drop)
+    else:
+        target = args.output + (f" ({args.compress})" if args.compress else '')
+    print(f"🚀 生成 {args.documents:,} 筆行為文件 ({end - timedelta(days=args.days):%Y-%m-%d %H:%M} ~ "
+          f"{end:%Y-%m-%d %H:%M} 台灣時間, {args.parts} 個分片) → {target}...")
+    started = timer.perf_counter()
+    try:
+        counts = generate_activity(population, args.documents, end, args.days, seed, args.parts, args.workers,
+                                   output=None if args.mongo else args.output, compression=args.compress,
+                                   uri=uri, batch_size=args.batch_size, session_ids=args.session_ids)
+    except KeyboardInterrupt:
+        print("\n⚠️  已中斷")
+        sys.exit(1)
+    elapsed = timer.perf_counter() - started
+    total = sum(counts)
+    print(f"✅ 共 {total:,} 筆文件，{elapsed:.1f} 秒 ({total / elapsed if elapsed else 0:,.0f} 筆/秒)")
+
+    if args.mongo and args.create_indexes:
+        print("🗂️  建立索引...")
+        started = timer.perf_counter()
+        create_indexes(uri)
+        print(f"✅ 索引建立完成 ({timer.perf_counter() - started:.1f} 秒)")
+    elif not args.mongo:
+        files = [args.output] if args.parts == 1 else sorted(
+            os.path.join(args.output, name) for name in os.listdir(args.output))
+        size = sum(os.path.getsize(path) for path in files)
+        print(f"📁 {args.output} ({len(files)} 個檔案, {size / 1e6:.1f} MB)")
+        print("\n🚀 下一步:")
+        read = 'gunzip -c' if args.compress == 'gzip' else 'zstd -dc' if args.compress else 'cat'
+        print(f"   1. 匯入: {read} {' '.join(files) if len(files) <= 2 else os.path.join(args.output, '*')} | "
+              f"mongoimport --uri {uri} --collection {COLLECTION} --numInsertionWorkers 4")
+        print("   2. 建立索引: node scripts/init-mongodb-indexes.js")
+
+
+if __name__ == '__main__':
+    main()
@@ -9,10 +9,47 @@ Ticket Match 假資料生成器主腳本
 """
 
 import argparse
+import json
 import sys
 import os
-from datetime import datetime
+from datetime import datetime, date, time
 from data_generator import TicketMatchDataGenerator
+from event_calendar import parse_sessions_distribution, mean_sessions
+from pg_loader import connection_params, apply_schema
+from sharding import ShardedGenerator
+from column_engine import HAS_NUMPY
+from value_pools import ValuePools, POOL_SIZE
+from integrity_validator import IntegrityValidator
+from chunked_export import HAS_ZSTD
+from dataset_cache import DatasetCache, cache_key, DEFAULT_MAX_BYTES
+from instrumentation import StageRecorder
+
+# StageRecorder 記錄的階段名稱 (--profile 的選項)
+STAGES = ('pools', 'users', 'events', 'tickets', 'listings', 'trades', 'checkpoint', 'snapshot', 'snapshot-open',
+          'validate', 'export', 'load', 'shards')
+
+# 預估時間用的生成階段 (benchmark-generator.py 的步驟名稱，BASE_COUNTS 即對應參數的預設值)
+ESTIMATE_STAGES = ('users', 'events', 'tickets', 'listings', 'trades')
+
+
+def estimate_seconds(path, counts, defaults, export_format=None):
+    """
+    依 benchmark-generator.py --suite --json 的結果估計單一程序的生成 (與匯出) 秒數：
+    取量測中最大的規模，各步驟耗時依要求筆數與當時筆數的比例放大 (套件量測顯示各步驟接近線性)；
+    不含值池建立等固定的啟動成本 (基準測試不計入)
+    """
+    with open(path, encoding='utf-8') as f:
+        results = json.load(f)['results']
+    seconds = 0.0
+    for stage in ESTIMATE_STAGES:
+        result = max(results[stage], key=lambda r: r['scale'])
+        seconds += result['seconds'] * counts[stage] / max(int(defaults[stage] * result['scale']), 1)
+    if export_format:
+        result = max(results[f"export-{export_format}"], key=lambda r: r['scale'])
+        measured = sum(max(int(defaults[stage] * result['scale']), 1) for stage in ESTIMATE_STAGES)
+        seconds += result['seconds'] * sum(counts.values()) / measured
+    return seconds
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -24,6 +61,18 @@ def main():
   python generate-fake-data.py --scale 0.1              # 10%測試規模
   python generate-fake-data.py --users 5000 --tickets 15000  # 自訂規模
   python generate-fake-data.py --output my-data.sql     # 自訂輸出檔案
+  python generate-fake-data.py --scale 20 --stream      # 大規模資料，串流寫出
+  python generate-fake-data.py --format copy            # COPY 格式，以 psql -f 載入
+  python generate-fake-data.py --format csv --output generated-data  # 每表一個 CSV 檔
+  python generate-fake-data.py --scale 10 --shards 8    # 8 個分片平行生成
+  python generate-fake-data.py --scale 10 --chunk-rows 200000 --compress gzip --format csv  # 每表分塊、平行壓縮寫出
+  POSTGRES_DB=ticket_match_test python generate-fake-data.py --scale 0.1 --load --init-schema  # 直接載入測試資料庫
+  python generate-fake-data.py --reference-date 2025-06-01 --cache-dir ~/.cache/ticket-match  # 相同參數直接取用快取
+  python generate-fake-data.py --scale 10 --save-snapshot snapshots/s10  # 生成後另存欄式快照
+  python generate-fake-data.py --from-snapshot snapshots/s10 --format csv  # 不重新生成，直接從快照匯出
+  python generate-fake-data.py --scale 20 --checkpoint-dir ckpt --resume  # 中斷後以同一指令從最後完成的階段繼續
+  python generate-fake-data.py --scale 10 --stream --metrics run.jsonl --profile tickets trades  # 各階段量測與 cProfile
+  python generate-fake-data.py --scale 50 --estimate-from bench-main.json  # 依 benchmark-generator.py 的結果預估時間
         """
     )
 
@@ -31,6 +80,8 @@ def main():
                        help='用戶數量 (預設: 3000)')
     parser.add_argument('--events', type=int, default=300,
                        help='活動數量 (預設: 300)')
+    parser.add_argument('--sessions-per-event', default='4',
+                       help='每個活動的場次數，可為固定值或分佈，如 1:20,2:30,4:50 (預設: 4)')
     parser.add_argument('--tickets', type=int, default=10000,
                        help='票券數量 (預設: 10000) ⭐ 滿足上萬筆要求')
     parser.add_argument('--listings', type=int, default=12000,
@@ -41,13 +92,103 @@ def main():
                        help='整體規模倍率 (預設: 1.0)')
     parser.add_argument('--output', default='generated-data.sql',
                        help='輸出SQL檔案名稱 (預設: generated-data.sql)')
+    parser.add_argument('--format', choices=TicketMatchDataGenerator.EXPORT_FORMATS, default='sql',
+                       help='輸出格式: sql (INSERT)、copy (COPY FROM STDIN 的 psql 腳本)、csv (每表一個CSV檔的目錄) (預設: sql)')
     parser.add_argument('--validate', action='store_true',
-                       help='生成後進行資料完整性驗證')
+                       help='生成後依 schema.sql 的所有約束驗證資料完整性 (搭配 --stream 時邊生成邊驗證)')
+    parser.add_argument('--stream', action='store_true',
+                       help='串流模式：邊生成邊寫出，不保留完整資料表 (記憶體用量固定)')
+    parser.add_argument('--seed', type=int, default=42,
+                       help='亂數種子，相同參數與種子 (同一天內) 生成相同資料 (預設: 42)')
+    parser.add_argument('--reference-date', default=None,
+                       help='基準日期 YYYY-MM-DD：所有相對時間 (今年、最近 30 天、場次是否已過期) 以該日 00:00 為準 (預設: 今天)')
+    parser.add_argument('--numpy', action='store_true',
+                       help='以 NumPy 批次生成價格、狀態、座位、餘額與時間欄位 (需要 numpy；與逐筆生成的結果不同)')
+    parser.add_argument('--pool-size', type=int, default=POOL_SIZE,
+                       help=f'Faker 值池大小：啟動時預先產生的 user_name 數量 (預設: {POOL_SIZE})')
+    parser.add_argument('--pool-file', default=None,
+                       help='Faker 值池快取檔 (JSON)：存在且參數相符時直接載入，否則生成後寫入')
+    parser.add_argument('--shards', type=int, default=0,
+                       help='分片數：以多個程序平行生成，輸出只取決於種子與分片數 (預設: 0，不分片)')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='搭配 --shards 或 --chunk-rows：worker 程序數 (預設: CPU 核心數；分片模式為 min(分片數, CPU 核心數))')
+    parser.add_argument('--chunk-rows', type=int, default=None,
+                       help='分塊匯出：每個資料表切成每塊 N 列的檔案，由多個程序平行寫出；輸出為目錄 '
+                            '(含依外鍵順序列出分塊的 manifest.json，以 load-chunks.py 平行載入)')
+    parser.add_argument('--compress', choices=('gzip', 'zstd'), default=None,
+                       help='搭配 --chunk-rows：分塊檔邊寫邊壓縮 (zstd 需要 zstandard)')
+    parser.add_argument('--load', action='store_true',
+                       help='不寫檔，直接以 COPY 載入 PostgreSQL (連線設定取自 POSTGRES_* 環境變數，同 lib/db.ts)')
+    parser.add_argument('--init-schema', action='store_true',
+                       help='搭配 --load：載入前先套用 schema.sql (會清除既有資料)')
+    parser.add_argument('--cache-dir', default=os.environ.get('TICKET_MATCH_DATA_CACHE'),
+                       help='資料集快取目錄：參數、種子、基準時間與生成器版本相同時直接複製快取的輸出 '
+                            '(預設: 環境變數 TICKET_MATCH_DATA_CACHE，未設定則不使用快取)')
+    parser.add_argument('--cache-max-mb', type=int, default=DEFAULT_MAX_BYTES // 1024 ** 2,
+                       help=f'快取目錄大小上限 (MB)，超過時淘汰最久未使用的項目 (預設: {DEFAULT_MAX_BYTES // 1024 ** 2})')
+    parser.add_argument('--save-snapshot', default=None, metavar='DIR',
+                       help='生成後把資料表寫成欄式快照目錄 (僅清單模式)')
+    parser.add_argument('--from-snapshot', default=None, metavar='DIR',
+                       help='不生成資料，以 mmap 開啟 --save-snapshot 寫出的快照後驗證/匯出/載入 '
+                            '(seed、基準時間與規模取自快照)')
+    parser.add_argument('--checkpoint-dir', default=None, metavar='DIR',
+                       help='清單模式每完成一個生成階段就把狀態寫到此目錄 (資料表、ID、亂數狀態)')
+    parser.add_argument('--resume', action='store_true',
+                       help='從 --checkpoint-dir 的檢查點繼續，跳過已完成的階段 (參數需與中斷的執行相同)')
+    parser.add_argument('--metrics', default=None, metavar='PATH',
+                       help='各階段的量測記錄 (時間、筆數、筆數/秒、RSS 變化、Faker 耗時)；'
+                            '.jsonl 時每個階段結束即寫出一行，否則結束時寫成單一 JSON')
+    parser.add_argument('--profile', nargs='+', default=[], choices=STAGES + ('all',), metavar='STAGE',
+                       help=f'以 cProfile 量測的階段 ({", ".join(STAGES)} 或 all)，寫出 <profile-dir>/<stage>.pstats')
+    parser.add_argument('--profile-dir', default='profiles',
+                       help='--profile 的 .pstats 輸出目錄 (預設: profiles)')
+    parser.add_argument('--estimate-from', default=None, metavar='JSON',
+                       help='以 benchmark-generator.py --suite --json 的結果預估生成時間 (未指定時不預估)')
     parser.add_argument('--yes', action='store_true',
                        help='跳過確認提示，直接開始生成')
 
     args = parser.parse_args()
 
+    if args.numpy and not HAS_NUMPY:
+        parser.error('--numpy 需要 numpy，請執行: pip install numpy')
+    if args.pool_size < 1:
+        parser.error('--pool-size 必須 >= 1')
+    if args.shards < 0:
+        parser.error('--shards 不可為負數')
+    if args.shards and (args.validate or args.load):
+        parser.error('--shards 為串流式輸出，無法與 --validate 或 --load 同時使用')
+    if args.workers is not None and not (args.shards or args.chunk_rows):
+        parser.error('--workers 需搭配 --shards 或 --chunk-rows 使用')
+    if args.chunk_rows is not None:
+        if args.chunk_rows < 1:
+            parser.error('--chunk-rows 必須 >= 1')
+        if args.stream or args.shards or args.load:
+            parser.error('--chunk-rows 分塊匯出清單模式的資料表，無法與 --stream、--shards 或 --load 同時使用')
+    if args.compress and not args.chunk_rows:
+        parser.error('--compress 需搭配 --chunk-rows 使用')
+    if args.compress == 'zstd' and not HAS_ZSTD:
+        parser.error('--compress zstd 需要 zstandard，請執行: pip install zstandard')
+    if args.init_schema and not args.load:
+        parser.error('--init-schema 需搭配 --load 使用')
+    if args.load and args.format != 'sql':
+        parser.error('--load 直接寫入資料庫，不需指定 --format')
+    if args.cache_dir and args.load:
+        parser.error('--cache-dir 快取的是輸出檔案，無法與 --load 同時使用')
+    if args.save_snapshot and (args.stream or args.shards):
+        parser.error('--save-snapshot 需要清單模式收集的資料表，無法與 --stream 或 --shards 同時使用')
+    if args.resume and not args.checkpoint_dir:
+        parser.error('--resume 需搭配 --checkpoint-dir 使用')
+    if args.checkpoint_dir and (args.stream or args.shards or args.from_snapshot):
+        parser.error('--checkpoint-dir 保存的是清單模式的資料表，無法與 --stream、--shards 或 --from-snapshot 同時使用')
+    if args.from_snapshot and (args.stream or args.shards or args.cache_dir or args.save_snapshot):
+        parser.error('--from-snapshot 不生成資料，無法與 --stream、--shards、--cache-dir 或 --save-snapshot 同時使用')
+    try:
+        now = datetime.combine(date.fromisoformat(args.reference_date), time()) if args.reference_date else None
+    except ValueError:
+        parser.error(f"--reference-date 格式應為 YYYY-MM-DD: {args.reference_date}")
+    if (args.format == 'csv' or args.chunk_rows) and args.output == parser.get_default('output'):
+        args.output = 'generated-data'
+
     # 根據scale調整數量
     users = int(args.users * args.scale)
     events = int(args.events * args.scale)
@@ -55,6 +196,12 @@ def main():
     listings = int(args.listings * args.scale)
     trades = int(args.trades * args.scale)
 
+    try:
+        session_counts, session_weights = parse_sessions_distribution(args.sessions_per_event)
+    except ValueError as e:
+        parser.error(f"--sessions-per-event: {e}")
+    avg_sessions = mean_sessions(session_counts, session_weights)
+
     # 顯示生成計劃
     print("🎯 Ticket Match 假資料生成器")
     print("=" * 50)
@@ -64,20 +211,33 @@ def main():
     print("📊 將生成的資料規模:")
     print(f"   👥 用戶: {users:,}")
     print(f"   🎪 活動: {events:,}")
-    print(f"   🕒 活動場次: {events * 4:,} (每活動平均4場次)")
+    print(f"   🕒 活動場次: {int(events * avg_sessions):,} (每活動平均{avg_sessions:g}場次)")
     print(f"   🎫 票券: {tickets:,} ⭐ 滿足上萬筆要求")
     print(f"   📝 貼文: {listings:,}")
     print(f"   🤝 交易: {trades:,}")
     print(f"   📋 交易參與者: {trades * 2:,}")
     print(f"   💰 餘額記錄: {trades * 2 + users:,} (交易 + 初始餘額)")
     print()
-    print(f"💾 輸出檔案: {args.output}")
+    if args.load:
+        params = connection_params()
+        print(f"🐘 載入資料庫: {params['host']}:{params['port']}/{params['dbname']}")
+    else:
+        print(f"💾 輸出檔案: {args.output}")
     print()
 
-    # 估計生成時間
-    estimated_time = (users + events + tickets + listings + trades) / 10000 * 2  # 經驗值
-    print(f"⏱️  預估生成時間: {estimated_time:.1f} 分鐘")
-    print()
+    # 依先前的基準測試結果估計生成時間
+    if args.estimate_from:
+        counts = {'users': users, 'events': events, 'tickets': tickets, 'listings': listings, 'trades': trades}
+        try:
+            estimated = estimate_seconds(args.estimate_from, counts,
+                                         {stage: parser.get_default(stage) for stage in ESTIMATE_STAGES},
+                                         None if args.load else args.format)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️  無法從 {args.estimate_from} 預估生成時間: {e}")
+        else:
+            shown = f"{estimated:.1f} 秒" if estimated < 120 else f"{estimated / 60:.1f} 分鐘"
+            print(f"⏱️  預估生成時間: {shown} (依 {args.estimate_from}，單一程序)")
+        print()
 
     # 確認開始
     if not args.yes:
@@ -93,37 +253,168 @@ def main():
     print("\n🚀 開始生成資料...")
     start_time = datetime.now()
 
+    recorder = StageRecorder(args.metrics, args.profile, args.profile_dir)
+    status = 'error'
+    counts = None
     try:
+        cache = None
+        if args.cache_dir:
+            cache = DatasetCache(os.path.expanduser(args.cache_dir), args.cache_max_mb * 1024 ** 2)
+            # 決定輸出內容的所有參數；不同生成模式的輸出排列不同，因此模式也是鍵的一部分
+            cache_params = {
+                'counts': [users, events, tickets, listings, trades], 'sessions_per_event': args.sessions_per_event,
+                'seed': args.seed, 'reference_time': now or datetime.combine(date.today(), time()),
+                'format': args.format, 'numpy': args.numpy, 'pool_size': args.pool_size,
+                'mode': f"shards-{args.shards}" if args.shards else 'stream' if args.stream else 'list',
+            }
+            if args.chunk_rows:
+                cache_params['chunks'] = [args.chunk_rows, args.compress]
+            key = cache_key(cache_params)
+            # --validate / --save-snapshot 需要實際生成的資料表，不取用快取 (生成後仍會存入)
+            meta = None if args.validate or args.save_snapshot else cache.fetch(key, args.output)
+            if meta is not None:
+                print(f"⚡ 快取命中 ({key[:12]})：已複製到 {args.output}")
+                print(f"✅ 共 {sum(meta['counts'].values())} 筆記錄")
+                status = 'cache-hit'
+                return
+
+        # 建立 (或載入) Faker 值池，所有階段與分片共用
+        if args.from_snapshot:
+            pools = None
+        else:
+            with recorder.stage('pools') as record:
+                if args.pool_file:
+                    print(f"🧺 載入值池: {args.pool_file}")
+                    pools = ValuePools.load_or_build(args.pool_file, args.seed, args.pool_size)
+                else:
+                    pools = ValuePools.build(args.seed, args.pool_size)
+                record['rows'] = len(pools.user_names) + len(pools.email_domains)
+
         # 初始化生成器
-        generator = TicketMatchDataGenerator(args.scale)
+        generator = TicketMatchDataGenerator(args.scale, seed=args.seed, now=now, vectorized=args.numpy, pools=pools)
+        if args.metrics:
+            # 區分 Faker 與自身邏輯的耗時
+            recorder.attach(generator)
 
         # 生成各類資料
         print("📈 生成進度:")
 
-        # 1. 用戶資料
-        generator.generate_users(users)
+        if args.init_schema:
+            print("   📋 套用 schema.sql...")
+            apply_schema()
+
+        if args.shards:
+            # 分片模式：各階段切成多個分片平行生成後合併
+            sharded = ShardedGenerator(args.shards, seed=args.seed, workers=args.workers, scale_factor=args.scale,
+                                       vectorized=args.numpy, pools=pools, now=now)
+            with recorder.stage('shards') as record:
+                counts = sharded.generate(args.output, args.format, users, events, tickets, listings, trades,
+                                          args.sessions_per_event)
+                record['rows'] = sum(counts.values())
+        elif args.stream:
+            # 串流模式：各階段逐筆寫出 (或 COPY 進資料庫)，驗證器同時檢查每筆資料列
+            validator = IntegrityValidator() if args.validate else None
+            if args.load:
+                counts = generator.load_to_postgres((users, events, tickets, listings, trades, args.sessions_per_event),
+                                                    validator=validator, recorder=recorder)
+            else:
+                counts = generator.stream_to_sql(args.output, users, events, tickets, listings, trades,
+                                                 args.sessions_per_event, fmt=args.format, validator=validator,
+                                                 recorder=recorder)
+            if validator is not None:
+                print("   🔍 驗證資料完整性...")
+                # 逐列檢查已在各階段中完成，這裡只量測結尾的跨表檢查
+                with recorder.stage('validate'):
+                    validator.close()
+                if not validator.report():
+                    print("❌ 資料完整性檢查失敗，請檢查生成邏輯")
+                    sys.exit(1)
+        elif args.from_snapshot:
+            # 從快照開啟：資料表直接對應快照檔案，不重新生成
+            print(f"   📸 開啟快照 {args.from_snapshot}...")
+            with recorder.stage('snapshot-open'):
+                generator = TicketMatchDataGenerator.load_snapshot(args.from_snapshot)
+        else:
+            # 決定生成內容的參數；從檢查點繼續時必須相同
+            checkpoint_params = {
+                'counts': [users, events, tickets, listings, trades], 'sessions_per_event': args.sessions_per_event,
+                'seed': args.seed, 'scale': args.scale, 'numpy': args.numpy, 'pool_size': args.pool_size,
+            }
+            completed = []
+            if args.resume and os.path.exists(os.path.join(args.checkpoint_dir, 'manifest.json')):
+                generator, completed = TicketMatchDataGenerator.load_checkpoint(args.checkpoint_dir,
+                                                                                checkpoint_params, pools)
+                if now is not None and generator.now != now:
+                    raise ValueError(f"檢查點的基準時間為 {generator.now}，與 --reference-date 不同")
+                if args.metrics:
+                    recorder.attach(generator)
+                print(f"   ♻️  從檢查點繼續 ({args.checkpoint_dir})，已完成: {', '.join(completed) or '無'}")
+            elif args.resume:
+                print(f"   ⚠️  {args.checkpoint_dir} 沒有檢查點，從頭開始生成")
 
-        # 2. 活動和場次
-        generator.generate_events_and_times(events)
+            # 各階段：(名稱, 生成, 產生的筆數)
+            stages = [
+                # 1. 用戶資料
+                ('users', lambda: generator.generate_users(users),
+                 lambda: len(generator.users) + len(generator.user_roles)),
+                # 2. 活動和場次
+                ('events', lambda: generator.generate_events_and_times(events, args.sessions_per_event),
+                 lambda: len(generator.events) + len(generator.eventtimes)),
+                # 3. 票券資料
+                ('tickets', lambda: generator.generate_tickets(tickets),
+                 lambda: len(generator.tickets)),
+                # 4. 貼文資料
+                ('listings', lambda: generator.generate_listings(listings),
+                 lambda: len(generator.listings)),
+                # 5. 交易資料
+                ('trades', lambda: generator.generate_trades_and_related(trades),
+                 lambda: (len(generator.trades) + len(generator.trade_participants) +
+                          len(generator.trade_tickets) + len(generator.balance_logs))),
+            ]
+            for name, generate, rows in stages:
+                if name in completed:
+                    continue
+                with recorder.stage(name) as record:
+                    generate()
+                    record['rows'] = rows()
+                completed.append(name)
+                if args.checkpoint_dir:
+                    with recorder.stage('checkpoint'):
+                        generator.save_checkpoint(args.checkpoint_dir, completed, checkpoint_params)
 
-        # 3. 票券資料
-        generator.generate_tickets(tickets)
+            if args.save_snapshot:
+                with recorder.stage('snapshot'):
+                    generator.save_snapshot(args.save_snapshot)
 
-        # 4. 貼文資料
-        generator.generate_listings(listings)
+        if not args.shards and not args.stream:
+            total_rows = sum(generator.table_counts().values())
 
-        # 5. 交易資料
-        generator.generate_trades_and_related(trades)
+            # 6. 資料驗證 (可選)
+            if args.validate:
+                print("   🔍 驗證資料完整性...")
+                with recorder.stage('validate') as record:
+                    record['rows'] = total_rows
+                    valid = generator.validate_data_integrity()
+                if not valid:
+                    print("❌ 資料完整性檢查失敗，請檢查生成邏輯")
+                    sys.exit(1)
 
-        # 6. 資料驗證 (可選)
-        if args.validate:
-            print("   🔍 驗證資料完整性...")
-            if not generator.validate_data_integrity():
-                print("❌ 資料完整性檢查失敗，請檢查生成邏輯")
-                sys.exit(1)
+            # 7. 匯出SQL / COPY，或直接載入資料庫
+            with recorder.stage('load' if args.load else 'export') as record:
+                record['rows'] = total_rows
+                if args.load:
+                    counts = generator.load_to_postgres()
+                elif args.chunk_rows:
+                    counts = generator.export_chunked(args.output, args.format, args.chunk_rows, args.compress,
+                                                      args.workers)
+                elif args.format == 'sql':
+                    counts = generator.export_to_sql(args.output)
+                else:
+                    counts = generator.export_to_copy(args.output, args.format)
 
-        # 7. 匯出SQL
-        generator.export_to_sql(args.output)
+        if cache is not None:
+            stored = cache.store(key, args.output, cache_params, counts)
+            print(f"🗄️  {'已存入快取' if stored else '輸出超過快取上限，未存入快取'} ({key[:12]})")
 
         # 計算生成時間
         end_time = datetime.now()
@@ -133,31 +424,54 @@ def main():
         print("🎉 資料生成完成！")
         print("=" * 50)
         print(f"✨ 生成時間: {duration:.1f} 秒")
-        print(f"📁 輸出檔案: {args.output}")
+        if args.metrics or args.profile:
+            recorder.print_summary()
+        if args.metrics:
+            print(f"📏 量測記錄: {args.metrics}")
+        if args.profile:
+            print(f"🔬 cProfile: {args.profile_dir}/<stage>.pstats (python -m pstats 開啟)")
+        if not args.load:
+            print(f"📁 輸出檔案: {args.output}")
         print()
         print("📊 最終資料統計:")
-        print(f"   👥 用戶: {len(generator.users):,}")
-        print(f"   👤 用戶角色: {len(generator.user_roles):,}")
-        print(f"   🎪 活動: {len(generator.events):,}")
-        print(f"   🕒 場次: {len(generator.eventtimes):,}")
-        print(f"   🎫 票券: {len(generator.tickets):,} ⭐")
-        print(f"   📝 貼文: {len(generator.listings):,}")
-        print(f"   🤝 交易: {len(generator.trades):,}")
-        print(f"   📋 參與者: {len(generator.trade_participants):,}")
-        print(f"   🎫 交易票券: {len(generator.trade_tickets):,}")
-        print(f"   💰 餘額記錄: {len(generator.balance_logs) + len(generator.users):,}")
+        print(f"   👥 用戶: {counts['USER']:,}")
+        print(f"   👤 用戶角色: {counts['USER_ROLE']:,}")
+        print(f"   🎪 活動: {counts['EVENT']:,}")
+        print(f"   🕒 場次: {counts['EVENTTIME']:,}")
+        print(f"   🎫 票券: {counts['TICKET']:,} ⭐")
+        print(f"   📝 貼文: {counts['LISTING']:,}")
+        print(f"   🤝 交易: {counts['TRADE']:,}")
+        print(f"   📋 參與者: {counts['TRADE_PARTICIPANT']:,}")
+        print(f"   🎫 交易票券: {counts['TRADE_TICKET']:,}")
+        print(f"   💰 餘額記錄: {counts['USER_BALANCE_LOG']:,}")
         print()
         print("🚀 下一步:")
-        print(f"   1. 檢查資料庫連線")
-        print(f"   2. 執行: npm run init-db")
-        print(f"   3. 執行: npm run init-db:seed {args.output}")
-        print(f"   4. 啟動應用: npm run dev")
+        if args.load:
+            print(f"   1. 啟動應用: npm run dev")
+        elif args.chunk_rows:
+            print(f"   1. 檢查資料庫連線")
+            print(f"   2. 執行: npm run init-db")
+            print(f"   3. 執行: python scripts/load-chunks.py {args.output} --workers 4")
+            print(f"   4. 啟動應用: npm run dev")
+        else:
+            print(f"   1. 檢查資料庫連線")
+            print(f"   2. 執行: npm run init-db")
+            if args.format == 'sql':
+                print(f"   3. 執行: npm run init-db:seed {args.output}")
+            else:
+                print(f"   3. 執行: npm run init-db:seed {args.output}  (COPY 格式需要 psql)")
+            print(f"   4. 啟動應用: npm run dev")
+        status = 'ok'
 
     except Exception as e:
         print(f"\n❌ 生成過程中發生錯誤: {e}")
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        # 失敗時也寫出已完成階段的摘要
+        recorder.close(status=status, rows=sum(counts.values()) if counts else None, seed=args.seed, scale=args.scale, format=args.format,
+                       mode=f"shards-{args.shards}" if args.shards else 'stream' if args.stream else 'list')
 
 if __name__ == '__main__':
     # 檢查Python版本
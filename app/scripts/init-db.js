@@ -6,6 +6,7 @@
  */
 
 const { Pool } = require('pg');
+const { spawnSync } = require('child_process');
 const fs = require('fs');
 const path = require('path');
 
@@ -29,6 +30,45 @@ const pool = new Pool({
   password: process.env.POSTGRES_PASSWORD || 'postgres',
 });
 
+// COPY ... FROM STDIN and \copy can't run through client.query, so hand those seeds to psql
+function isCopySeed(seedPath) {
+  if (fs.statSync(seedPath).isDirectory()) return true;
+  // Only read the first 64 KB: COPY seeds can exceed V8's maximum string length
+  const buffer = Buffer.alloc(64 * 1024);
+  const fd = fs.openSync(seedPath, 'r');
+  let bytesRead;
+  try {
+    bytesRead = fs.readSync(fd, buffer, 0, buffer.length, 0);
+  } finally {
+    fs.closeSync(fd);
+  }
+  const head = buffer.toString('utf-8', 0, bytesRead);
+  return /^COPY .* FROM STDIN;$/m.test(head);
+}
+
+function loadWithPsql(seedPath) {
+  const isDir = fs.statSync(seedPath).isDirectory();
+  const script = isDir ? 'load.sql' : seedPath;
+  const result = spawnSync('psql', ['-v', 'ON_ERROR_STOP=1', '-q', '-f', script], {
+    cwd: isDir ? seedPath : undefined,
+    stdio: 'inherit',
+    env: {
+      ...process.env,
+      PGHOST: pool.options.host,
+      PGPORT: String(pool.options.port),
+      PGDATABASE: pool.options.database,
+      PGUSER: pool.options.user,
+      PGPASSWORD: pool.options.password,
+    },
+  });
+  if (result.error) {
+    throw new Error(`Unable to run psql (required for COPY seeds): ${result.error.message}`);
+  }
+  if (result.status !== 0) {
+    throw new Error(`psql exited with status ${result.status}`);
+  }
+}
+
 async function initDatabase() {
   const client = await pool.connect();
   
@@ -60,8 +100,13 @@ async function initDatabase() {
 
       if (fs.existsSync(seedPath)) {
         console.log(`🌱 Loading seed data from ${path.basename(seedPath)}...`);
-        const seedData = fs.readFileSync(seedPath, 'utf-8');
-        await client.query(seedData);
+        if (isCopySeed(seedPath)) {
+          console.log('📥 COPY format detected, loading with psql...');
+          loadWithPsql(seedPath);
+        } else {
+          const seedData = fs.readFileSync(seedPath, 'utf-8');
+          await client.query(seedData);
+        }
 
         // Reset sequences to match the maximum IDs in the data
         console.log('🔄 Resetting sequences...');
@@ -135,8 +180,9 @@ Usage:
   node init-db.js [options]
 
 Options:
-  --seed    Load seed data after applying schema
-  --help    Show this help message
+  --seed [file|dir]  Load seed data after applying schema
+                     (COPY scripts and CSV directories are loaded with psql)
+  --help             Show this help message
 
 Examples:
   node init-db.js           Apply schema only
@@ -0,0 +1,169 @@
+"""
+階段量測 - Ticket Match 假資料生成用
+StageRecorder.stage(name) 包住一個階段 (生成、驗證、匯出...)，記錄開始/結束時間、筆數、筆數/秒、
+RSS 變化，以及該階段花在 Faker 方法呼叫上的時間 (其餘為本專案自己的邏輯)
+每個階段結束時輸出一筆記錄：路徑為 .jsonl 時逐行寫出 (中途失敗也保留已完成的階段)，否則在結束時寫成單一 JSON
+指定 profile 的階段另以 cProfile 量測，寫出 <profile_dir>/<stage>.pstats (python -m pstats 開啟)
+"""
+
+import cProfile
+import json
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from time import perf_counter
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+METRICS_VERSION = 1
+
+
+def peak_rss_bytes():
+    """程序至今的峰值 RSS (無法取得時為 None)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 的單位是 bytes，Linux 是 KB
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def rss_bytes():
+    """目前的 RSS；沒有 /proc 時退回峰值 RSS"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+
+class TimedFaker:
+    """包裝 Faker 實例：累計呼叫其方法的次數與耗時；非方法屬性 (例如 random) 原樣回傳"""
+
+    def __init__(self, fake):
+        self._fake = fake
+        self._methods = {}
+        self.seconds = 0.0
+        self.calls = 0
+
+    def __getattr__(self, name):
+        method = self._methods.get(name)
+        if method is not None:
+            return method
+        attr = getattr(self._fake, name)
+        if not callable(attr):
+            return attr
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                self.seconds += perf_counter() - start
+                self.calls += 1
+
+        self._methods[name] = timed
+        return timed
+
+
+class StageRecorder:
+    """
+    path 為 None 時只保留在 records；profile 為要以 cProfile 量測的階段名稱 ('all' 表示全部)
+    attach(generator) 後才會區分 Faker 與自身邏輯的耗時 (包裝會讓每次 Faker 呼叫多一點開銷)
+    """
+
+    def __init__(self, path=None, profile=(), profile_dir='profiles'):
+        self.path = path
+        self.profile = set(profile or ())
+        self.profile_dir = profile_dir
+        self.records = []
+        self.faker = None
+        self.started_at = datetime.now()
+        self._start = perf_counter()
+        self._lines = open(path, 'w', encoding='utf-8') if path and path.endswith('.jsonl') else None
+
+    def attach(self, generator):
+        """把 generator.fake 換成 TimedFaker (需在生成前呼叫；之前綁定的 Faker 方法不會計入)"""
+        if not isinstance(generator.fake, TimedFaker):
+            generator.fake = TimedFaker(generator.fake)
+        self.faker = generator.fake
+
+    def _profiled(self, name):
+        return name in self.profile or 'all' in self.profile
+
+    @contextmanager
+    def stage(self, name):
+        """包住一個階段；呼叫端可在 with 區塊內設定 record['rows'] 與其他欄位"""
+        record = {'stage': name, 'rows': None}
+        faker = self.faker
+        faker_seconds, faker_calls = (faker.seconds, faker.calls) if faker else (0.0, 0)
+        rss_start = rss_bytes()
+        started_at = datetime.now()
+        profiler = None
+        if self._profiled(name):
+            os.makedirs(self.profile_dir, exist_ok=True)
+            profiler = cProfile.Profile()
+        start = perf_counter()
+        if profiler:
+            profiler.enable()
+        try:
+            yield record
+            record['status'] = 'ok'
+        except BaseException as e:
+            record['status'] = 'error'
+            record['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            seconds = perf_counter() - start
+            if profiler:
+                profiler.disable()
+                record['profile'] = os.path.join(self.profile_dir, f"{name}.pstats")
+                profiler.dump_stats(record['profile'])
+            rss_end = rss_bytes()
+            record.update({
+                'start': started_at.isoformat(),
+                'end': datetime.now().isoformat(),
+                'seconds': seconds,
+                'rows_per_sec': record['rows'] / seconds if record['rows'] and seconds else None,
+                'rss_start': rss_start,
+                'rss_end': rss_end,
+                'rss_delta': rss_end - rss_start if rss_start is not None and rss_end is not None else None,
+                'peak_rss': peak_rss_bytes(),
+            })
+            if faker:
+                record['faker_seconds'] = faker.seconds - faker_seconds
+                record['faker_calls'] = faker.calls - faker_calls
+                record['own_seconds'] = seconds - record['faker_seconds']
+            self.records.append(record)
+            self._emit(dict(record, type='stage'))
+
+    def _emit(self, record):
+        if self._lines is not None:
+            self._lines.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+            self._lines.flush()
+
+    def close(self, **run):
+        """寫出整體摘要 (run 為要一併記錄的參數，例如 seed、規模、總筆數) 並回傳"""
+        summary = dict(run, type='run', version=METRICS_VERSION, start=self.started_at.isoformat(),
+                       end=datetime.now().isoformat(), seconds=perf_counter() - self._start,
+                       peak_rss=peak_rss_bytes())
+        if self._lines is not None:
+            self._emit(summary)
+            self._lines.close()
+            self._lines = None
+        elif self.path:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump({'run': summary, 'stages': self.records}, f, ensure_ascii=False, indent=2, default=str)
+        return summary
+
+    def print_summary(self):
+        print("⏱️  各階段耗時:")
+        for r in self.records:
+            rows = f"{r['rows']:>12,} 筆" if r['rows'] is not None else ' ' * 15
+            rate = f"{r['rows_per_sec']:>12,.0f} 筆/秒" if r['rows_per_sec'] else ' ' * 17
+            faker = f"  Faker {r['faker_seconds'] / r['seconds']:4.0%}" if 'faker_seconds' in r and r['seconds'] else ''
+            rss = f"  RSS {r['rss_delta'] / 1024 ** 2:+8.1f} MB" if r['rss_delta'] is not None else ''
+            print(f"   {r['stage']:<14} {r['seconds']:8.2f} 秒 {rows} {rate}{faker}{rss}")
@@ -0,0 +1,417 @@
+"""
+資料完整性驗證 - Ticket Match 假資料生成用
+吃與 SqlStreamWriter 相同的 (op, table, row) 串流 (依外鍵順序，父資料列先於子資料列)，每筆資料列只看一次：
+  主鍵 / UNIQUE    以雜湊索引記錄 (SERIAL 整數主鍵用位元組陣列)
+  外鍵            直接查父表的主鍵 / UNIQUE 索引，包含 TRADE_TICKET -> TRADE_PARTICIPANT 的複合外鍵
+  NOT NULL / CHECK / VARCHAR 長度 / DECIMAL(10,2) 範圍
+另檢查幾項資料規則：Sell/Exchange 貼文只提供 Active 票券 (仍在交易中而鎖定的除外)、
+票券最終持有者為最後一筆成交交易的買方、用戶最終餘額等於其餘額記錄的總和、交易的 updated_at 不早於 created_at
+清單模式 (iter_collected_rows) 與串流模式皆可使用；結果為每個約束的違反筆數
+"""
+
+import re
+from array import array
+from operator import itemgetter
+
+from sql_stream_writer import TABLES, INSERT, UPDATE, UPDATES
+from stream_state import TICKET_STATUS_CODES
+from trade_simulator import TRADE_STATUSES
+
+# 主鍵與 UNIQUE 約束：資料表 -> [(約束名稱, 欄位)]；名稱同 PostgreSQL 的預設命名
+# USER_BALANCE_LOG.log_id 由 SERIAL 產生，生成的資料列不含主鍵
+UNIQUE_KEYS = {
+    'USER': [('USER_pkey', ('user_id',)), ('USER_username_key', ('username',)), ('USER_email_key', ('email',))],
+    'USER_ROLE': [('user_role_pkey', ('user_id', 'role'))],
+    'EVENT': [('event_pkey', ('event_id',))],
+    'EVENTTIME': [('eventtime_pkey', ('eventtime_id',)),
+                  ('eventtime_event_id_start_time_key', ('event_id', 'start_time'))],
+    'TICKET': [('ticket_pkey', ('ticket_id',)), ('unique_ticket_seat', ('eventtime_id', 'seat_area', 'seat_number'))],
+    'LISTING': [('listing_pkey', ('listing_id',))],
+    'LISTING_TICKET': [('listing_ticket_pkey', ('listing_id', 'ticket_id'))],
+    'TRADE': [('trade_pkey', ('trade_id',))],
+    'TRADE_PARTICIPANT': [('trade_participant_pkey', ('trade_id', 'user_id'))],
+    'TRADE_TICKET': [('trade_ticket_pkey', ('trade_id', 'ticket_id'))],
+    'USER_BALANCE_LOG': [],
+}
+
+# PostgreSQL 約束名稱使用的資料表名稱 (未加引號的名稱會轉為小寫)
+TABLE_NAMES = {table: 'USER' if table == 'USER' else table.lower() for table in UNIQUE_KEYS}
+
+# 外鍵：資料表 -> [(約束名稱, 欄位, 參照的資料表, 參照的欄位)]；參照的欄位必為該表的主鍵或 UNIQUE 約束
+REFERENCES = {
+    'USER': [],
+    'USER_ROLE': [('user_role_user_id_fkey', ('user_id',), 'USER', ('user_id',))],
+    'EVENT': [],
+    'EVENTTIME': [('eventtime_event_id_fkey', ('event_id',), 'EVENT', ('event_id',))],
+    'TICKET': [('ticket_eventtime_id_fkey', ('eventtime_id',), 'EVENTTIME', ('eventtime_id',)),
+               ('ticket_owner_id_fkey', ('owner_id',), 'USER', ('user_id',))],
+    'LISTING': [('listing_user_id_fkey', ('user_id',), 'USER', ('user_id',)),
+                ('listing_event_id_fkey', ('event_id',), 'EVENT', ('event_id',))],
+    'LISTING_TICKET': [('listing_ticket_listing_id_fkey', ('listing_id',), 'LISTING', ('listing_id',)),
+                       ('listing_ticket_ticket_id_fkey', ('ticket_id',), 'TICKET', ('ticket_id',))],
+    'TRADE': [('trade_listing_id_fkey', ('listing_id',), 'LISTING', ('listing_id',))],
+    'TRADE_PARTICIPANT': [('trade_participant_trade_id_fkey', ('trade_id',), 'TRADE', ('trade_id',)),
+                          ('trade_participant_user_id_fkey', ('user_id',), 'USER', ('user_id',))],
+    'TRADE_TICKET': [('trade_ticket_trade_id_fkey', ('trade_id',), 'TRADE', ('trade_id',)),
+                     ('trade_ticket_ticket_id_fkey', ('ticket_id',), 'TICKET', ('ticket_id',)),
+                     ('trade_ticket_from_user_id_fkey', ('from_user_id',), 'USER', ('user_id',)),
+                     ('trade_ticket_to_user_id_fkey', ('to_user_id',), 'USER', ('user_id',)),
+                     ('trade_ticket_trade_id_from_user_id_fkey', ('trade_id', 'from_user_id'),
+                      'TRADE_PARTICIPANT', ('trade_id', 'user_id')),
+                     ('trade_ticket_trade_id_to_user_id_fkey', ('trade_id', 'to_user_id'),
+                      'TRADE_PARTICIPANT', ('trade_id', 'user_id'))],
+    'USER_BALANCE_LOG': [('user_balance_log_user_id_fkey', ('user_id',), 'USER', ('user_id',)),
+                         ('user_balance_log_trade_id_fkey', ('trade_id',), 'TRADE', ('trade_id',))],
+}
+
+NOT_NULL = {
+    'USER': ('user_id', 'username', 'password_hash', 'email', 'status', 'balance', 'created_at'),
+    'USER_ROLE': ('user_id', 'role'),
+    'EVENT': ('event_id', 'event_name', 'venue'),
+    'EVENTTIME': ('eventtime_id', 'event_id', 'start_time'),
+    'TICKET': ('ticket_id', 'eventtime_id', 'owner_id', 'seat_area', 'seat_number', 'price', 'status', 'created_at'),
+    'LISTING': ('listing_id', 'user_id', 'event_id', 'event_date', 'status', 'type', 'created_at'),
+    'LISTING_TICKET': ('listing_id', 'ticket_id'),
+    'TRADE': ('trade_id', 'listing_id', 'status', 'agreed_price', 'created_at', 'updated_at'),
+    'TRADE_PARTICIPANT': ('trade_id', 'user_id', 'role', 'confirmed'),
+    'TRADE_TICKET': ('trade_id', 'ticket_id', 'from_user_id', 'to_user_id'),
+    'USER_BALANCE_LOG': ('user_id', 'change', 'reason', 'created_at'),
+}
+
+# VARCHAR(n) 欄位
+MAX_LENGTHS = {
+    'USER': {'username': 50, 'password_hash': 255, 'email': 100, 'status': 20},
+    'USER_ROLE': {'role': 20},
+    'EVENT': {'event_name': 200, 'venue': 200},
+    'TICKET': {'seat_area': 20, 'seat_number': 20, 'status': 20},
+    'LISTING': {'status': 20, 'type': 20},
+    'TRADE': {'status': 20},
+    'TRADE_PARTICIPANT': {'role': 20},
+    'USER_BALANCE_LOG': {'reason': 50},
+}
+
+# DECIMAL(10,2) 欄位：絕對值須小於 10^8
+DECIMAL_COLUMNS = {
+    'USER': ('balance',),
+    'TICKET': ('price',),
+    'TRADE': ('agreed_price',),
+    'USER_BALANCE_LOG': ('change',),
+}
+DECIMAL_LIMIT = 10 ** 8
+
+# PostgreSQL ~* 為不分大小寫的比對
+_EMAIL_FORMAT = re.compile(r'^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$', re.IGNORECASE)
+
+# CHECK 約束：資料表 -> [(約束名稱, 檢查函式)]；只對通過 NOT NULL 的資料列檢查
+CHECKS = {
+    'USER': [
+        ('check_user_status', lambda r: r['status'] in ('Active', 'Suspended', 'Warning')),
+        ('check_balance_non_negative', lambda r: r['balance'] >= 0),
+        ('check_email_format', lambda r: _EMAIL_FORMAT.match(r['email']) is not None),
+        ('check_user_description_length',
+         lambda r: r.get('user_description') is None or len(r['user_description']) <= 500),
+    ],
+    'USER_ROLE': [('check_role', lambda r: r['role'] in ('User', 'Operator'))],
+    'EVENTTIME': [('check_event_times', lambda r: r.get('end_time') is None or r['end_time'] > r['start_time'])],
+    'TICKET': [
+        ('check_ticket_status', lambda r: r['status'] in TICKET_STATUS_CODES),
+        ('check_ticket_price_positive', lambda r: r['price'] > 0),
+    ],
+    'LISTING': [
+        ('check_listing_status', lambda r: r['status'] in ('Active', 'Canceled', 'Completed', 'Expired')),
+        ('check_listing_type', lambda r: r['type'] in ('Sell', 'Buy', 'Exchange')),
+    ],
+    'TRADE': [
+        ('check_trade_status', lambda r: r['status'] in ('Pending', 'Completed', 'Canceled', 'Disputed', 'Expired')),
+        ('check_agreed_price_non_negative', lambda r: r['agreed_price'] >= 0),
+    ],
+    'TRADE_PARTICIPANT': [('check_participant_role', lambda r: r['role'] in ('buyer', 'seller', 'exchanger'))],
+}
+
+# 資料規則 (非 schema 約束)
+OFFERED_TICKET_ACTIVE = 'listing_offered_ticket_active'
+TICKET_OWNER_MATCHES_TRADE = 'ticket_owner_matches_last_trade'
+BALANCE_MATCHES_LOG = 'user_balance_matches_log'
+TRADE_UPDATED_AFTER_CREATED = 'trade_updated_after_created'
+DATA_RULES = [OFFERED_TICKET_ACTIVE, TICKET_OWNER_MATCHES_TRADE, BALANCE_MATCHES_LOG, TRADE_UPDATED_AFTER_CREATED]
+
+_ACTIVE = TICKET_STATUS_CODES['Active']
+_NO_OWNER = -1
+_TRADE_STATUS_CODES = {s: i for i, s in enumerate(TRADE_STATUSES)}
+_COMPLETED = _TRADE_STATUS_CODES['Completed']
+# 交易仍在進行 (票券可能已被賣方確認而鎖定)
+_OPEN_TRADE = {_TRADE_STATUS_CODES['Pending'], _TRADE_STATUS_CODES['Disputed']}
+
+
+def _cents(value):
+    return round(value * 100)
+
+
+def _set_code(buffer, key, code):
+    """以整數ID為索引的狀態代碼 (bytearray，未設定為 0xff)"""
+    if key >= len(buffer):
+        buffer.extend(b'\xff' * max(key + 1 - len(buffer), len(buffer)))
+    buffer[key] = code
+
+
+class KeyIndex:
+    """
+    主鍵 / UNIQUE 索引
+    非負整數鍵 (SERIAL 主鍵) 以位元組陣列記錄：ID 連續，1000 萬筆只需約 10MB；其他鍵放在 set
+    """
+
+    def __init__(self):
+        self._flags = bytearray()
+        self._keys = set()
+
+    def add(self, key):
+        """加入鍵；已存在時回傳 False"""
+        if type(key) is int and key >= 0:
+            flags = self._flags
+            if key >= len(flags):
+                flags.extend(bytes(max(key + 1 - len(flags), len(flags))))
+            if flags[key]:
+                return False
+            flags[key] = 1
+            return True
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        return True
+
+    def __contains__(self, key):
+        if type(key) is int and key >= 0:
+            return key < len(self._flags) and self._flags[key] == 1
+        return key in self._keys
+
+
+def _key_getter(columns):
+    """單一欄位的鍵為值本身，複合鍵為 tuple"""
+    return itemgetter(*columns)
+
+
+def _tuple_getter(columns):
+    getter = itemgetter(*columns)
+    return getter if len(columns) > 1 else lambda row: (getter(row),)
+
+
+class IntegrityValidator:
+    """
+    介面同 SqlStreamWriter (write / close / counts)，可直接取代或與寫出器並用
+    與寫出器相同地由 USER 衍生初始餘額記錄、由 offered_ticket_ids 衍生 LISTING_TICKET
+    """
+
+    MAX_SAMPLES = 10
+
+    def __init__(self):
+        self.counts = {table: 0 for table in UNIQUE_KEYS}
+        # 約束名稱 -> 違反筆數 (NOT NULL / 長度 / 範圍只在發生時加入)
+        names = [name for keys in UNIQUE_KEYS.values() for name, _ in keys]
+        names += [name for references in REFERENCES.values() for name, *_ in references]
+        names += [name for checks in CHECKS.values() for name, _ in checks]
+        self.violations = dict.fromkeys(names + DATA_RULES, 0)
+        self.samples = []
+        self._indexes = {(table, columns): KeyIndex()
+                         for table, keys in UNIQUE_KEYS.items() for _, columns in keys}
+        self._plans = {table: self._plan(table) for table in UNIQUE_KEYS}
+        # 資料規則用的票券狀態：ticket_id -> 持有者序號 / 狀態代碼
+        self._user_ordinals = {}
+        self._ticket_owners = array('i')
+        self._ticket_statuses = bytearray()
+        # ticket_id -> 最後一筆成交交易的買方序號
+        self._last_buyers = {}
+        # trade_id -> 交易狀態代碼
+        self._trade_statuses = bytearray()
+        # 清單模式重播的是最終狀態：貼文提供的非 Active 票券若屬於仍在進行的交易則不算違反，
+        # 因此先記下 (ticket_id -> listing_id)，看到對應的交易票券時移除，close() 時再計入
+        self._inactive_offers = {}
+        # 用戶序號 -> 餘額 / 餘額記錄總和 (分)
+        self._balances = array('q')
+        self._log_sums = array('q')
+
+    def _plan(self, table):
+        """預先取出每個資料表要檢查的欄位、索引與函式，逐列檢查時不必再查表"""
+        return (
+            _tuple_getter(NOT_NULL[table]),
+            list(MAX_LENGTHS.get(table, {}).items()),
+            DECIMAL_COLUMNS.get(table, ()),
+            CHECKS.get(table, ()),
+            [(name, columns, _key_getter(columns), len(columns) > 1, self._indexes[table, columns])
+             for name, columns in UNIQUE_KEYS[table]],
+            [(name, columns, _key_getter(columns), len(columns) > 1, self._indexes[parent, parent_columns], parent)
+             for name, columns, parent, parent_columns in REFERENCES[table]],
+        )
+
+    def _violation(self, name, message):
+        self.violations[name] = self.violations.get(name, 0) + 1
+        if len(self.samples) < self.MAX_SAMPLES:
+            self.samples.append(f"{name}: {message}")
+
+    def write(self, op, table, row):
+        if op == UPDATE:
+            self._update(table, row)
+            return
+        self.counts[table] += 1
+        self._check_row(table, row)
+        if table == 'USER':
+            ordinal = self._user_ordinals.setdefault(row['user_id'], len(self._user_ordinals))
+            if ordinal == len(self._balances):
+                self._balances.append(_cents(row['balance']) if row['balance'] is not None else 0)
+                self._log_sums.append(0)
+            self.write(INSERT, 'USER_BALANCE_LOG', {
+                'user_id': row['user_id'], 'trade_id': None, 'change': row['balance'],
+                'reason': 'INITIAL_BALANCE', 'created_at': row['created_at']
+            })
+        elif table == 'TICKET':
+            self._set_ticket(row['ticket_id'], row['owner_id'], TICKET_STATUS_CODES.get(row['status'], 0xff))
+        elif table == 'LISTING':
+            offered = row.get('offered_ticket_ids') or ()
+            for ticket_id in offered:
+                self.write(INSERT, 'LISTING_TICKET', {'listing_id': row['listing_id'], 'ticket_id': ticket_id})
+            if row['type'] in ('Sell', 'Exchange'):
+                for ticket_id in offered:
+                    status = self._ticket_status(ticket_id)
+                    if status is not None and status != _ACTIVE:
+                        self._inactive_offers[ticket_id] = row['listing_id'], row['type']
+        elif table == 'TRADE':
+            if type(row['trade_id']) is int and row['trade_id'] >= 0:
+                _set_code(self._trade_statuses, row['trade_id'], _TRADE_STATUS_CODES.get(row['status'], 0xfe))
+            if row['created_at'] and row['updated_at'] and row['updated_at'] < row['created_at']:
+                self._violation(TRADE_UPDATED_AFTER_CREATED, f"交易 {row['trade_id']} 的 updated_at 早於 created_at")
+        elif table == 'TRADE_TICKET':
+            status = self._trade_status(row['trade_id'])
+            if status == _COMPLETED:
+                self._last_buyers[row['ticket_id']] = self._user_ordinals.get(row['to_user_id'], _NO_OWNER)
+            elif status in _OPEN_TRADE:
+                self._inactive_offers.pop(row['ticket_id'], None)
+        elif table == 'USER_BALANCE_LOG':
+            ordinal = self._user_ordinals.get(row['user_id'])
+            if ordinal is not None and ordinal < len(self._log_sums) and row['change'] is not None:
+                self._log_sums[ordinal] += _cents(row['change'])
+
+    def _check_row(self, table, row):
+        not_null, lengths, decimals, checks, uniques, references = self._plans[table]
+        try:
+            complete = None not in not_null(row)
+        except KeyError:
+            complete = False
+        if not complete:
+            for column in NOT_NULL[table]:
+                if row.get(column) is None:
+                    self._violation(f"{TABLE_NAMES[table]}.{column}_not_null", f"{table}.{column} 為 NULL")
+            row = {c: row.get(c) for c in TABLES[table][1]}
+        for column, limit in lengths:
+            value = row[column]
+            if value is not None and len(value) > limit:
+                self._violation(f"{TABLE_NAMES[table]}.{column}_length", f"{table}.{column} 超過 {limit} 字元: {value}")
+        for column in decimals:
+            value = row[column]
+            if value is not None and abs(value) >= DECIMAL_LIMIT:
+                self._violation(f"{TABLE_NAMES[table]}.{column}_numeric", f"{table}.{column} 超出 DECIMAL(10,2): {value}")
+        if complete:
+            for name, check in checks:
+                if not check(row):
+                    self._violation(name, f"{table} {self._describe(table, row)}")
+
+        # 任一欄位為 NULL 的鍵不參與 UNIQUE / 外鍵檢查 (同 PostgreSQL)
+        for name, columns, key_of, composite, index in uniques:
+            key = key_of(row)
+            if (None in key if composite else key is None):
+                continue
+            if not index.add(key):
+                self._violation(name, f"{table} 重複的 ({', '.join(columns)}) = {key}")
+        for name, columns, key_of, composite, index, parent in references:
+            key = key_of(row)
+            if (None in key if composite else key is None):
+                continue
+            if key not in index:
+                self._violation(name, f"{table} ({', '.join(columns)}) = {key} 不存在於 {parent}")
+
+    def _update(self, table, row):
+        key_column, columns = UPDATES[table]
+        key = row[key_column]
+        if key not in self._indexes[table, (key_column,)]:
+            self._violation(f"{TABLE_NAMES[table]}_pkey", f"UPDATE {table} 的 {key_column} = {key} 不存在")
+            return
+        if table == 'USER':
+            name, check = CHECKS['USER'][1]
+            if not check(row):
+                self._violation(name, f"UPDATE USER {key} 的 balance = {row['balance']}")
+            ordinal = self._user_ordinals.get(key)
+            if ordinal is not None and ordinal < len(self._balances):
+                self._balances[ordinal] = _cents(row['balance'])
+        elif table == 'TICKET':
+            if row['owner_id'] not in self._indexes['USER', ('user_id',)]:
+                self._violation('ticket_owner_id_fkey', f"UPDATE TICKET {key} 的 owner_id {row['owner_id']} 不存在於 USER")
+            name, check = CHECKS['TICKET'][0]
+            if not check(row):
+                self._violation(name, f"UPDATE TICKET {key} 的 status = {row['status']}")
+            self._set_ticket(key, row['owner_id'], TICKET_STATUS_CODES.get(row['status'], 0xff))
+        elif table == 'LISTING':
+            name, check = CHECKS['LISTING'][0]
+            if not check(row):
+                self._violation(name, f"UPDATE LISTING {key} 的 status = {row['status']}")
+
+    def _set_ticket(self, ticket_id, owner_id, status):
+        if type(ticket_id) is not int or ticket_id < 0:
+            return
+        owners, statuses = self._ticket_owners, self._ticket_statuses
+        if ticket_id >= len(owners):
+            grow = max(ticket_id + 1 - len(owners), len(owners))
+            owners.extend(array('i', [_NO_OWNER]) * grow)
+            statuses.extend(b'\xff' * grow)
+        owners[ticket_id] = self._user_ordinals.get(owner_id, _NO_OWNER)
+        statuses[ticket_id] = status
+
+    def _trade_status(self, trade_id):
+        if type(trade_id) is int and 0 <= trade_id < len(self._trade_statuses):
+            return self._trade_statuses[trade_id]
+        return None
+
+    def _ticket_status(self, ticket_id):
+        if type(ticket_id) is int and 0 <= ticket_id < len(self._ticket_statuses):
+            status = self._ticket_statuses[ticket_id]
+            return None if status == 0xff else status
+        return None
+
+    @staticmethod
+    def _describe(table, row):
+        """以主鍵描述資料列 (無主鍵時用第一個 NOT NULL 欄位)"""
+        columns = UNIQUE_KEYS[table][0][1] if UNIQUE_KEYS[table] else NOT_NULL[table][:1]
+        return ', '.join(f"{c}={row.get(c)}" for c in columns)
+
+    def close(self):
+        """檢查需要完整資料的規則 (貼文票券狀態、票券最終持有者、餘額)；回傳違反總數"""
+        for ticket_id, (listing_id, listing_type) in self._inactive_offers.items():
+            self._violation(OFFERED_TICKET_ACTIVE, f"貼文 {listing_id} ({listing_type}) 包含非 Active 的票券 {ticket_id}")
+        self._inactive_offers.clear()
+        owners = self._ticket_owners
+        for ticket_id, buyer in self._last_buyers.items():
+            if type(ticket_id) is int and 0 <= ticket_id < len(owners) and owners[ticket_id] != buyer:
+                self._violation(TICKET_OWNER_MATCHES_TRADE, f"票券 {ticket_id} 的持有者與最後一筆成交交易的買方不一致")
+        self._last_buyers.clear()
+        mismatched = [ordinal for ordinal, (balance, log_sum) in enumerate(zip(self._balances, self._log_sums))
+                      if balance != log_sum]
+        if mismatched:
+            users = list(self._user_ordinals)
+            for ordinal in mismatched:
+                self._violation(BALANCE_MATCHES_LOG, f"用戶 {users[ordinal]} 的餘額 {self._balances[ordinal] / 100} "
+                                                     f"與餘額記錄總和 {self._log_sums[ordinal] / 100} 不符")
+        return self.total_violations()
+
+    def total_violations(self):
+        return sum(self.violations.values())
+
+    def report(self):
+        """印出每個約束的違反筆數；全部通過時回傳 True"""
+        print(f"   🔍 檢查 {sum(self.counts.values()):,} 筆資料列、{len(self.violations)} 項約束")
+        width = max(map(len, self.violations), default=0)
+        for name, count in self.violations.items():
+            print(f"      {'❌' if count else '✅'} {name:<{width}}  {count:,} 筆違反")
+        if not self.total_violations():
+            print("   ✅ 資料完整性驗證通過")
+            return True
+        print("   ❌ 發現資料完整性問題，範例:")
+        for sample in self.samples:
+            print(f"      - {sample}")
+        return False
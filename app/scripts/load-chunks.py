@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Ticket Match 分塊資料載入
+載入 generate-fake-data.py --chunk-rows 分塊匯出的目錄 (manifest.json)：依外鍵層級逐層載入，
+同一層的資料表、同一資料表的各分塊以多條連線同時 COPY (見 pg_loader.load_manifest)
+
+連線設定取自 POSTGRES_* 環境變數 (同 lib/db.ts)
+
+使用方法:
+  python load-chunks.py generated-data --workers 8
+  POSTGRES_DB=ticket_match_test python load-chunks.py generated-data --init-schema
+"""
+
+import argparse
+import sys
+import time
+
+from pg_loader import connection_params, apply_schema, load_manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='平行載入 Ticket Match 分塊匯出的資料')
+    parser.add_argument('directory',
+                        help='generate-fake-data.py --chunk-rows 的輸出目錄')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='同時載入的連線數 (預設: 4)')
+    parser.add_argument('--init-schema', action='store_true',
+                        help='載入前先套用 schema.sql (會清除既有資料)')
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error('--workers 必須 >= 1')
+
+    params = connection_params()
+    print(f"🐘 載入 {args.directory} 到 PostgreSQL {params['host']}:{params['port']}/{params['dbname']} "
+          f"({args.workers} 條連線)...")
+    start = time.perf_counter()
+    try:
+        if args.init_schema:
+            print("   📋 套用 schema.sql...")
+            apply_schema(params)
+        counts = load_manifest(args.directory, params, args.workers)
+    except Exception as e:
+        print(f"❌ 載入失敗: {e}")
+        sys.exit(1)
+    duration = time.perf_counter() - start
+    rows = sum(counts.values())
+    print(f"✅ 資料載入完成！共 {rows:,} 筆記錄，{duration:.1f} 秒 ({rows / duration:,.0f} 筆/秒)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Ticket Match HTTP 負載測試
+對本機啟動的應用程式 (npm run dev 或 npm run build && npm start) 以目標速率發出混合請求：
+瀏覽 (/api/events、/api/listings)、建立交易 (/api/trades)、確認 (/api/trades/[id]/confirm) 與取消，
+依端點報告 p50/p95/p99 延遲、錯誤率與鎖競爭失敗 (見 load_harness.py)
+
+用戶、貼文與票券取自載入資料庫的那份資料：--snapshot 開啟 --save-snapshot 寫出的快照，
+或以與 generate-fake-data.py 相同的 --scale / --seed / --reference-date (/ --numpy) 在記憶體中重新生成
+所有生成的用戶密碼皆為 password123
+
+使用方法:
+  python generate-fake-data.py --scale 0.1 --reference-date 2025-06-01 --save-snapshot snap --yes && npm run init-db:seed generated-data.sql
+  python load-test.py --snapshot snap --rate 50 --duration 60
+  python load-test.py --scale 0.1 --reference-date 2025-06-01 --mix trade:40,confirm:50,cancel:10 --hot-listings 5 --json run.json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+
+from data_generator import add_dataset_arguments, check_dataset_arguments, dataset_from_args
+from load_harness import HttpClient, Population, LoadTest, DEFAULT_MIX, DEFAULT_PASSWORD, parse_mix, print_report
+
+
+async def run(args, population):
+    client = HttpClient(args.url, max_connections=args.connections, timeout=args.timeout)
+    test = LoadTest(client, population, parse_mix(args.mix), seed=args.run_seed, hot_listings=args.hot_listings,
+                    max_inflight=args.max_inflight, password=args.password)
+    try:
+        await test.check()
+        print(f"🚀 {args.url}: {args.rate:g} 操作/秒 x {args.duration:g} 秒 (mix {args.mix})...")
+        return await test.run(args.rate, args.duration)
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ticket Match HTTP 負載測試 (asyncio)',
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:3000',
+                        help='應用程式網址 (預設: http://localhost:3000)')
+    add_dataset_arguments(parser)
+    parser.add_argument('--rate', type=float, default=20,
+                        help='目標速率：每秒啟動的操作數 (預設: 20)')
+    parser.add_argument('--duration', type=float, default=30,
+                        help='測試秒數 (預設: 30)')
+    parser.add_argument('--mix', default=','.join(f"{name}:{weight}" for name, weight in DEFAULT_MIX.items()),
+                        help=f'操作權重 ({", ".join(DEFAULT_MIX)}) (預設: %(default)s)')
+    parser.add_argument('--hot-listings', type=int, default=0,
+                        help='交易只針對隨機挑出的 N 個貼文，提高鎖競爭 (預設: 0，所有上架中的貼文)')
+    parser.add_argument('--max-inflight', type=int, default=256,
+                        help='同時進行的操作上限，超過時略過該次操作 (預設: 256)')
+    parser.add_argument('--connections', type=int, default=64,
+                        help='HTTP 連線數上限 (預設: 64)')
+    parser.add_argument('--timeout', type=float, default=30,
+                        help='單一請求逾時秒數 (預設: 30)')
+    parser.add_argument('--password', default=DEFAULT_PASSWORD,
+                        help='登入密碼 (預設: 生成資料的 password123)')
+    parser.add_argument('--run-seed', type=int, default=None,
+                        help='操作選擇的亂數種子 (預設: 不固定)')
+    parser.add_argument('--json', default=None, metavar='PATH',
+                        help='另把結果寫成 JSON')
+    args = parser.parse_args()
+
+    if args.rate <= 0 or args.duration <= 0:
+        parser.error('--rate 與 --duration 必須 > 0')
+    check_dataset_arguments(parser, args)
+    try:
+        parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(f"--mix: {e}")
+
+    population = Population.from_generator(dataset_from_args(args))
+    print(f"👥 {len(population.users):,} 個用戶, {len(population.listings):,} 個上架中的貼文, "
+          f"{len(population.tickets):,} 張可用票券")
+    try:
+        report = asyncio.run(run(args, population))
+    except ConnectionError as e:
+        print(f"❌ {e}")
+        print("   請先啟動應用: npm run dev")
+        sys.exit(1)
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n📁 結果: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
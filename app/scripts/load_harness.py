@@ -0,0 +1,496 @@
+"""
+HTTP 負載測試 - Ticket Match
+以 asyncio 對本機啟動的應用程式 (npm run dev / npm start) 發出請求，使用者與資料取自生成的資料集：
+  Population  可登入的用戶、活動、上架中的貼文與可用票券 (清單模式的 TicketMatchDataGenerator 或快照)
+  HttpClient  只用標準函式庫的 HTTP/1.1 用戶端 (keep-alive 連線池，支援 chunked 回應)
+  LoadTest    依目標速率 (開放迴路，不等前一個操作完成) 執行瀏覽 / 建立交易 / 確認 / 取消的混合操作，
+              依端點統計 p50/p95/p99 延遲、錯誤率與鎖競爭失敗
+鎖競爭失敗：請求因並行的交易搶先改變了同一批資料列 (票券已鎖定、交易已不是 Pending...) 而被拒絕，
+與一般錯誤 (驗證失敗、伺服器錯誤) 分開計算；以少數熱門貼文 (hot_listings) 集中交易可提高競爭
+"""
+
+import asyncio
+import json
+import math
+import random
+import ssl
+import time
+from urllib.parse import urlsplit, urlencode
+
+# 所有生成的用戶共用的密碼 (password_hash 見 data_generator.py)
+DEFAULT_PASSWORD = 'password123'
+SESSION_COOKIE = 'ticket_match_session'
+
+# 操作 -> 預設權重
+DEFAULT_MIX = {'events': 30, 'listings': 30, 'trade': 20, 'confirm': 15, 'cancel': 5}
+
+# API 錯誤訊息中代表鎖競爭 (並行交易搶先改變資料列) 的片段 (見 app/api/trades)
+LOCK_CONTENTION_MESSAGES = (
+    'may have been traded concurrently', 'is not in locked state', 'status: Locked', 'not pending',
+    'not active', 'ownership changed unexpectedly', 'deadlock detected', 'could not serialize',
+    'lock timeout', 'canceling statement due to lock timeout',
+)
+
+PERCENTILES = (50, 95, 99)
+
+
+def parse_mix(spec):
+    """'events:30,trade:20' -> {操作: 權重}；未列出的操作權重為 0"""
+    mix = dict.fromkeys(DEFAULT_MIX, 0)
+    for part in spec.split(','):
+        name, _, weight = part.partition(':')
+        name = name.strip()
+        if name not in mix:
+            raise ValueError(f"未知的操作: {name} (可用: {', '.join(DEFAULT_MIX)})")
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise ValueError(f"權重必須是數字: {part}") from None
+        if mix[name] < 0:
+            raise ValueError(f"權重不可為負數: {part}")
+    if not any(mix.values()):
+        raise ValueError("至少要有一個操作的權重大於 0")
+    return mix
+
+
+def percentile(sorted_values, p):
+    """最近排名法的百分位數 (sorted_values 已排序；空清單為 None)"""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def is_lock_contention(message):
+    return any(fragment in message for fragment in LOCK_CONTENTION_MESSAGES)
+
+
+class HttpResponse:
+    def __init__(self, status, headers, cookies, body):
+        self.status = status
+        self.headers = headers
+        self.cookies = cookies
+        self.body = body
+
+    def json(self):
+        try:
+            return json.loads(self.body or b'null')
+        except ValueError:
+            return None
+
+    def error_message(self):
+        data = self.json()
+        return str(data.get('error', '')) if isinstance(data, dict) else self.body[:200].decode('utf-8', 'replace')
+
+
+class HttpClient:
+    """
+    最小的 HTTP/1.1 用戶端：同一個 base_url 的 keep-alive 連線池，最多 max_connections 條連線同時使用
+    回應支援 Content-Length、chunked 與以關閉連線結束；重用的閒置連線已被伺服器關閉時換一條連線重送
+    """
+
+    def __init__(self, base_url, max_connections=64, timeout=30.0):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError(f"只支援 http / https: {base_url}")
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.host_header = parts.netloc
+        self.ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        self.timeout = timeout
+        self._idle = []
+        self._slots = asyncio.Semaphore(max_connections)
+
+    async def request(self, method, path, body=None, cookie=None):
+        payload = b'' if body is None else json.dumps(body).encode('utf-8')
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host_header}", "Accept: application/json",
+                 f"Content-Length: {len(payload)}"]
+        if body is not None:
+            lines.append("Content-Type: application/json")
+        if cookie:
+            lines.append(f"Cookie: {cookie}")
+        data = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + payload
+
+        async with self._slots:
+            while True:
+                reused = bool(self._idle)
+                reader, writer = self._idle.pop() if reused else await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port, ssl=self.ssl), self.timeout)
+                try:
+                    writer.write(data)
+                    await writer.drain()
+                    response, keep_alive = await asyncio.wait_for(self._read_response(reader, method), self.timeout)
+                except (ConnectionResetError, BrokenPipeError):
+                    writer.close()
+                    if reused:
+                        continue
+                    raise
+                except BaseException:
+                    writer.close()
+                    raise
+                if keep_alive:
+                    self._idle.append((reader, writer))
+                else:
+                    writer.close()
+                return response
+
+    @staticmethod
+    async def _read_response(reader, method):
+        status_line = await reader.readline()
+        if not status_line:
+            # 伺服器已關閉閒置連線 (沒有讀到任何回應)
+            raise ConnectionResetError("連線已關閉")
+        version, status, _ = (status_line.decode('latin-1').rstrip('\r\n') + '  ').split(' ', 2)
+        status = int(status)
+        headers, cookies = {}, []
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            name, value = name.strip().lower(), value.strip()
+            if name == 'set-cookie':
+                cookies.append(value)
+            headers[name] = value
+
+        keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+        if method == 'HEAD' or status in (204, 304) or status < 200:
+            body = b''
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            parts = []
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                parts.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b''.join(parts)
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        else:
+            body = await reader.read()
+            keep_alive = False
+        return HttpResponse(status, headers, cookies, body), keep_alive
+
+    def close(self):
+        for _, writer in self._idle:
+            writer.close()
+        self._idle.clear()
+
+
+class Population:
+    """
+    負載測試用的資料：可登入的用戶、活動、上架中的貼文與可用票券
+    取自清單模式的 TicketMatchDataGenerator (生成後或以 load_snapshot 開啟的快照)，即載入資料庫時的狀態；
+    測試中完成的交易會更新票券持有者與貼文狀態，其餘的變化 (鎖定、其他用戶的操作) 不追蹤
+    """
+
+    def __init__(self, users, event_ids, listings, tickets):
+        self.users = users              # user_id -> [username, 餘額]
+        self.event_ids = event_ids
+        self.listings = listings        # listing_id -> (user_id, event_id, type, offered_ticket_ids)
+        self.tickets = tickets          # ticket_id -> [owner_id, event_id, price]
+        self.tickets_by_event = {}
+        for ticket_id, (_, event_id, _) in tickets.items():
+            self.tickets_by_event.setdefault(event_id, []).append(ticket_id)
+
+    @classmethod
+    def from_generator(cls, generator):
+        event_of = {et['eventtime_id']: et['event_id'] for et in generator.eventtimes}
+        columns = generator.users.columns
+        users = {user_id: [username, float(balance)] for user_id, username, status, balance in zip(
+            columns['user_id'], columns['username'], columns['status'], columns['balance']) if status != 'Suspended'}
+        columns = generator.tickets.columns
+        tickets = {ticket_id: [owner_id, event_of[eventtime_id], float(price)]
+                   for ticket_id, eventtime_id, owner_id, price, status in zip(
+                       columns['ticket_id'], columns['eventtime_id'], columns['owner_id'], columns['price'],
+                       columns['status']) if status == 'Active' and owner_id in users}
+        columns = generator.listings.columns
+        listings = {listing_id: (user_id, event_id, listing_type, tuple(offered or ()))
+                    for listing_id, user_id, event_id, listing_type, offered, status in zip(
+                        columns['listing_id'], columns['user_id'], columns['event_id'], columns['type'],
+                        columns['offered_ticket_ids'], columns['status']) if status == 'Active' and user_id in users}
+        return cls(users, [event['event_id'] for event in generator.events], listings, tickets)
+
+    def owned_tickets(self, owner_id, event_id=None):
+        candidates = self.tickets_by_event.get(event_id, ()) if event_id is not None else self.tickets
+        return [t for t in candidates if t in self.tickets and self.tickets[t][0] == owner_id]
+
+    def transfer(self, moves):
+        """交易完成：票券改為新持有者"""
+        for ticket_id, _, to_user in moves:
+            if ticket_id in self.tickets:
+                self.tickets[ticket_id][0] = to_user
+
+
+class EndpointStats:
+    """一個端點的延遲 (秒) 與結果計數：ok / error (HTTP 錯誤) / lock (鎖競爭) / transport (連線失敗、逾時)"""
+
+    def __init__(self):
+        self.latencies = []
+        self.outcomes = dict.fromkeys(('ok', 'error', 'lock', 'transport'), 0)
+        self.statuses = {}
+
+    def record(self, seconds, outcome, status=None):
+        self.latencies.append(seconds)
+        self.outcomes[outcome] += 1
+        if status is not None:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+        requests = len(latencies)
+        result = {'requests': requests, **self.outcomes, 'statuses': dict(sorted(self.statuses.items()))}
+        for p in PERCENTILES:
+            value = percentile(latencies, p)
+            result[f"p{p}_ms"] = None if value is None else round(value * 1000, 2)
+        result['error_rate'] = (self.outcomes['error'] + self.outcomes['transport']) / requests if requests else 0.0
+        result['lock_rate'] = self.outcomes['lock'] / requests if requests else 0.0
+        return result
+
+
+class _RequestFailed(Exception):
+    """請求未成功 (已記錄在統計中)，中止目前的操作"""
+
+
+class LoadTest:
+    """
+    依 mix (操作 -> 權重) 以每秒 rate 個操作的速率執行 duration 秒；每個操作可能包含多個請求 (未登入時先登入)
+    交易：Sell 由其他用戶購買貼文提供的票券，Buy 由持有該活動票券的用戶賣出，Exchange 以各自的一張票交換；
+    confirm / cancel 的對象是本次測試建立、仍為 Pending 的交易，沒有時改為建立交易
+    """
+
+    def __init__(self, client, population, mix=None, seed=None, hot_listings=0, max_inflight=256,
+                 password=DEFAULT_PASSWORD):
+        self.client = client
+        self.population = population
+        self.mix = dict(mix or DEFAULT_MIX)
+        self.rng = random.Random(seed)
+        self.password = password
+        self.max_inflight = max_inflight
+        self.stats = {}
+        self.sessions = {}
+        self._logins = {}
+        self.pending = {}       # trade_id -> {'participants': (listing 擁有者, 發起者), 'confirmed': set(), 'moves': [...]}
+        self.operations = dict.fromkeys(DEFAULT_MIX, 0)
+        self.dropped = 0
+        listing_ids = sorted(population.listings)
+        if hot_listings and hot_listings < len(listing_ids):
+            listing_ids = self.rng.sample(listing_ids, hot_listings)
+        self.listing_ids = listing_ids
+        self.user_ids = list(population.users)
+
+    # --- 請求與統計 ---
+
+    async def _call(self, endpoint, method, path, body=None, user_id=None):
+        """送出請求並記錄到 endpoint 的統計；失敗時記錄後拋出 _RequestFailed"""
+        cookie = (await self._session(user_id)) if user_id is not None else None
+        return await self._send(endpoint, method, path, body, cookie)
+
+    async def _send(self, endpoint, method, path, body=None, cookie=None):
+        stats = self.stats.setdefault(endpoint, EndpointStats())
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, body, cookie)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+            stats.record(time.perf_counter() - start, 'transport')
+            raise _RequestFailed(endpoint) from None
+        elapsed = time.perf_counter() - start
+        if response.status < 400:
+            stats.record(elapsed, 'ok', response.status)
+            return response
+        message = response.error_message()
+        stats.record(elapsed, 'lock' if is_lock_contention(message) else 'error', response.status)
+        raise _RequestFailed(message)
+
+    async def _session(self, user_id):
+        """user_id 的 session cookie；同一用戶並行的操作共用同一次登入"""
+        cookie = self.sessions.get(user_id)
+        if cookie is not None:
+            return cookie
+        login = self._logins.get(user_id)
+        if login is None:
+            login = self._logins[user_id] = asyncio.ensure_future(self._login(user_id))
+        return await asyncio.shield(login)
+
+    async def _login(self, user_id):
+        username = self.population.users[user_id][0]
+        try:
+            response = await self._send('POST /api/auth/login', 'POST', '/api/auth/login',
+                                        {'username': username, 'password': self.password})
+        finally:
+            self._logins.pop(user_id, None)
+        for cookie in response.cookies:
+            if cookie.startswith(SESSION_COOKIE + '='):
+                self.sessions[user_id] = cookie.split(';', 1)[0]
+                return self.sessions[user_id]
+        raise _RequestFailed(f"登入回應沒有 {SESSION_COOKIE} cookie")
+
+    # --- 操作 ---
+
+    async def browse_events(self):
+        query = urlencode({'limit': 20, 'offset': self.rng.randrange(0, max(len(self.population.event_ids), 1))})
+        await self._call('GET /api/events', 'GET', f"/api/events?{query}")
+
+    async def browse_listings(self):
+        params = {'limit': 20}
+        if self.population.event_ids and self.rng.random() < 0.5:
+            params['event_id'] = self.rng.choice(self.population.event_ids)
+        await self._call('GET /api/listings', 'GET', f"/api/listings?{urlencode(params)}")
+
+    def _plan_trade(self):
+        """挑一個貼文與發起者，回傳 (發起者, 請求內容, 票券移轉 [(ticket_id, from, to)])；找不到可行組合時為 None"""
+        population, rng = self.population, self.rng
+        for _ in range(10):
+            listing_id = rng.choice(self.listing_ids)
+            listing = population.listings.get(listing_id)
+            if listing is None:
+                continue
+            owner, event_id, listing_type, offered = listing
+            offered = [t for t in offered if t in population.tickets and population.tickets[t][0] == owner]
+            if listing_type == 'Buy':
+                candidates = [t for t in population.tickets_by_event.get(event_id, ())
+                              if t in population.tickets and population.tickets[t][0] != owner]
+                if not candidates:
+                    continue
+                ticket_id = rng.choice(candidates)
+                initiator, _, price = population.tickets[ticket_id]
+                body = {'listing_id': listing_id, 'agreed_price': round(price * rng.uniform(0.5, 1.0), 2),
+                        'ticket_ids': [ticket_id]}
+                return initiator, body, [(ticket_id, initiator, owner)]
+            initiator = rng.choice(self.user_ids)
+            if initiator == owner:
+                continue
+            if listing_type == 'Exchange':
+                own = population.owned_tickets(initiator)
+                if not offered or not own:
+                    continue
+                ticket_id = rng.choice(own)
+                body = {'listing_id': listing_id, 'agreed_price': 0, 'ticket_ids': [ticket_id],
+                        'listing_owner_ticket_ids': offered}
+                return initiator, body, [(t, owner, initiator) for t in offered] + [(ticket_id, initiator, owner)]
+            # Sell：未指定貼文票券時由 API 自動帶入擁有者該活動的票券 (價格上限取最便宜的一張)
+            tickets = offered or population.owned_tickets(owner, event_id)
+            if not tickets:
+                continue
+            cap = sum(population.tickets[t][2] for t in offered) if offered else min(
+                population.tickets[t][2] for t in tickets)
+            price = round(min(cap * rng.uniform(0.5, 1.0), population.users[initiator][1]), 2)
+            body = {'listing_id': listing_id, 'agreed_price': price, 'ticket_ids': [],
+                    'listing_owner_ticket_ids': offered}
+            return initiator, body, [(t, owner, initiator) for t in offered]
+        return None
+
+    async def create_trade(self):
+        plan = self._plan_trade() if self.listing_ids else None
+        if plan is None:
+            return await self.browse_listings()
+        initiator, body, moves = plan
+        owner = self.population.listings[body['listing_id']][0]
+        try:
+            response = await self._call('POST /api/trades', 'POST', '/api/trades', body, initiator)
+        except _RequestFailed as e:
+            if 'not active' in str(e):
+                self.population.listings.pop(body['listing_id'], None)
+            raise
+        trade = (response.json() or {}).get('trade') or {}
+        if 'trade_id' in trade:
+            self.pending[trade['trade_id']] = {'participants': (owner, initiator), 'confirmed': set(), 'moves': moves,
+                                               'listing_id': body['listing_id']}
+
+    async def confirm_trade(self):
+        if not self.pending:
+            return await self.create_trade()
+        trade_id = self.rng.choice(list(self.pending))
+        trade = self.pending[trade_id]
+        waiting = [user for user in trade['participants'] if user not in trade['confirmed']]
+        if not waiting:
+            self.pending.pop(trade_id, None)
+            return await self.create_trade()
+        user_id = self.rng.choice(waiting)
+        try:
+            response = await self._call('POST /api/trades/[id]/confirm', 'POST', f"/api/trades/{trade_id}/confirm",
+                                        user_id=user_id)
+        except _RequestFailed as e:
+            if 'not pending' in str(e):
+                self.pending.pop(trade_id, None)
+            raise
+        trade['confirmed'].add(user_id)
+        if (response.json() or {}).get('status') == 'Completed':
+            self.pending.pop(trade_id, None)
+            self.population.transfer(trade['moves'])
+            self.population.listings.pop(trade['listing_id'], None)
+
+    async def cancel_trade(self):
+        if not self.pending:
+            return await self.create_trade()
+        trade_id = self.rng.choice(list(self.pending))
+        user_id = self.rng.choice(self.pending.pop(trade_id)['participants'])
+        await self._call('POST /api/trades/[id]/cancel', 'POST', f"/api/trades/{trade_id}/cancel", user_id=user_id)
+
+    OPERATIONS = {'events': browse_events, 'listings': browse_listings, 'trade': create_trade,
+                  'confirm': confirm_trade, 'cancel': cancel_trade}
+
+    async def _operation(self, name):
+        self.operations[name] += 1
+        try:
+            await self.OPERATIONS[name](self)
+        except _RequestFailed:
+            pass
+
+    # --- 執行 ---
+
+    async def check(self):
+        """確認應用程式可連線 (失敗時拋出 ConnectionError)"""
+        try:
+            response = await self.client.request('GET', '/api/events?limit=1')
+        except (OSError, asyncio.TimeoutError) as e:
+            raise ConnectionError(f"無法連線到 {self.client.host}:{self.client.port} ({e})") from None
+        if response.status >= 500:
+            raise ConnectionError(f"GET /api/events 回應 {response.status}: {response.error_message()}")
+
+    async def run(self, rate, duration):
+        """開放迴路：每 1/rate 秒啟動一個操作，不等前一個完成；同時進行的操作超過 max_inflight 時略過並計入 dropped"""
+        names = [name for name, weight in self.mix.items() if weight > 0]
+        weights = [self.mix[name] for name in names]
+        loop = asyncio.get_running_loop()
+        tasks = set()
+        start = loop.time()
+        count = int(rate * duration)
+        for i in range(count):
+            delay = start + i / rate - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(tasks) >= self.max_inflight:
+                self.dropped += 1
+                continue
+            task = asyncio.ensure_future(self._operation(self.rng.choices(names, weights)[0]))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+        return self.report(loop.time() - start, rate)
+
+    def report(self, elapsed, rate):
+        endpoints = {endpoint: stats.summary() for endpoint, stats in sorted(self.stats.items())}
+        return {
+            'elapsed_seconds': round(elapsed, 3), 'target_rate': rate,
+            'achieved_rate': round(sum(self.operations.values()) / elapsed, 2) if elapsed else 0.0,
+            'operations': dict(self.operations), 'dropped': self.dropped,
+            'pending_trades': len(self.pending), 'endpoints': endpoints,
+        }
+
+
+def print_report(report):
+    print()
+    print(f"📊 負載測試結果: {report['elapsed_seconds']:.1f} 秒, 目標 {report['target_rate']:g} 操作/秒, "
+          f"實際 {report['achieved_rate']:g} 操作/秒")
+    operations = ', '.join(f"{name} {count}" for name, count in report['operations'].items())
+    dropped = f"  (略過 {report['dropped']})" if report['dropped'] else ''
+    print(f"   操作: {operations}{dropped}")
+    print()
+    print(f"   {'端點':<32} {'請求':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'錯誤率':>7} {'鎖競爭':>7}")
+    for endpoint, s in report['endpoints'].items():
+        latencies = ' '.join('        -' if s[f'p{p}_ms'] is None else f"{s[f'p{p}_ms']:9.1f}" for p in PERCENTILES)
+        print(f"   {endpoint:<34} {s['requests']:>7} {latencies} {s['error_rate']:>8.1%} {s['lock_rate']:>8.1%}")
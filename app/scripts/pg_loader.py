@@ -0,0 +1,184 @@
+"""
+PostgreSQL 直接載入 - Ticket Match 假資料生成用
+吃與 SqlStreamWriter 相同的 (op, table, row) 串流，以 psycopg2 copy_expert 分批 COPY 進資料庫，
+省去中間的 .sql 檔與 init-db:seed 的二次解析
+
+每個資料表各用一條連線；依外鍵相依關係分層 (load_levels)，同一層的資料表以多執行緒同時 COPY，
+上一層全部完成後才載入下一層，所以子資料列寫入時父資料列一定已經 commit
+load_manifest 載入 chunked_export 分塊匯出的目錄：同樣依層級，同一層所有資料表的分塊以多條連線同時 COPY
+連線設定與 lib/db.ts 相同：POSTGRES_HOST / POSTGRES_PORT / POSTGRES_DB / POSTGRES_USER / POSTGRES_PASSWORD
+(環境變數優先，其次為 Next.js 與 init-db.js 讀取的 app/.env.local)
+"""
+
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+
+from chunked_export import read_manifest, open_chunk
+from copy_writer import CopyStreamWriter
+from finalize import SCHEMA_PATH, secondary_indexes, prelude_statements, finalize_statements
+from sql_stream_writer import TABLES, UPDATES, load_levels
+
+
+ENV_LOCAL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.env.local')
+
+
+def read_env_file(path=ENV_LOCAL_PATH):
+    """解析 KEY=VALUE 格式的 .env 檔 (同 init-db.js：略過 # 開頭的行；另去掉成對的引號)，檔案不存在時為空"""
+    values = {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return values
+    for line in lines:
+        key, sep, value = line.partition('=')
+        if not sep or line.startswith('#') or not key.strip():
+            continue
+        value = value.strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+            value = value[1:-1]
+        values[key.strip()] = value
+    return values
+
+
+def connection_params(env_path=ENV_LOCAL_PATH):
+    """連線參數：環境變數優先，其次為 app/.env.local (預設值同 lib/db.ts)"""
+    env = dict(read_env_file(env_path), **os.environ)
+    return {
+        'host': env.get('POSTGRES_HOST', 'localhost'),
+        'port': int(env.get('POSTGRES_PORT', '5432')),
+        'dbname': env.get('POSTGRES_DB', 'ticket_match'),
+        'user': env.get('POSTGRES_USER', 'postgres'),
+        'password': env.get('POSTGRES_PASSWORD'),
+    }
+
+
+def apply_schema(params=None, schema_path=SCHEMA_PATH):
+    """套用 schema.sql (會 DROP 並重建所有資料表，僅用於全新或測試用資料庫)"""
+    with open(schema_path, encoding='utf-8') as f:
+        schema = f.read()
+    conn = psycopg2.connect(**(params or connection_params()))
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute(schema)
+    finally:
+        conn.close()
+
+
+class PostgresLoader(CopyStreamWriter):
+    """
+    以 COPY FROM STDIN 直接寫入資料庫的寫出器 (介面同 SqlStreamWriter)
+    每批 COPY 在各自的連線上 autocommit；載入失敗時資料庫會留下部分資料，請使用全新的資料庫
+    載入前先移除 schema.sql 的次要索引，close() 時重建並同步序列、ANALYZE (見 finalize.py)
+    """
+
+    def __init__(self, params=None, chunk_rows=10000, schema_path=SCHEMA_PATH):
+        super().__init__(None, chunk_rows)
+        self.params = params or connection_params()
+        self._levels = load_levels()
+        self._connections = {}
+        self._indexes = secondary_indexes(schema_path)
+        self._execute(prelude_statements(self._indexes))
+        self._executor = ThreadPoolExecutor(max_workers=max(len(level) for level in self._levels))
+
+    def _connection(self, table):
+        conn = self._connections.get(table)
+        if conn is None:
+            conn = self._connections[table] = psycopg2.connect(**self.params)
+            conn.autocommit = True
+        return conn
+
+    def _execute(self, statements):
+        with self._connection('EVENT').cursor() as cur:
+            for statement in statements:
+                cur.execute(statement)
+
+    def _copy(self, table, lines):
+        sql_name, columns = TABLES[table]
+        data = io.StringIO('\n'.join(lines) + '\n')
+        with self._connection(table).cursor() as cur:
+            cur.copy_expert(f"COPY {sql_name} ({', '.join(columns)}) FROM STDIN", data)
+
+    def flush(self):
+        for level in self._levels:
+            tables = [table for table in level if self._inserts[table]]
+            futures = [self._executor.submit(self._copy, table, self._inserts[table]) for table in tables]
+            for future in futures:
+                future.result()
+            for table in tables:
+                self._inserts[table].clear()
+        for table, (key, columns) in UPDATES.items():
+            rows = self._updates[table]
+            if rows:
+                with self._connection(table).cursor() as cur:
+                    cur.execute(self.update_sql(table, key, columns, rows))
+                rows.clear()
+
+    def close(self):
+        try:
+            self.flush()
+            self._execute(finalize_statements(self._indexes))
+        finally:
+            self._executor.shutdown()
+            for conn in self._connections.values():
+                conn.close()
+            self._connections.clear()
+
+
+def load_manifest(directory, params=None, workers=4):
+    """
+    載入 export_chunks 寫出的分塊目錄 (manifest.json)：先移除次要索引，依 manifest 的載入層級逐層載入，
+    同一層所有資料表的分塊由 workers 個執行緒 (各自一條連線) 同時載入；最後套用 UPDATE 分塊並執行收尾
+    回傳各資料表載入的筆數
+    """
+    manifest = read_manifest(directory)
+    params = params or connection_params()
+    tables = {entry['table']: entry for entry in manifest['tables']}
+    local = threading.local()
+    connections = []
+
+    def cursor():
+        conn = getattr(local, 'conn', None)
+        if conn is None:
+            conn = local.conn = psycopg2.connect(**params)
+            conn.autocommit = True
+            connections.append(conn)
+        return conn.cursor()
+
+    def load(copy, chunk):
+        with open_chunk(os.path.join(directory, chunk['path'])) as f, cursor() as cur:
+            if copy is None:
+                cur.execute(f.read().decode('utf-8'))
+            else:
+                cur.copy_expert(copy, f)
+
+    try:
+        with cursor() as cur:
+            for statement in manifest['prelude']:
+                cur.execute(statement)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for level in manifest['levels']:
+                futures = [executor.submit(load, tables[table]['copy'], chunk)
+                           for table in level for chunk in tables[table]['files']]
+                for future in futures:
+                    future.result()
+        # 暫存表只存在於建立它的連線，UPDATE 分塊一律在主執行緒的連線上依序套用
+        for update in manifest['updates']:
+            with cursor() as cur:
+                for statement in update.get('setup', ()):
+                    cur.execute(statement)
+                for chunk in update['files']:
+                    load(update.get('copy'), chunk)
+                for statement in update.get('apply', ()):
+                    cur.execute(statement)
+        with cursor() as cur:
+            for statement in manifest['finalize']:
+                cur.execute(statement)
+    finally:
+        for conn in connections:
+            conn.close()
+    return {table: entry['rows'] for table, entry in tables.items()}
@@ -0,0 +1,112 @@
+"""
+抽樣資料結構 - Ticket Match 假資料生成用
+提供依剩餘容量加權的 O(log n) 抽樣與 O(1) 抽取/移除的集合，
+避免每筆資料都重新掃描候選清單
+"""
+
+from array import array
+
+
+class FenwickSampler:
+    """
+    以 Fenwick tree (Binary Indexed Tree) 維護非負整數權重
+    sample / add 皆為 O(log n)；權重歸零的項目自然不會再被抽中
+    """
+
+    def __init__(self, weights):
+        n = len(weights)
+        self.weights = list(weights)
+        self.total = sum(self.weights)
+        self._tree = [0] * (n + 1)
+        # O(n) 建樹
+        for i, w in enumerate(self.weights, start=1):
+            self._tree[i] += w
+            parent = i + (i & -i)
+            if parent <= n:
+                self._tree[parent] += self._tree[i]
+        self._top = 1 << n.bit_length() if n else 0
+
+    def __len__(self):
+        return len(self.weights)
+
+    def add(self, index, delta):
+        """調整第 index 項的權重"""
+        self.weights[index] += delta
+        self.total += delta
+        i = index + 1
+        n = len(self.weights)
+        while i <= n:
+            self._tree[i] += delta
+            i += i & -i
+
+    def find(self, target):
+        """回傳前綴和首次超過 target 的項目索引 (0 <= target < total)"""
+        pos = 0
+        step = self._top
+        n = len(self.weights)
+        while step:
+            nxt = pos + step
+            if nxt <= n and self._tree[nxt] <= target:
+                pos = nxt
+                target -= self._tree[nxt]
+            step >>= 1
+        return pos
+
+    def sample(self, randint):
+        """
+        依權重抽出一個索引；randint(a, b) 為閉區間整數亂數函式
+        (例如 Faker 的 random_int)，總權重為 0 時回傳 None
+        """
+        if self.total <= 0:
+            return None
+        return self.find(randint(0, self.total - 1))
+
+
+class IndexedPool:
+    """
+    0..n-1 整數索引的集合，支援 O(1) 隨機抽取、O(1) 加入/移除
+    以兩個 array 存放元素與位置 (每個元素 8 bytes)，移除時與陣列尾端交換
+    full 為 False 時從空集合開始 (之後以 add 加入)
+    """
+
+    def __init__(self, n, full=True):
+        self.items = array('i', range(n))
+        self._pos = array('i', range(n)) if full else array('i', [-1]) * n
+        self._size = n if full else 0
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, item):
+        return 0 <= item < len(self._pos) and self._pos[item] >= 0
+
+    def add(self, item):
+        """加入元素；已存在時忽略"""
+        if self._pos[item] >= 0:
+            return
+        self.items[self._size] = item
+        self._pos[item] = self._size
+        self._size += 1
+
+    def remove(self, item):
+        """移除元素；不存在時忽略"""
+        i = self._pos[item]
+        if i < 0:
+            return
+        self._size -= 1
+        last = self.items[self._size]
+        self.items[i] = last
+        self._pos[last] = i
+        self._pos[item] = -1
+
+    def pick(self, randint):
+        """隨機取一個元素 (不移除)；randint(a, b) 為閉區間整數亂數函式，空集合回傳 None"""
+        if not self._size:
+            return None
+        return self.items[randint(0, self._size - 1)]
+
+
+def pick_index_excluding(randint, n, excluded):
+    """在 0..n-1 中均勻抽一個不等於 excluded 的索引 (O(1)，n >= 2)"""
+    i = randint(0, n - 2)
+    return i + 1 if i >= excluded else i
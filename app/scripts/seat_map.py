@@ -0,0 +1,76 @@
+"""
+場地座位圖 - Ticket Match 假資料生成用
+依 VENUES 容量與 SEAT_AREAS 建立 區 -> 排 -> 號 的座位空間，
+並以惰性 Fisher-Yates 洗牌配置座位：每個座位 O(1)、不需重試
+"""
+
+from taiwan_music_data import SEAT_AREAS
+
+
+def sections_for_capacity(capacity):
+    """依場地規模決定分區 (沿用原本大/中/小型場地的分區方式)"""
+    if capacity > 10000:
+        names = ['VIP區', 'A區', 'B區', 'C區']
+        seats_per_row = 40
+    elif capacity > 5000:
+        names = ['A區', 'B區', 'C區']
+        seats_per_row = 30
+    else:
+        names = ['A區', 'B區', '一般區']
+        seats_per_row = 20
+    return [name for name in names if name in SEAT_AREAS], seats_per_row
+
+
+class VenueSeatMap:
+    """
+    單一場地的座位圖；座位以 0..capacity-1 的整數編號，
+    seat(index) 將編號換算為 (seat_area, seat_number)
+    """
+
+    def __init__(self, venue):
+        self.venue = venue['name']
+        self.capacity = venue['capacity']
+        names, self.seats_per_row = sections_for_capacity(self.capacity)
+
+        # 平均分配容量到各區，餘數分給前面的區
+        base, extra = divmod(self.capacity, len(names))
+        self.sections = []
+        offset = 0
+        for i, name in enumerate(names):
+            size = base + (1 if i < extra else 0)
+            self.sections.append((offset, size, name))
+            offset += size
+
+    def seat(self, index):
+        """將座位編號換算為 (區, '排號')，例如 ('A區', '12排08號')"""
+        for offset, size, name in reversed(self.sections):
+            if index >= offset:
+                row, number = divmod(index - offset, self.seats_per_row)
+                return name, f"{row + 1}排{number + 1:02d}號"
+        raise IndexError(index)
+
+
+class SeatAllocator:
+    """
+    某一場次的空位配置器：對 0..capacity-1 做惰性 Fisher-Yates 洗牌，
+    只記錄被交換過的位置，因此記憶體與已售座位數成正比
+    """
+
+    def __init__(self, seat_map):
+        self.seat_map = seat_map
+        self.remaining = seat_map.capacity
+        self._swapped = {}
+
+    def allocate(self, randint):
+        """隨機配置一個空位並回傳 (seat_area, seat_number)；已售完時回傳 None"""
+        if self.remaining <= 0:
+            return None
+        last = self.remaining - 1
+        j = randint(0, last)
+        index = self._swapped.get(j, j)
+        # 把最後一個尚未配置的座位換到 j 的位置
+        tail = self._swapped.pop(last, last)
+        if j != last:
+            self._swapped[j] = tail
+        self.remaining = last
+        return self.seat_map.seat(index)
@@ -0,0 +1,353 @@
+"""
+分片平行生成 - Ticket Match 假資料生成用
+以 ProcessPoolExecutor 把每個階段切成多個分片平行生成：
+  用戶  依用戶索引範圍切分 (測試帳號只在第 0 片)
+  活動  依活動數切分；排程期間的日期輪流分給各片 (第 k 片只用 d % 分片數 == k 的日子)，
+        場地不會跨分片重複預約
+  票券  依場次切分，票數依各片座位容量分配；持有者可為任何分片的用戶
+  貼文  依發文者 (用戶索引範圍) 切分
+  交易  依 Sell/Exchange 貼文切分；買家可為任何分片的用戶。每片以各用戶餘額的 1/分片數 為買方可動用金額，
+        各片的餘額變動加總後不會讓餘額為負；最終餘額的 UPDATE 由主程序合併後寫出
+每片使用由全域 seed 衍生的固定 seed 與 next_ids 中互不重疊的ID區段，並把每個資料表寫成各自的片段檔；
+最後依外鍵順序逐表串接。相同 (seed, 分片數, 基準時間) 的輸出逐位元組相同，與 worker 數無關
+階段之間只傳遞精簡狀態 (用戶UUID、活動/場次、票券欄位、貼文提供的票券)
+"""
+
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from datetime import timedelta
+
+from data_generator import TicketMatchDataGenerator
+from event_calendar import parse_sessions_distribution, mean_sessions
+from seat_map import VenueSeatMap
+from taiwan_music_data import VENUES
+from stream_state import UuidColumn, ListingOffers
+from trade_simulator import money
+from unique_registry import UniqueRegistry, suffix_email
+from sql_stream_writer import SqlStreamWriter, TABLES, UPDATES, INSERT, UPDATE
+from copy_writer import CopyStreamWriter, CsvDirectoryWriter
+from finalize import prelude_sql, finalize_sql
+
+# 片段檔串接順序：先依外鍵順序的所有 INSERT，再套用交易階段的 UPDATE
+FRAGMENTS = list(TABLES) + [f"{table}_update" for table in UPDATES]
+
+# 各階段 (iter_<stage>) 執行完要帶回主程序的生成器屬性
+STAGE_RESULTS = {
+    'users': ('user_ids', 'user_balances'),
+    'events_and_times': ('events', 'eventtimes'),
+    'tickets': ('ticket_columns',),
+    'listings': ('listing_offers',),
+    'trades_and_related': ('balance_deltas',),
+}
+
+
+def shard_seed(seed, stage, shard):
+    """由全域 seed 衍生分片 seed (不使用 hash()，其結果每個程序不同)"""
+    digest = hashlib.sha256(f"{seed}:{stage}:{shard}".encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def split_counts(total, parts):
+    """把 total 平均分成 parts 份 (前 total % parts 份各多 1)"""
+    base, extra = divmod(total, parts)
+    return [base + (1 if i < extra else 0) for i in range(parts)]
+
+
+def split_weighted(total, weights):
+    """依權重把 total 分成整數份 (最大餘數法，全程整數運算)"""
+    weight_sum = sum(weights)
+    if not weight_sum:
+        return [0] * len(weights)
+    counts = [total * w // weight_sum for w in weights]
+    remainders = sorted(range(len(weights)), key=lambda i: (-(total * weights[i] % weight_sum), i))
+    for i in remainders[:total - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+def id_bases(first_id, counts):
+    """各分片ID區段的起點"""
+    bases = []
+    for count in counts:
+        bases.append(first_id)
+        first_id += count
+    return bases
+
+
+class _FragmentFiles:
+    """mixin：每個資料表 (及 <table>_update) 寫到 directory 下各自的片段檔，close() 只關檔"""
+
+    def __init__(self, directory, chunk_rows):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._files = {}
+        SqlStreamWriter.__init__(self, None, chunk_rows)
+
+    def _output(self, name):
+        f = self._files.get(name)
+        if f is None:
+            f = self._files[name] = open(os.path.join(self.directory, f"{name}.part"), 'w',
+                                         encoding='utf-8', newline='')
+        return f
+
+    def close(self):
+        self.flush()
+        for f in self._files.values():
+            f.close()
+
+
+class SqlFragmentWriter(_FragmentFiles, SqlStreamWriter):
+    pass
+
+
+class CopyFragmentWriter(_FragmentFiles, CopyStreamWriter):
+    pass
+
+
+class CsvFragmentWriter(_FragmentFiles, CsvDirectoryWriter):
+    pass
+
+
+FRAGMENT_WRITERS = {'sql': SqlFragmentWriter, 'copy': CopyFragmentWriter, 'csv': CsvFragmentWriter}
+
+
+def _run_stage(task):
+    """worker：以分片 seed 建立生成器，還原前面階段的精簡狀態後執行一個階段"""
+    stage, shard = task['stage'], task['shard']
+    generator = TicketMatchDataGenerator(seed=shard_seed(task['seed'], stage, shard), now=task['now'],
+                                         vectorized=task['vectorized'], pools=task['pools'])
+    generator.next_ids.update(task['next_ids'])
+    for attr, value in task['state'].items():
+        setattr(generator, attr, value)
+
+    writer = FRAGMENT_WRITERS[task['fmt']](task['directory'], task['chunk_rows'])
+    users = []
+    with redirect_stdout(io.StringIO()):
+        for op, table, row in getattr(generator, f"iter_{stage}")(*task['args']):
+            if table == 'USER':
+                # 用戶列由主程序檢查跨分片的 username/email 唯一性後寫出
+                users.append(row)
+            else:
+                writer.write(op, table, row)
+    writer.close()
+
+    result = {'counts': writer.counts, 'users': users}
+    for attr in STAGE_RESULTS[stage]:
+        result[attr] = getattr(generator, attr)
+    return result
+
+
+def merge_fragments(directories, output, fmt, header):
+    """
+    依 FRAGMENTS 順序、再依分片順序串接片段檔，前後接上移除/重建索引等收尾 (見 finalize.py)；
+    csv 格式輸出為目錄並產生 load.sql
+    """
+    def sources(name):
+        paths = (os.path.join(d, f"{name}.part") for d in directories)
+        return [p for p in paths if os.path.exists(p)]
+
+    if fmt == 'csv':
+        os.makedirs(output, exist_ok=True)
+        present = set()
+        for name in FRAGMENTS:
+            parts = sources(name)
+            if parts:
+                file_name = f"{name.lower()}.csv"
+                present.add(file_name)
+                with open(os.path.join(output, file_name), 'wb') as out:
+                    for path in parts:
+                        with open(path, 'rb') as f:
+                            shutil.copyfileobj(f, out)
+        CsvDirectoryWriter.write_load_script(output, present)
+        return
+
+    with open(output, 'wb') as out:
+        out.write((header + prelude_sql()).encode('utf-8'))
+        for name in FRAGMENTS:
+            for path in sources(name):
+                with open(path, 'rb') as f:
+                    shutil.copyfileobj(f, out)
+        out.write(finalize_sql().encode('utf-8'))
+
+
+class ShardedGenerator:
+    """分片模式的協調者：逐階段派工給 worker，合併精簡狀態後再派下一階段"""
+
+    def __init__(self, shards, seed=42, workers=None, chunk_rows=10000, scale_factor=1.0, vectorized=False,
+                 pools=None, now=None):
+        if shards < 1:
+            raise ValueError(f"分片數必須 >= 1: {shards}")
+        self.shards = shards
+        self.workers = workers or min(shards, os.cpu_count() or 1)
+        self.chunk_rows = chunk_rows
+        # 主程序的生成器只用來決定基準時間、排程期間、建立共用的值池，並寫出跨分片去重後的用戶
+        self.generator = TicketMatchDataGenerator(scale_factor, seed=seed, now=now, pools=pools)
+        self.seed = seed
+        self.vectorized = vectorized
+
+    def _tasks(self, stage, args, state=(), next_ids=()):
+        """args / state / next_ids 皆為每個分片一份的清單"""
+        state = state or [{}] * self.shards
+        next_ids = next_ids or [{}] * self.shards
+        return [{
+            'stage': stage, 'shard': k, 'seed': self.seed, 'now': self.generator.now, 'vectorized': self.vectorized,
+            'args': args[k], 'state': state[k], 'next_ids': next_ids[k],
+            # 值池只在用戶階段用到；所有分片共用主程序的同一份池
+            'pools': self.generator.pools if stage == 'users' else None,
+            'fmt': self.fmt, 'chunk_rows': self.chunk_rows,
+            'directory': os.path.join(self.workdir, f"{len(self.directories):02d}-{stage}-{k:03d}"),
+        } for k in range(self.shards)]
+
+    def _run(self, pool, tasks):
+        results = list(pool.map(_run_stage, tasks))
+        self.directories.extend(task['directory'] for task in tasks)
+        for result in results:
+            for table, count in result['counts'].items():
+                self.counts[table] += count
+        return results
+
+    def generate(self, output, fmt, user_count, event_count, ticket_count, listing_count, trade_count,
+                 sessions_per_event=4):
+        """生成並寫出到 output (fmt 同 TicketMatchDataGenerator.EXPORT_FORMATS)，回傳各資料表筆數"""
+        self.fmt = fmt
+        self.counts = {table: 0 for table in TABLES}
+        self.directories = []
+        parent = os.path.dirname(os.path.abspath(output))
+        print(f"🧩 分片模式: {self.shards} 個分片, {self.workers} 個 worker, seed {self.seed}")
+
+        with tempfile.TemporaryDirectory(prefix='.shards-', dir=parent) as workdir, \
+                ProcessPoolExecutor(max_workers=self.workers) as pool:
+            self.workdir = workdir
+            user_ids = self._users(pool, user_count)
+            events, eventtimes = self._events(pool, event_count, sessions_per_event)
+            ticket_columns = self._tickets(pool, ticket_count, eventtimes, user_ids)
+            offers = self._listings(pool, listing_count, events, eventtimes, ticket_columns, user_ids)
+            self._trades(pool, trade_count, offers, ticket_columns, user_ids)
+
+            print(f"💾 合併片段到 {output} ({fmt})...")
+            header = (f"-- Generated fake data for Ticket Match (sharded: {self.shards} shards)\n"
+                      f"-- Seed: {self.seed}, reference time: {self.generator.now}\n\n")
+            merge_fragments(self.directories, output, fmt, header)
+
+        print(f"✅ 資料匯出完成！共 {sum(self.counts.values())} 筆記錄")
+        return self.counts
+
+    def _users(self, pool, user_count):
+        print(f"   👥 生成 {user_count} 個用戶...")
+        counts = split_counts(user_count, self.shards)
+        results = self._run(pool, self._tasks('users', [(count, k == 0) for k, count in enumerate(counts)]))
+
+        # 各分片內已唯一，這裡只處理跨分片的碰撞 (依分片順序，先到先得，後到者加後綴)
+        registry = UniqueRegistry(redraws=0)
+        writer = FRAGMENT_WRITERS[self.fmt](os.path.join(self.workdir, '00-users'), self.chunk_rows)
+        user_ids = UuidColumn()
+        self.user_balances = array('q')
+        self.owner_ranges = []
+        for result in results:
+            for row in result['users']:
+                row['username'] = registry.unique('USER.username', lambda: row['username'])
+                row['email'] = registry.unique('USER.email', lambda: row['email'], suffix=suffix_email)
+                writer.write(INSERT, 'USER', row)
+            start = len(user_ids)
+            user_ids.extend(result['user_ids'])
+            self.user_balances.extend(result['user_balances'])
+            self.owner_ranges.append(range(start, len(user_ids)))
+        writer.close()
+        # 用戶列 (與衍生的初始餘額記錄) 排在各分片的 USER_ROLE 片段之前
+        self.directories.insert(0, writer.directory)
+        for table, count in writer.counts.items():
+            self.counts[table] += count
+        return user_ids
+
+    def _events(self, pool, event_count, sessions_per_event):
+        counts, weights = parse_sessions_distribution(sessions_per_event)
+        expected_sessions = int(event_count * mean_sessions(counts, weights))
+        print(f"   🎪 生成 {event_count} 個活動和約 {expected_sessions} 個場次...")
+        first_day, window_days, _ = self.generator.schedule_window(expected_sessions)
+
+        event_counts = split_counts(event_count, self.shards)
+        event_bases = id_bases(1, event_counts)
+        # 場次數事先未知，每片預留 活動數 x 最大場次數 的ID區段 (eventtime_id 可能不連續)
+        eventtime_bases = id_bases(1, [count * max(counts) for count in event_counts])
+        args = [(event_counts[k], sessions_per_event,
+                 (first_day + timedelta(days=k), len(range(k, window_days, self.shards)), self.shards))
+                for k in range(self.shards)]
+        next_ids = [{'event_id': event_bases[k], 'eventtime_id': eventtime_bases[k]} for k in range(self.shards)]
+        results = self._run(pool, self._tasks('events_and_times', args, next_ids=next_ids))
+
+        events = [event for result in results for event in result['events']]
+        eventtimes = [et for result in results for et in result['eventtimes']]
+        return events, eventtimes
+
+    def _tickets(self, pool, ticket_count, eventtimes, user_ids):
+        print(f"   🎫 生成 {ticket_count} 張票券...")
+        capacity = {v['name']: VenueSeatMap(v).capacity for v in VENUES}
+        groups, start = [], 0
+        for size in split_counts(len(eventtimes), self.shards):
+            groups.append(eventtimes[start:start + size])
+            start += size
+        capacities = [sum(capacity[et['venue']] for et in group) for group in groups]
+        ticket_counts = split_weighted(min(ticket_count, sum(capacities)), capacities)
+        ticket_bases = id_bases(1, ticket_counts)
+
+        args = [(count,) for count in ticket_counts]
+        state = [{'eventtimes': group, 'user_ids': user_ids} for group in groups]
+        next_ids = [{'ticket_id': base} for base in ticket_bases]
+        results = self._run(pool, self._tasks('tickets', args, state, next_ids))
+
+        columns = results[0]['ticket_columns']
+        for result in results[1:]:
+            columns.extend(result['ticket_columns'])
+        return columns
+
+    def _listings(self, pool, listing_count, events, eventtimes, ticket_columns, user_ids):
+        print(f"   📝 生成 {listing_count} 個貼文...")
+        listing_counts = split_weighted(listing_count, [len(owners) for owners in self.owner_ranges])
+        listing_bases = id_bases(1, listing_counts)
+
+        args = [(listing_counts[k], self.owner_ranges[k]) for k in range(self.shards)]
+        state = {'events': events, 'eventtimes': eventtimes, 'ticket_columns': ticket_columns, 'user_ids': user_ids}
+        next_ids = [{'listing_id': base} for base in listing_bases]
+        results = self._run(pool, self._tasks('listings', args, [state] * self.shards, next_ids))
+
+        offers = ListingOffers()
+        for result in results:
+            offers.extend(result['listing_offers'])
+        return offers
+
+    def _trades(self, pool, trade_count, offers, ticket_columns, user_ids):
+        print(f"   🤝 生成 {trade_count} 筆交易...")
+        sizes = split_counts(len(offers), self.shards)
+        # 與 iter_trades_and_related 相同的上限：每片最多交易 65% 的 Sell/Exchange 貼文
+        trade_counts = [min(count, int(size * 0.65))
+                        for count, size in zip(split_weighted(trade_count, sizes), sizes)]
+        trade_bases = id_bases(1, trade_counts)
+
+        budgets = array('q', (balance // self.shards for balance in self.user_balances))
+        state, start = [], 0
+        for size in sizes:
+            state.append({'listing_offers': offers.slice(start, start + size),
+                          'ticket_columns': ticket_columns, 'user_ids': user_ids, 'user_balances': budgets})
+            start += size
+        args = [(count, False) for count in trade_counts]
+        next_ids = [{'trade_id': base} for base in trade_bases]
+        results = self._run(pool, self._tasks('trades_and_related', args, state, next_ids))
+
+        # 合併各片的餘額變動，每位用戶寫出一筆最終餘額
+        deltas = {}
+        for result in results:
+            for user, delta in result['balance_deltas'].items():
+                deltas[user] = deltas.get(user, 0) + delta
+        writer = FRAGMENT_WRITERS[self.fmt](os.path.join(self.workdir, f"{len(self.directories):02d}-balances"),
+                                            self.chunk_rows)
+        for user in sorted(deltas):
+            writer.write(UPDATE, 'USER', {'user_id': user_ids[user],
+                                          'balance': money(self.user_balances[user] + deltas[user])})
+        writer.close()
+        self.directories.append(writer.directory)
@@ -0,0 +1,128 @@
+"""
+欄式快照 - Ticket Match 假資料生成用
+把 ColumnTable 的每個欄位緩衝區原樣寫成一個檔案：<目錄>/<table>/<column>.<buffer>，
+另附 manifest.json (格式版本、schema 版本、seed、基準時間、各表筆數與欄位型別)
+讀取時以 mmap 對應每個檔案，欄位直接是檔案上的唯讀 memoryview：
+開啟千萬筆的快照幾乎不花時間，且讀取同一份快照的多個程序共用 page cache
+需要繼續寫入時 (例如從檢查點繼續生成) 以 writable=True 開啟，緩衝區會讀進記憶體成為可修改的 array / bytearray
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import sys
+from array import array
+
+from column_store import ColumnTable, COLUMN_CLASSES, COLUMN_TYPES
+from finalize import SCHEMA_PATH
+
+SNAPSHOT_VERSION = 1
+MANIFEST = 'manifest.json'
+
+
+def schema_version(schema_path=SCHEMA_PATH):
+    """schema.sql 與欄位型別的雜湊；任一改變時舊快照的欄位可能不再相符"""
+    digest = hashlib.sha256()
+    with open(schema_path, 'rb') as f:
+        digest.update(f.read())
+    digest.update(json.dumps(COLUMN_TYPES, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def _typecode(buffer):
+    return buffer.typecode if isinstance(buffer, array) else memoryview(buffer).format
+
+
+def write_snapshot(directory, tables, meta, files=None):
+    """
+    tables 為 資料表 -> ColumnTable，meta 為要記在 manifest 的其他資訊 (seed、基準時間...)，
+    files 為一併寫入快照目錄的其他檔案 (檔名 -> bytes)
+    先寫到暫存目錄再改名，中斷時不會留下不完整的快照
+    """
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    temp = os.path.join(parent, f".{os.path.basename(os.path.abspath(directory))}.tmp-{os.getpid()}")
+    shutil.rmtree(temp, ignore_errors=True)
+
+    manifest = dict(meta, version=SNAPSHOT_VERSION, schema_version=schema_version(), byteorder=sys.byteorder,
+                    tables={})
+    for table, column_table in tables.items():
+        table_dir = os.path.join(temp, table.lower())
+        os.makedirs(table_dir)
+        columns = {}
+        for name, column in column_table.columns.items():
+            buffers = {}
+            for buffer_name, buffer in column.buffers().items():
+                with open(os.path.join(table_dir, f"{name}.{buffer_name}"), 'wb') as f:
+                    f.write(memoryview(buffer).cast('B'))
+                buffers[buffer_name] = _typecode(buffer)
+            columns[name] = {'type': COLUMN_TYPES[table][name], 'buffers': buffers, 'state': column.state()}
+        manifest['tables'][table] = {'rows': len(column_table), 'columns': columns}
+
+    for name, content in (files or {}).items():
+        with open(os.path.join(temp, name), 'wb') as f:
+            f.write(content)
+    with open(os.path.join(temp, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    if os.path.exists(directory):
+        shutil.rmtree(directory)
+    os.rename(temp, directory)
+    return manifest
+
+
+def _map(path, typecode):
+    """以 mmap 唯讀對應檔案，回傳指定型別的 memoryview (空檔案無法 mmap，回傳空 array)"""
+    if os.path.getsize(path) == 0:
+        return array(typecode)
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    # memoryview 持有 mmap 的參照，檔案關閉後對應仍有效
+    return memoryview(mapped).cast(typecode)
+
+
+def _read(path, typecode, like):
+    """把檔案讀進記憶體：like (新欄位的同名緩衝區) 為 array 時回傳 array，否則回傳 bytearray"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    if not isinstance(like, array):
+        return bytearray(raw)
+    buffer = array(typecode)
+    buffer.frombytes(raw)
+    return buffer
+
+
+def read_manifest(directory):
+    with open(os.path.join(directory, MANIFEST), encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != SNAPSHOT_VERSION:
+        raise ValueError(f"不支援的快照格式版本: {manifest.get('version')} (目前為 {SNAPSHOT_VERSION})")
+    if manifest.get('byteorder') != sys.byteorder:
+        raise ValueError(f"快照的位元組順序 ({manifest.get('byteorder')}) 與本機不同")
+    return manifest
+
+
+def open_snapshot(directory, writable=False):
+    """
+    回傳 (資料表 -> ColumnTable, manifest)；schema 版本不同時仍會開啟，由呼叫端決定是否警告
+    writable 為 False 時欄位唯讀 (mmap)，True 時讀進記憶體，可再 append / update
+    """
+    manifest = read_manifest(directory)
+    tables = {}
+    for table, info in manifest['tables'].items():
+        table_dir = os.path.join(directory, table.lower())
+        columns = {}
+        for name, column in info['columns'].items():
+            column_class = COLUMN_CLASSES[column['type']]
+            fresh = column_class() if writable else None
+            buffers = {}
+            for buffer_name, typecode in column['buffers'].items():
+                path = os.path.join(table_dir, f"{name}.{buffer_name}")
+                if writable:
+                    buffers[buffer_name] = _read(path, typecode, getattr(fresh, buffer_name, None))
+                else:
+                    buffers[buffer_name] = _map(path, typecode)
+            columns[name] = column_class.from_buffers(info['rows'], buffers, column['state'])
+        tables[table] = ColumnTable(table, columns)
+    return tables, manifest
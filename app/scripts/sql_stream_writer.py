@@ -0,0 +1,165 @@
+"""
+串流 SQL 寫出器 - Ticket Match 假資料生成用
+每個資料表各有一個固定大小的緩衝區，緩衝區滿時依外鍵順序寫出所有資料表的
+INSERT (或 UPDATE) 批次，因此記憶體用量與資料總量無關
+資料列以 row_serializers 預先編譯的格式化器轉成字串；子類別以 FORMAT 選擇輸出格式
+"""
+
+from itertools import islice
+
+from row_serializers import serializer
+
+INSERT = 'insert'
+UPDATE = 'update'
+
+# 資料表名稱 -> (SQL 名稱, 欄位)；順序即外鍵相依順序
+TABLES = {
+    'USER': ('"USER"', ['user_id', 'username', 'password_hash', 'email', 'status', 'balance', 'user_description', 'created_at']),
+    'USER_ROLE': ('user_role', ['user_id', 'role']),
+    'EVENT': ('event', ['event_id', 'event_name', 'venue', 'description']),
+    'EVENTTIME': ('eventtime', ['eventtime_id', 'event_id', 'start_time', 'end_time']),
+    'TICKET': ('ticket', ['ticket_id', 'eventtime_id', 'owner_id', 'seat_area', 'seat_number', 'price', 'status', 'created_at']),
+    'LISTING': ('listing', ['listing_id', 'user_id', 'event_id', 'event_date', 'content', 'status', 'type', 'offered_ticket_ids', 'created_at']),
+    'LISTING_TICKET': ('listing_ticket', ['listing_id', 'ticket_id']),
+    'TRADE': ('trade', ['trade_id', 'listing_id', 'status', 'agreed_price', 'created_at', 'updated_at']),
+    'TRADE_PARTICIPANT': ('trade_participant', ['trade_id', 'user_id', 'role', 'confirmed', 'confirmed_at']),
+    'TRADE_TICKET': ('trade_ticket', ['trade_id', 'ticket_id', 'from_user_id', 'to_user_id']),
+    'USER_BALANCE_LOG': ('user_balance_log', ['user_id', 'trade_id', 'change', 'reason', 'created_at']),
+}
+
+# 資料表 -> 其外鍵參照的資料表 (與 schema.sql 一致)
+FOREIGN_KEYS = {
+    'USER': (),
+    'USER_ROLE': ('USER',),
+    'EVENT': (),
+    'EVENTTIME': ('EVENT',),
+    'TICKET': ('EVENTTIME', 'USER'),
+    'LISTING': ('USER', 'EVENT'),
+    'LISTING_TICKET': ('LISTING', 'TICKET'),
+    'TRADE': ('LISTING',),
+    'TRADE_PARTICIPANT': ('TRADE', 'USER'),
+    'TRADE_TICKET': ('TRADE', 'TICKET', 'USER', 'TRADE_PARTICIPANT'),
+    'USER_BALANCE_LOG': ('USER', 'TRADE'),
+}
+
+# 交易階段會更新先前已寫出的資料列：資料表 -> (主鍵, {欄位: SQL 型別})
+UPDATES = {
+    'USER': ('user_id', {'balance': 'numeric'}),
+    'TICKET': ('ticket_id', {'owner_id': 'uuid', 'status': 'varchar'}),
+    'LISTING': ('listing_id', {'status': 'varchar'}),
+}
+
+# UPDATES 主鍵的 SQL 型別 (未列出的為 integer)
+UPDATE_KEY_TYPES = {'USER': 'uuid'}
+
+
+def load_levels():
+    """
+    依外鍵相依關係把資料表分層：同一層的資料表互不參照，可同時載入；
+    每一層只參照前面各層的資料表
+    """
+    depth = {}
+    for table in TABLES:
+        depth[table] = 1 + max((depth[parent] for parent in FOREIGN_KEYS[table]), default=-1)
+    levels = [[] for _ in range(max(depth.values()) + 1)]
+    for table in TABLES:
+        levels[depth[table]].append(table)
+    return levels
+
+
+class SqlStreamWriter:
+    """
+    將 (op, table, row) 串流寫成分批的 INSERT / UPDATE 陳述式
+    每一筆資料列的父資料列都比它先送入，而寫出時一律依 TABLES 順序清空所有緩衝區，
+    所以外鍵參照的資料列一定先寫出
+    """
+
+    FORMAT = 'sql'
+    # write_columns 每次轉換的列數
+    COLUMN_BLOCK_ROWS = 50000
+
+    def __init__(self, f, chunk_rows=1000):
+        self.f = f
+        self.chunk_rows = chunk_rows
+        self._format_row = {table: serializer(table, self.FORMAT).format_row for table in TABLES}
+        self._inserts = {table: [] for table in TABLES}
+        self._updates = {table: [] for table in UPDATES}
+        self.counts = {table: 0 for table in TABLES}
+
+    def write(self, op, table, row):
+        if op == UPDATE:
+            buffer = self._updates[table]
+            buffer.append(row)
+        else:
+            buffer = self._inserts[table]
+            buffer.append(self._format_row[table](row))
+            self.counts[table] += 1
+            # 衍生資料列：初始餘額記錄、LISTING_TICKET (write_columns 不衍生，見清單模式的 write_collected)
+            if table == 'USER':
+                self.write(INSERT, 'USER_BALANCE_LOG', {
+                    'user_id': row['user_id'], 'trade_id': None, 'change': row['balance'],
+                    'reason': 'INITIAL_BALANCE', 'created_at': row['created_at']
+                })
+            elif table == 'LISTING' and row.get('offered_ticket_ids'):
+                for ticket_id in row['offered_ticket_ids']:
+                    self.write(INSERT, 'LISTING_TICKET', {'listing_id': row['listing_id'], 'ticket_id': ticket_id})
+        if len(buffer) >= self.chunk_rows:
+            self.flush()
+
+    def write_columns(self, table, values, start=0, stop=None):
+        """
+        整張資料表 (或第 start..stop 列) 以欄為單位送入：values 為 欄位 -> 該欄所有值 (見 RowSerializer.format_columns)
+        不衍生資料列 (初始餘額記錄、LISTING_TICKET 由呼叫端一併送入)；同樣須依外鍵順序呼叫
+        """
+        format_columns = serializer(table, self.FORMAT).format_columns
+        buffer = self._inserts[table]
+        total = len(next(iter(values.values()))) if stop is None else stop
+        # 分段轉換 (每段 COLUMN_BLOCK_ROWS 列)，轉換中的暫存不隨資料表大小成長
+        for block in range(start, total, self.COLUMN_BLOCK_ROWS):
+            lines = format_columns(values, block, min(block + self.COLUMN_BLOCK_ROWS, total))
+            while True:
+                before = len(buffer)
+                buffer.extend(islice(lines, self.chunk_rows - before))
+                self.counts[table] += len(buffer) - before
+                if len(buffer) < self.chunk_rows:
+                    break
+                self.flush()
+
+    def _output(self, name):
+        """資料表 (或 <table>_update) 的輸出檔；預設全部寫到同一個檔案"""
+        return self.f
+
+    def write_rows(self, table, sql_name, columns, lines):
+        f = self._output(table)
+        f.write(f"INSERT INTO {sql_name} ({', '.join(columns)}) VALUES\n(")
+        f.write('),\n('.join(lines))
+        f.write(');\n\n')
+
+    def flush(self):
+        for table, (sql_name, columns) in TABLES.items():
+            buffer = self._inserts[table]
+            if buffer:
+                self.write_rows(table, sql_name, columns, buffer)
+                buffer.clear()
+        for table, (key, columns) in UPDATES.items():
+            buffer = self._updates[table]
+            if buffer:
+                self._write_update(table, key, columns, buffer)
+                buffer.clear()
+
+    @staticmethod
+    def update_sql(table, key, columns, rows):
+        """一批 UPDATE 資料列 -> 單一 UPDATE ... FROM (VALUES ...) 陳述式"""
+        sql_name, _ = TABLES[table]
+        names = [key] + list(columns)
+        values = '(' + '),\n('.join(map(serializer(table, 'sql', tuple(names)).format_row, rows)) + ')'
+        assignments = ', '.join(f"{c} = v.{c}::{t}" for c, t in columns.items())
+        cast = f"::{UPDATE_KEY_TYPES[table]}" if table in UPDATE_KEY_TYPES else ''
+        return (f"UPDATE {sql_name} AS t SET {assignments} FROM (VALUES\n{values}\n) AS v({', '.join(names)})\n"
+                f"WHERE t.{key} = v.{key}{cast};")
+
+    def _write_update(self, table, key, columns, rows):
+        self._output(f"{table}_update").write(self.update_sql(table, key, columns, rows) + '\n\n')
+
+    def close(self):
+        self.flush()
@@ -0,0 +1,131 @@
+"""
+跨階段的精簡狀態 - Ticket Match 假資料生成用
+串流模式下資料列寫出後即丟棄，後續階段只需要這些以 array 存放的欄位：
+用戶 UUID、票券持有者/場次/價格/狀態、Sell/Exchange 貼文提供的票券
+"""
+
+from array import array
+import uuid
+
+TICKET_STATUSES = ('Active', 'Locked', 'Expired', 'Canceled')
+TICKET_STATUS_CODES = {s: i for i, s in enumerate(TICKET_STATUSES)}
+
+LISTING_TYPES = ('Sell', 'Buy', 'Exchange')
+LISTING_TYPE_CODES = {t: i for i, t in enumerate(LISTING_TYPES)}
+
+
+class UuidColumn:
+    """以每筆 16 bytes 存放 UUID，讀取時轉回字串"""
+
+    def __init__(self, data=b''):
+        self._data = bytearray(data)
+
+    def __len__(self):
+        return len(self._data) // 16
+
+    def tobytes(self):
+        return bytes(self._data)
+
+    def extend(self, other):
+        self._data += other._data
+
+    def append(self, value):
+        self._data += value.bytes
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        start = index * 16
+        return str(uuid.UUID(bytes=bytes(self._data[start:start + 16])))
+
+
+class TicketColumns:
+    """票券狀態：持有者 (用戶索引)、場次ID、價格、狀態代碼；以 ticket_id - first_id 為索引"""
+
+    def __init__(self, first_id=1):
+        self.first_id = first_id
+        self.owners = array('i')
+        self.eventtimes = array('i')
+        self.prices = array('i')
+        self.statuses = array('b')
+
+    def __len__(self):
+        return len(self.owners)
+
+    def append(self, owner, eventtime_id, price, status):
+        self.owners.append(owner)
+        self.eventtimes.append(eventtime_id)
+        self.prices.append(price)
+        self.statuses.append(TICKET_STATUS_CODES[status])
+
+    def index(self, ticket_id):
+        return ticket_id - self.first_id
+
+    def extend_buffers(self, owners, eventtimes, prices, statuses):
+        """整批加入票券：參數為與各欄位 array 型別相同的連續緩衝區 (例如 dtype 為 intc / int8 的 numpy 陣列)"""
+        for column, values in ((self.owners, owners), (self.eventtimes, eventtimes),
+                               (self.prices, prices), (self.statuses, statuses)):
+            column.frombytes(memoryview(values).cast('B'))
+
+    def extend(self, other):
+        """接上 ticket_id 緊接在後的另一段票券 (分片模式合併用)"""
+        if other.first_id != self.first_id + len(self):
+            raise ValueError(f"票券ID不連續: 預期 {self.first_id + len(self)}，實際 {other.first_id}")
+        self.owners.extend(other.owners)
+        self.eventtimes.extend(other.eventtimes)
+        self.prices.extend(other.prices)
+        self.statuses.extend(other.statuses)
+
+
+class ListingOffers:
+    """
+    Sell/Exchange 貼文狀態：貼文ID、發文者 (用戶索引)、類型代碼、上架時間 (自 1970-01-01 起的微秒)，
+    以及提供的票券 (CSR 格式)
+    """
+
+    def __init__(self):
+        self.listing_ids = array('i')
+        self.sellers = array('i')
+        self.types = array('b')
+        self.created_ats = array('q')
+        self.offsets = array('i', [0])
+        self.ticket_ids = array('i')
+
+    def __len__(self):
+        return len(self.listing_ids)
+
+    def append(self, listing_id, seller, listing_type, ticket_ids, created_at):
+        self.listing_ids.append(listing_id)
+        self.sellers.append(seller)
+        self.types.append(LISTING_TYPE_CODES[listing_type])
+        self.created_ats.append(created_at)
+        self.ticket_ids.extend(ticket_ids)
+        self.offsets.append(len(self.ticket_ids))
+
+    def tickets(self, index):
+        return self.ticket_ids[self.offsets[index]:self.offsets[index + 1]]
+
+    def type_of(self, index):
+        return LISTING_TYPES[self.types[index]]
+
+    def extend(self, other):
+        """接上另一段貼文 (分片模式合併用)"""
+        base = len(self.ticket_ids)
+        self.listing_ids.extend(other.listing_ids)
+        self.sellers.extend(other.sellers)
+        self.types.extend(other.types)
+        self.created_ats.extend(other.created_ats)
+        self.offsets.extend(base + offset for offset in other.offsets[1:])
+        self.ticket_ids.extend(other.ticket_ids)
+
+    def slice(self, start, stop):
+        """第 start..stop-1 則貼文組成的新 ListingOffers"""
+        part = ListingOffers()
+        part.listing_ids = self.listing_ids[start:stop]
+        part.sellers = self.sellers[start:stop]
+        part.types = self.types[start:stop]
+        part.created_ats = self.created_ats[start:stop]
+        base = self.offsets[start]
+        part.offsets = array('i', (offset - base for offset in self.offsets[start:stop + 1]))
+        part.ticket_ids = self.ticket_ids[base:self.offsets[stop]]
+        return part
@@ -0,0 +1,84 @@
+"""
+票券庫存索引 - Ticket Match 假資料生成用
+以 (owner, event, status) 查詢用戶尚未使用的票券，票券被貼文使用後就地移除，
+讓每則貼文的選票為 O(1) 而不必重新掃描全部票券
+"""
+
+from array import array
+from stream_state import TICKET_STATUS_CODES
+
+
+class TicketInventory:
+    """
+    依持有者分組的票券 (CSR 格式)，只收錄指定狀態 (預設 Active) 的票券
+      _slots[_start[o] : _start[o] + _live[o]] 為用戶 o 尚未被使用的票券索引
+    consume() 以與區段尾端交換的方式移除，為 O(1)；
+    event_tickets() 只掃描該用戶自己的區段 (平均只有數張票)
+    """
+
+    def __init__(self, ticket_columns, eventtime_events, user_count, status='Active'):
+        self.columns = ticket_columns
+        # eventtime_id -> event_id
+        self.eventtime_events = eventtime_events
+        status_code = TICKET_STATUS_CODES[status]
+
+        owners = ticket_columns.owners
+        statuses = ticket_columns.statuses
+        counts = array('i', bytes(4 * (user_count + 1)))
+        for i, owner in enumerate(owners):
+            if statuses[i] == status_code:
+                counts[owner + 1] += 1
+
+        # 前綴和得到每個用戶區段的起點
+        self._start = array('i', bytes(4 * (user_count + 1)))
+        for owner in range(user_count):
+            self._start[owner + 1] = self._start[owner] + counts[owner + 1]
+        self._live = array('i', counts[1:])
+
+        self._slots = array('i', bytes(4 * self._start[user_count]))
+        self._pos = array('i', [-1]) * len(owners)
+        fill = array('i', self._start[:user_count])
+        for i, owner in enumerate(owners):
+            if statuses[i] == status_code:
+                self._slots[fill[owner]] = i
+                self._pos[i] = fill[owner]
+                fill[owner] += 1
+
+    def count(self, owner):
+        """用戶尚未使用的票券數"""
+        return self._live[owner]
+
+    def pick(self, owner, randint):
+        """隨機取出用戶一張尚未使用的票券 (不移除)；randint(a, b) 為閉區間整數亂數函式"""
+        live = self._live[owner]
+        if not live:
+            return None
+        return self.columns.first_id + self._slots[self._start[owner] + randint(0, live - 1)]
+
+    def event_tickets(self, owner, event_id):
+        """用戶在某活動尚未使用的票券ID"""
+        start = self._start[owner]
+        eventtimes = self.columns.eventtimes
+        first_id = self.columns.first_id
+        return [first_id + i for i in self._slots[start:start + self._live[owner]]
+                if self.eventtime_events[eventtimes[i]] == event_id]
+
+    def consume(self, ticket_id):
+        """票券已被使用 (例如放進貼文)，從索引中移除"""
+        i = self.columns.index(ticket_id)
+        pos = self._pos[i]
+        if pos < 0:
+            return
+        owner = self.columns.owners[i]
+        last = self._start[owner] + self._live[owner] - 1
+        moved = self._slots[last]
+        self._slots[pos] = moved
+        self._pos[moved] = pos
+        self._pos[i] = -1
+        self._live[owner] -= 1
+
+    def eventtime_of(self, ticket_id):
+        return self.columns.eventtimes[self.columns.index(ticket_id)]
+
+    def event_of(self, ticket_id):
+        return self.eventtime_events[self.eventtime_of(ticket_id)]
@@ -0,0 +1,284 @@
+"""
+交易生命週期模擬 - Ticket Match 假資料生成用
+以優先佇列 (heapq) 推進時鐘的離散事件模擬，規則同 app/api/trades：
+  貼文     在 created_at 上架，進入可交易貼文池
+  提案     交易到達時間為 [start, end] 內依序產生的均勻時間；從池中取一則貼文建立 Pending 交易，貼文暫停交易
+  確認     賣方確認時鎖定票券 (Locked)；買方確認時須有足夠餘額 (扣除其他已確認、尚未成交的交易)，否則確認失敗
+  成交     雙方皆確認：票券轉給買方並恢復 Active、買方扣款/賣方入帳、貼文 Completed
+  取消/逾期 票券解鎖、釋放買方保留的金額，貼文回到池中可再交易
+  爭議     交易停在 Disputed，貼文與票券維持原狀
+  結束時仍未決的交易維持 Pending
+時間以自 EPOCH 起的微秒整數表示；金額以分為單位的整數計算，避免浮點誤差讓餘額與記錄不符
+"""
+
+import heapq
+from datetime import datetime, timedelta
+from itertools import count
+
+from samplers import IndexedPool, pick_index_excluding
+from sql_stream_writer import INSERT, UPDATE
+from stream_state import TICKET_STATUS_CODES
+
+EPOCH = datetime(1970, 1, 1)
+_ONE_MICROSECOND = timedelta(microseconds=1)
+HOUR = 3600 * 10 ** 6
+
+# 事件種類 (同一時間依此順序處理)
+SELLER_CONFIRM, BUYER_CONFIRM, CANCEL, DISPUTE, EXPIRE = range(5)
+
+# 交易腳本：事件發生機率與平均延遲 (提案後的指數分佈)；逾期為提案後固定時間
+# 約得到 Completed 72%、Canceled 11%、Expired 11% (含買方餘額不足)、Disputed 3%、Pending 3%
+SELLER_CONFIRM_RATE, SELLER_CONFIRM_HOURS = 0.96, 6
+BUYER_CONFIRM_RATE, BUYER_CONFIRM_HOURS = 0.96, 12
+CANCEL_RATE, CANCEL_HOURS = 0.16, 10
+DISPUTE_RATE, DISPUTE_HOURS = 0.05, 12
+EXPIRE_HOURS = 72
+
+# Sell 成交價為票面總額的 85%-100% (成交時 agreed_price 不得超過票券總價)；
+# Exchange 以 40% 機率為純換票 (價差 0)，其餘由提案者補 100-2000 元價差
+SELL_PRICE_FACTOR = (0.85, 1.0)
+EXCHANGE_EVEN_RATE = 0.4
+EXCHANGE_DIFFERENCE = (100, 2000)
+
+TRADE_STATUSES = ('Pending', 'Completed', 'Canceled', 'Disputed', 'Expired')
+PENDING, COMPLETED, CANCELED, DISPUTED, EXPIRED = range(5)
+
+_ACTIVE = TICKET_STATUS_CODES['Active']
+_LOCKED = TICKET_STATUS_CODES['Locked']
+
+
+def to_micros(value):
+    return (value - EPOCH) // _ONE_MICROSECOND
+
+
+def from_micros(micros):
+    return EPOCH + timedelta(microseconds=micros)
+
+
+def money(cents):
+    """分 -> DECIMAL(10,2) 值 (與 DecimalColumn 相同：整數元為 int，其餘為 float)"""
+    return cents // 100 if cents % 100 == 0 else cents / 100
+
+
+class _Trade:
+    __slots__ = ('trade_id', 'offer', 'seller', 'buyer', 'price', 'created', 'updated', 'status',
+                 'seller_at', 'buyer_at')
+
+    def __init__(self, trade_id, offer, seller, buyer, price, created):
+        self.trade_id = trade_id
+        self.offer = offer
+        self.seller = seller
+        self.buyer = buyer
+        self.price = price
+        self.created = created
+        self.updated = created
+        self.status = PENDING
+        self.seller_at = None
+        self.buyer_at = None
+
+
+class TradeSimulator:
+    """
+    offers (ListingOffers) 須有 created_ats；tickets (TicketColumns) 的持有者/狀態就地更新
+    balances 為各用戶可動用的金額 (分)，只讀不改；模擬結束後 deltas 為 用戶索引 -> 餘額變動 (分)
+    """
+
+    def __init__(self, rng, offers, tickets, user_ids, balances, start, end, first_trade_id=1):
+        self.rng = rng
+        self.offers = offers
+        self.tickets = tickets
+        self.user_ids = user_ids
+        self.balances = balances
+        self.start = to_micros(start)
+        self.end = to_micros(end)
+        self.next_trade_id = first_trade_id
+        self.deltas = {}
+        self.status_counts = dict.fromkeys(TRADE_STATUSES, 0)
+        self.events = 0
+        self.skipped = 0
+        # 買方已確認、尚未成交的交易保留的金額
+        self._committed = {}
+        # 尚未決定的交易 (trade_id -> _Trade，依 trade_id 順序)
+        self._open = {}
+        self._heap = []
+        self._seq = count()
+        self._pool = IndexedPool(len(offers), full=False)
+
+    def _arrivals(self, n):
+        """[start, end] 內 n 個排序後的均勻時間 (依序產生次序統計量，不需保留全部時間)"""
+        random, span = self.rng.random, self.end - self.start
+        x = 0.0
+        for remaining in range(n, 0, -1):
+            x += (1.0 - x) * (1.0 - random() ** (1.0 / remaining))
+            yield self.start + int(x * span)
+
+    def run(self, trade_count):
+        """模擬 trade_count 筆交易提案，依決定的先後產生資料列 (op, table, row)"""
+        offers, heap = self.offers, self._heap
+        created_ats = offers.created_ats
+        opening = sorted(range(len(offers)), key=created_ats.__getitem__)
+        next_open = 0
+        pool = self._pool
+        randint = self.rng.randint
+
+        for now in self._arrivals(trade_count):
+            while heap and heap[0][0] <= now:
+                yield from self._handle(*heapq.heappop(heap))
+            while next_open < len(opening) and created_ats[opening[next_open]] <= now:
+                pool.add(opening[next_open])
+                next_open += 1
+            offer = pool.pick(randint)
+            if offer is None:
+                self.skipped += 1
+                continue
+            pool.remove(offer)
+            self._propose(offer, now)
+        while heap:
+            yield from self._handle(*heapq.heappop(heap))
+
+    def pending_rows(self):
+        """模擬結束時仍為 Pending 的交易 (依 trade_id)"""
+        for trade in self._open.values():
+            yield from self._rows(trade)
+
+    def _propose(self, offer, now):
+        rng, offers, tickets = self.rng, self.offers, self.tickets
+        seller = offers.sellers[offer]
+        buyer = pick_index_excluding(rng.randint, len(self.user_ids), seller)
+        if offers.type_of(offer) == 'Sell':
+            base = sum(tickets.prices[tickets.index(tid)] for tid in offers.tickets(offer))
+            price = round(base * 100 * rng.uniform(*SELL_PRICE_FACTOR))
+        elif rng.random() < EXCHANGE_EVEN_RATE:
+            price = 0
+        else:
+            price = rng.randint(*EXCHANGE_DIFFERENCE) * 100
+        trade = _Trade(self.next_trade_id, offer, seller, buyer, price, now)
+        self.next_trade_id += 1
+        self._open[trade.trade_id] = trade
+
+        # 交易腳本：只排入在模擬結束前、逾期前發生的事件
+        random, expovariate = rng.random, rng.expovariate
+        deadline = now + EXPIRE_HOURS * HOUR
+        horizon = min(deadline, self.end)
+        for kind, rate, hours in ((SELLER_CONFIRM, SELLER_CONFIRM_RATE, SELLER_CONFIRM_HOURS),
+                                  (BUYER_CONFIRM, BUYER_CONFIRM_RATE, BUYER_CONFIRM_HOURS),
+                                  (CANCEL, CANCEL_RATE, CANCEL_HOURS),
+                                  (DISPUTE, DISPUTE_RATE, DISPUTE_HOURS)):
+            if random() < rate:
+                at = now + int(expovariate(1.0 / hours) * HOUR)
+                if at < horizon:
+                    self._push(at, kind, trade)
+        if deadline <= self.end:
+            self._push(deadline, EXPIRE, trade)
+
+    def _push(self, at, kind, trade):
+        heapq.heappush(self._heap, (at, kind, next(self._seq), trade))
+
+    def _handle(self, at, kind, _, trade):
+        self.events += 1
+        if trade.status != PENDING:
+            return ()
+        if kind == SELLER_CONFIRM:
+            trade.seller_at = trade.updated = at
+            self._set_tickets(trade, trade.seller, _LOCKED)
+        elif kind == BUYER_CONFIRM:
+            if trade.price:
+                committed = self._committed.get(trade.buyer, 0)
+                if self._balance(trade.buyer) - committed < trade.price:
+                    # 餘額不足，確認失敗；交易之後會被取消或逾期
+                    return ()
+                self._committed[trade.buyer] = committed + trade.price
+            trade.buyer_at = trade.updated = at
+        elif kind == DISPUTE:
+            return self._resolve(trade, DISPUTED, at)
+        else:
+            return self._resolve(trade, CANCELED if kind == CANCEL else EXPIRED, at)
+        if trade.seller_at is not None and trade.buyer_at is not None:
+            return self._resolve(trade, COMPLETED, at)
+        return ()
+
+    def _balance(self, user):
+        return self.balances[user] + self.deltas.get(user, 0)
+
+    def _release(self, trade):
+        if trade.buyer_at is not None and trade.price:
+            self._committed[trade.buyer] -= trade.price
+
+    def _set_tickets(self, trade, owner, status):
+        tickets = self.tickets
+        for ticket_id in self.offers.tickets(trade.offer):
+            index = tickets.index(ticket_id)
+            tickets.owners[index] = owner
+            tickets.statuses[index] = status
+
+    def _resolve(self, trade, status, at):
+        trade.status = status
+        trade.updated = at
+        del self._open[trade.trade_id]
+        if status == COMPLETED:
+            self._release(trade)
+            deltas = self.deltas
+            deltas[trade.buyer] = deltas.get(trade.buyer, 0) - trade.price
+            deltas[trade.seller] = deltas.get(trade.seller, 0) + trade.price
+            self._set_tickets(trade, trade.buyer, _ACTIVE)
+        elif status != DISPUTED:
+            # 取消/逾期：票券解鎖、貼文回到池中 (爭議中的交易維持鎖定，貼文不再開放)
+            self._release(trade)
+            if trade.seller_at is not None:
+                self._set_tickets(trade, trade.seller, _ACTIVE)
+            self._pool.add(trade.offer)
+        return self._rows(trade)
+
+    def _rows(self, trade):
+        """交易的最終資料列：TRADE、參與者、交易票券，成交時另有貼文/票券 UPDATE 與餘額記錄"""
+        self.status_counts[TRADE_STATUSES[trade.status]] += 1
+        offers, user_ids = self.offers, self.user_ids
+        listing_id = offers.listing_ids[trade.offer]
+        seller_id, buyer_id = user_ids[trade.seller], user_ids[trade.buyer]
+        price = money(trade.price)
+        updated_at = from_micros(trade.updated)
+        yield INSERT, 'TRADE', {
+            'trade_id': trade.trade_id,
+            'listing_id': listing_id,
+            'status': TRADE_STATUSES[trade.status],
+            'agreed_price': price,
+            'created_at': from_micros(trade.created),
+            'updated_at': updated_at
+        }
+        completed = trade.status == COMPLETED
+        if completed:
+            yield UPDATE, 'LISTING', {'listing_id': listing_id, 'status': 'Completed'}
+
+        for user_id, role, at in ((seller_id, 'seller', trade.seller_at), (buyer_id, 'buyer', trade.buyer_at)):
+            yield INSERT, 'TRADE_PARTICIPANT', {
+                'trade_id': trade.trade_id,
+                'user_id': user_id,
+                'role': role,
+                'confirmed': at is not None,
+                'confirmed_at': from_micros(at) if at is not None else None
+            }
+
+        # 票券 UPDATE：成交轉給買方；仍鎖定 (Pending/Disputed 且賣方已確認) 時標為 Locked
+        ticket_update = ({'owner_id': buyer_id, 'status': 'Active'} if completed else
+                         {'owner_id': seller_id, 'status': 'Locked'}
+                         if trade.status in (PENDING, DISPUTED) and trade.seller_at is not None else None)
+        for ticket_id in offers.tickets(trade.offer):
+            yield INSERT, 'TRADE_TICKET', {
+                'trade_id': trade.trade_id,
+                'ticket_id': ticket_id,
+                'from_user_id': seller_id,
+                'to_user_id': buyer_id
+            }
+            if ticket_update:
+                yield UPDATE, 'TICKET', dict(ticket_update, ticket_id=ticket_id)
+
+        if completed and trade.price:
+            reason = 'TRADE_PAYMENT' if offers.type_of(trade.offer) == 'Sell' else 'TRADE_PRICE_DIFFERENCE'
+            for user_id, change in ((seller_id, price), (buyer_id, -price)):
+                yield INSERT, 'USER_BALANCE_LOG', {
+                    'user_id': user_id,
+                    'trade_id': trade.trade_id,
+                    'change': change,
+                    'reason': reason,
+                    'created_at': updated_at
+                }
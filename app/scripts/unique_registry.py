@@ -0,0 +1,86 @@
+"""
+UNIQUE 欄位登錄表 - Ticket Match 假資料生成用
+以雜湊集合追蹤已使用的值，讓唯一性檢查為 O(1)，並以確定性的後綴解決碰撞
+"""
+
+# 以 unique() 產生的欄位中有長度限制者 (schema.sql 的 VARCHAR 長度)；加上後綴後超過時丟出 ValueError
+MAX_LENGTHS = {
+    'USER.username': 50,
+    'USER.email': 100,
+}
+
+
+def suffix_plain(value, n):
+    """在字串尾端加上數字後綴: alice -> alice1"""
+    return f"{value}{n}"
+
+
+def suffix_email(value, n):
+    """在 email 的 @ 之前加上數字後綴: alice@example.com -> alice1@example.com"""
+    local, _, domain = value.partition('@')
+    return f"{local}{n}@{domain}"
+
+
+class UniqueRegistry:
+    """每個 UNIQUE 欄位一個 set，提供 O(1) 的佔用與查詢"""
+
+    def __init__(self, redraws=1):
+        # 碰撞時先重抽幾次，之後改用後綴 (確保每個值最多 redraws + 1 次抽樣)
+        self.redraws = redraws
+        self._seen = {}
+        # column -> {base value -> 下一個可用的後綴}，避免後綴從 1 重新掃描
+        self._next_suffix = {}
+        self.collisions = {}
+
+    def _column(self, column):
+        seen = self._seen.get(column)
+        if seen is None:
+            seen = self._seen[column] = set()
+            self._next_suffix[column] = {}
+            self.collisions[column] = 0
+        return seen
+
+    def __contains__(self, key):
+        column, value = key
+        return value in self._seen.get(column, ())
+
+    def claim(self, column, value):
+        """嘗試佔用一個值；已被使用時回傳 False"""
+        seen = self._column(column)
+        if value in seen:
+            return False
+        seen.add(value)
+        return True
+
+    def unique(self, column, draw, suffix=suffix_plain):
+        """
+        以 draw() 產生候選值並保證在 column 內唯一
+        碰撞時先重抽 self.redraws 次，再以確定性的數字後綴解決
+        """
+        seen = self._column(column)
+        value = draw()
+        for _ in range(self.redraws):
+            if value not in seen:
+                break
+            self.collisions[column] += 1
+            value = draw()
+
+        if value in seen:
+            self.collisions[column] += 1
+            max_length = MAX_LENGTHS.get(column)
+            counters = self._next_suffix[column]
+            n = counters.get(value, 1)
+            candidate = suffix(value, n)
+            while candidate in seen:
+                n += 1
+                candidate = suffix(value, n)
+            counters[value] = n + 1
+            if max_length and len(candidate) > max_length:
+                raise ValueError(f"{column} 後綴後超過長度限制 {max_length}: {candidate}")
+            value = candidate
+
+        seen.add(value)
+        return value
+
+    def size(self, column):
+        return len(self._seen.get(column, ()))
@@ -0,0 +1,83 @@
+"""
+Faker 值池 - Ticket Match 假資料生成用
+啟動時以固定 seed 的 Faker 一次產生大量 user_name 與 email 網域 (或從快取檔載入)，
+生成時只從池中以 O(1) 取值並組合 (email = 池中的 user_name @ 池中的網域)，碰撞再交給 UniqueRegistry 加後綴；
+Faker 的成本因此是固定的啟動成本，不再隨資料筆數成長
+池內容只由 (locale, seed, size) 決定，所有階段與分片共用同一份池
+"""
+
+import json
+import os
+
+from faker import Faker, VERSION as FAKER_VERSION
+
+# 池格式或抽樣方式改變時遞增，舊的快取檔會自動重建
+POOL_VERSION = 1
+
+POOL_SIZE = 10000
+
+# email 網域的種類很少，只需少量樣本即可保留 Faker 的網域分佈
+DOMAIN_SAMPLES = 500
+
+
+class ValuePools:
+    """預先產生的 Faker 值；取值方法接受 randint(a, b) (同 Faker random_int)"""
+
+    def __init__(self, user_names, email_domains, key):
+        self.user_names = user_names
+        self.email_domains = email_domains
+        self.key = key
+
+    @staticmethod
+    def pool_key(seed, size, locale):
+        """決定池內容的參數；快取檔的 key 不符時重建"""
+        return {'version': POOL_VERSION, 'faker': FAKER_VERSION, 'locale': locale, 'seed': seed, 'size': size}
+
+    @classmethod
+    def build(cls, seed=42, size=POOL_SIZE, locale='zh_TW'):
+        """以獨立的 Faker 實例批次產生池 (不影響生成器本身的亂數序列)"""
+        if size < 1:
+            raise ValueError(f"值池大小必須 >= 1: {size}")
+        fake = Faker(locale)
+        fake.seed_instance(seed)
+        user_names = [fake.user_name() for _ in range(size)]
+        email_domains = [fake.email().partition('@')[2] for _ in range(min(size, DOMAIN_SAMPLES))]
+        return cls(user_names, email_domains, cls.pool_key(seed, size, locale))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['user_names'], data['email_domains'], data['key'])
+
+    def save(self, path):
+        """寫到暫存檔再改名，避免同時執行的程序讀到寫到一半的檔案"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump({'key': self.key, 'user_names': self.user_names, 'email_domains': self.email_domains},
+                      f, ensure_ascii=False)
+        os.replace(temp, path)
+
+    @classmethod
+    def load_or_build(cls, path, seed=42, size=POOL_SIZE, locale='zh_TW'):
+        """快取檔存在且 key 相符時直接載入，否則重建並寫回快取檔"""
+        key = cls.pool_key(seed, size, locale)
+        if os.path.exists(path):
+            try:
+                pools = cls.load(path)
+            except (OSError, ValueError, KeyError):
+                pools = None
+            if pools is not None and pools.key == key:
+                return pools
+        pools = cls.build(seed, size, locale)
+        pools.save(path)
+        return pools
+
+    def user_name(self, randint):
+        return self.user_names[randint(0, len(self.user_names) - 1)]
+
+    def email(self, randint):
+        """池中的 user_name 與網域組合 (同 Faker 的 {{user_name}}@{{domain}} 格式)"""
+        return f"{self.user_name(randint)}@{self.email_domains[randint(0, len(self.email_domains) - 1)]}"